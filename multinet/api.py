@@ -1,11 +1,13 @@
 """Flask blueprint for Multinet REST API."""
+import re
+import json
 from flasgger import swag_from
-from flask import Blueprint, request
+from flask import Blueprint, Response, request
 from webargs import fields
 from webargs.flaskparser import use_kwargs
 
-from typing import Any, Optional
-from multinet.types import EdgeDirection, TableType
+from typing import Any, Dict, Generator, List, Optional, Set, Tuple
+from multinet.types import AnalysisType, EdgeDirection, SampleStrategy, TableType
 from multinet.auth.util import (
     require_login,
     require_reader,
@@ -18,15 +20,37 @@ from multinet.auth.util import (
 from multinet import util
 from multinet.errors import (
     BadQueryArgument,
+    BatchTooLarge,
+    JobNotFound,
+    LayoutNotFound,
     MalformedRequestBody,
     AlreadyExists,
     RequiredParamsMissing,
+    TableNotFound,
 )
 
+from multinet.db import analytics, geo, layout, matrix, temporal, tree
+from multinet.db.bulk import changed_endpoints
+from multinet.db.models.job import Job
+from multinet.db.models.table import MAX_SAMPLE_ROWS
 from multinet.db.models.workspace import Workspace
+from multinet.db.models.graph import (
+    FILTER_OPERATORS,
+    MAX_BATCH_NODES,
+    MAX_NEIGHBORHOOD_DEPTH,
+    MAX_NEIGHBORHOOD_NODES,
+    MAX_NEIGHBORHOOD_EDGES,
+    MAX_PATHS,
+    MAX_SAMPLE_NODES,
+    MAX_SAMPLE_EDGES,
+)
+from multinet.downloaders.d3_json import generate_d3_delta, generate_d3_json
 
 bp = Blueprint("multinet", __name__)
 
+# Matches filters of the form `<attribute><operator><value>`
+filter_pattern = re.compile(r"^([^<>=!]+)(==|!=|<=|>=|<|>)(.*)$")
+
 
 @bp.route("/workspaces", methods=["GET"])
 @swag_from("swagger/workspaces.yaml")
@@ -100,6 +124,146 @@ def get_table_rows(workspace: str, table: str, offset: int = 0, limit: int = 30)
     return Workspace(workspace).table(table).rows(offset, limit)
 
 
+@bp.route("/workspaces/<workspace>/tables/<table>/rows", methods=["PATCH"])
+@require_writer
+@swag_from("swagger/update_table_rows.yaml")
+def update_table_rows(workspace: str, table: str) -> Any:
+    """Merge partial rows, streamed as newline delimited JSON, into a table."""
+    loaded_workspace = Workspace(workspace)
+    if not loaded_workspace.has_table(table):
+        raise TableNotFound(workspace, table)
+
+    def rows() -> Generator[Dict, None, None]:
+        for row in util.generate_ndjson(request.stream):
+            if not isinstance(row, dict) or not isinstance(row.get("_key"), str):
+                raise MalformedRequestBody(json.dumps(row))
+
+            yield util.filter_unwanted_keys(row)
+
+    loaded_table = loaded_workspace.table(table)
+    if not loaded_table.is_edge_table():
+        return loaded_table.update_rows(rows())
+
+    # Keep the degrees of the old and new endpoints of updated edges current, in
+    # graphs using the table
+    endpoints: Set[str] = set()
+    result = loaded_table.update_rows(
+        rows(), changed=lambda status: endpoints.update(changed_endpoints(status))
+    )
+    loaded_workspace.update_degrees(table, endpoints)
+
+    return result
+
+
+@bp.route("/workspaces/<workspace>/tables/<table>/rows", methods=["DELETE"])
+@require_writer
+@swag_from("swagger/delete_table_rows.yaml")
+def delete_table_rows(workspace: str, table: str) -> Any:
+    """Delete the rows of a table whose keys are streamed as newline delimited JSON."""
+    loaded_workspace = Workspace(workspace)
+    if not loaded_workspace.has_table(table):
+        raise TableNotFound(workspace, table)
+
+    def keys() -> Generator[str, None, None]:
+        for row in util.generate_ndjson(request.stream):
+            key = row.get("_key") if isinstance(row, dict) else row
+            if not isinstance(key, str):
+                raise MalformedRequestBody(json.dumps(row))
+
+            yield key
+
+    loaded_table = loaded_workspace.table(table)
+    if not loaded_table.is_edge_table():
+        return loaded_table.delete_rows(keys())
+
+    # Keep the degrees of the endpoints of deleted edges current, in graphs using
+    # the table
+    endpoints: Set[str] = set()
+    result = loaded_table.delete_rows(
+        keys(), changed=lambda status: endpoints.update(changed_endpoints(status))
+    )
+    loaded_workspace.update_degrees(table, endpoints)
+
+    return result
+
+
+@bp.route("/workspaces/<workspace>/tables/<table>/indexes", methods=["POST"])
+@require_writer
+@use_kwargs({"attribute": fields.Str()})
+@swag_from("swagger/create_table_indexes.yaml")
+def create_table_indexes(
+    workspace: str, table: str, attribute: Optional[str] = None
+) -> Any:
+    """Create vertex-centric indexes on an attribute of an edge table."""
+    if not attribute:
+        raise RequiredParamsMissing(["attribute"])
+
+    loaded_workspace = Workspace(workspace)
+    if not loaded_workspace.has_table(table):
+        raise TableNotFound(workspace, table)
+
+    return loaded_workspace.table(table).add_vertex_centric_indexes(attribute)
+
+
+@bp.route("/workspaces/<workspace>/tables/<table>/geo", methods=["PUT"])
+@require_writer
+@use_kwargs({"latitude": fields.Str(), "longitude": fields.Str()})
+@swag_from("swagger/set_table_geo.yaml")
+def set_table_geo(
+    workspace: str,
+    table: str,
+    latitude: Optional[str] = None,
+    longitude: Optional[str] = None,
+) -> Any:
+    """Declare the latitude and longitude attributes of a table, and index them."""
+    if not latitude or not longitude:
+        params = {"latitude": latitude, "longitude": longitude}
+        raise RequiredParamsMissing(
+            [name for name, value in params.items() if not value]
+        )
+
+    loaded_workspace = Workspace(workspace)
+    if not loaded_workspace.has_table(table):
+        raise TableNotFound(workspace, table)
+
+    loaded_workspace.table(table).add_geo_index(latitude, longitude)
+    return {"table": table, "latitude": latitude, "longitude": longitude}
+
+
+@bp.route("/workspaces/<workspace>/tables/<table>/geo", methods=["GET"])
+@require_reader
+@swag_from("swagger/table_geo.yaml")
+def get_table_geo(workspace: str, table: str) -> Any:
+    """Return the latitude and longitude attributes of a table."""
+    loaded_workspace = Workspace(workspace)
+    if not loaded_workspace.has_table(table):
+        raise TableNotFound(workspace, table)
+
+    attributes = loaded_workspace.table(table).geo_attributes()
+    if attributes is None:
+        raise geo.GeoNotIndexed(table)
+
+    return {"table": table, **attributes}
+
+
+@bp.route("/workspaces/<workspace>/tables/<table>/sample", methods=["GET"])
+@require_reader
+@use_kwargs({"n": fields.Int(), "seed": fields.Int()})
+@swag_from("swagger/table_sample.yaml")
+def get_table_sample(
+    workspace: str, table: str, n: int = 30, seed: Optional[int] = None
+) -> Any:
+    """Retrieve a uniform random sample of the rows of a table."""
+    if not 0 <= n <= MAX_SAMPLE_ROWS:
+        raise BadQueryArgument("n", str(n), [f"0 to {MAX_SAMPLE_ROWS}"])
+
+    loaded_workspace = Workspace(workspace)
+    if not loaded_workspace.has_table(table):
+        raise TableNotFound(workspace, table)
+
+    return loaded_workspace.table(table).sample(n, seed)
+
+
 @bp.route("/workspaces/<workspace>/graphs", methods=["GET"])
 @require_reader
 @swag_from("swagger/workspace_graphs.yaml")
@@ -113,20 +277,321 @@ def get_workspace_graphs(workspace: str) -> Any:
 @swag_from("swagger/workspace_graph.yaml")
 def get_workspace_graph(workspace: str, graph: str) -> Any:
     """Retrieve information about a graph."""
-    node_tables = Workspace(workspace).graph(graph).node_tables()
-    edge_table = Workspace(workspace).graph(graph).edge_table()
-    return {"edgeTable": edge_table, "nodeTables": node_tables}
+    loaded_graph = Workspace(workspace).graph(graph)
+    return {
+        "edgeTable": loaded_graph.edge_table(),
+        "nodeTables": loaded_graph.node_tables(),
+    }
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/stats", methods=["GET"])
+@require_reader
+@swag_from("swagger/graph_stats.yaml")
+def get_graph_stats(workspace: str, graph: str) -> Any:
+    """Retrieve summary statistics of a graph."""
+    return Workspace(workspace).graph(graph).stats()
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/aggregate", methods=["GET"])
+@require_reader
+@use_kwargs({"by": fields.Str(), "weight": fields.Str()})
+@swag_from("swagger/graph_aggregate.yaml")
+def get_graph_aggregate(
+    workspace: str, graph: str, by: Optional[str] = None, weight: Optional[str] = None
+) -> Any:
+    """Retrieve the graph of groups of nodes sharing an attribute value."""
+    if not by:
+        raise RequiredParamsMissing(["by"])
+
+    return Workspace(workspace).graph(graph).aggregate(by, weight)
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/matrix", methods=["GET", "POST"])
+@require_reader
+@use_kwargs(
+    {
+        "order": fields.Str(),
+        "attribute": fields.Str(),
+        "descending": fields.Bool(),
+        "matrix_format": fields.Str(data_key="format"),
+    }
+)
+@swag_from("swagger/graph_matrix.yaml")
+def get_graph_matrix(
+    workspace: str,
+    graph: str,
+    order: str = "none",
+    attribute: Optional[str] = None,
+    descending: bool = False,
+    matrix_format: str = "coo",
+) -> Any:
+    """
+    Retrieve the sparse adjacency matrix of a graph.
+
+    With a POST request, the matrix is restricted to the node IDs in the body.
+    """
+    node_ids = batch_node_ids() if request.method == "POST" else None
+    loaded_graph = Workspace(workspace).graph(graph)
+
+    return matrix.adjacency_matrix(
+        loaded_graph, node_ids, order, attribute, descending, matrix_format
+    )
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/paths", methods=["GET"])
+@require_reader
+@use_kwargs(
+    {
+        "source": fields.Str(),
+        "target": fields.Str(),
+        "direction": fields.Str(),
+        "k": fields.Int(),
+        "weight": fields.Str(),
+    }
+)
+@swag_from("swagger/graph_paths.yaml")
+def get_graph_paths(
+    workspace: str,
+    graph: str,
+    source: Optional[str] = None,
+    target: Optional[str] = None,
+    direction: EdgeDirection = "outgoing",
+    k: int = 1,
+    weight: Optional[str] = None,
+) -> Any:
+    """Return the shortest paths between two nodes of a graph."""
+    if not source or not target:
+        named = (("source", source), ("target", target))
+        raise RequiredParamsMissing([name for name, value in named if not value])
+
+    for argument, node_id in (("source", source), ("target", target)):
+        if "/" not in node_id:
+            raise BadQueryArgument(argument, node_id, ["<table>/<node>"])
+
+    allowed = ["incoming", "outgoing", "all"]
+    if direction not in allowed:
+        raise BadQueryArgument("direction", direction, allowed)
+
+    if not 1 <= k <= MAX_PATHS:
+        raise BadQueryArgument("k", str(k), [f"1 to {MAX_PATHS}"])
+
+    paths = (
+        Workspace(workspace).graph(graph).paths(source, target, direction, k, weight)
+    )
+    return util.stream(paths)
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/sample", methods=["GET"])
+@require_reader
+@use_kwargs(
+    {
+        "strategy": fields.Str(),
+        "size": fields.Int(),
+        "seed": fields.Int(),
+        "start": fields.Str(),
+        "burn": fields.Float(),
+        "restart": fields.Float(),
+        "edge_limit": fields.Int(),
+    }
+)
+@swag_from("swagger/graph_sample.yaml")
+def get_graph_sample(
+    workspace: str,
+    graph: str,
+    strategy: SampleStrategy = "random_node",
+    size: int = 100,
+    seed: Optional[int] = None,
+    start: Optional[str] = None,
+    burn: float = 0.7,
+    restart: float = 0.15,
+    edge_limit: int = MAX_SAMPLE_EDGES,
+) -> Any:
+    """Return a random sample of a graph, in d3 json format."""
+    allowed = ["random_node", "random_edge", "snowball", "forest_fire", "random_walk"]
+    if strategy not in allowed:
+        raise BadQueryArgument("strategy", strategy, allowed)
+
+    if not 0 <= size <= MAX_SAMPLE_NODES:
+        raise BadQueryArgument("size", str(size), [f"0 to {MAX_SAMPLE_NODES}"])
+
+    if not 0 <= edge_limit <= MAX_SAMPLE_EDGES:
+        raise BadQueryArgument(
+            "edge_limit", str(edge_limit), [f"0 to {MAX_SAMPLE_EDGES}"]
+        )
+
+    if not 0 <= burn <= 1:
+        raise BadQueryArgument("burn", str(burn), ["between 0 and 1"])
+
+    if not 0 <= restart < 1:
+        raise BadQueryArgument("restart", str(restart), ["at least 0, less than 1"])
+
+    start_nodes = start.split(",") if start else []
+    for node_id in start_nodes:
+        if "/" not in node_id:
+            raise BadQueryArgument("start", node_id, ["<table>/<node>"])
+
+    sample = (
+        Workspace(workspace)
+        .graph(graph)
+        .sample(strategy, size, seed, start_nodes, burn, restart, edge_limit)
+    )
+
+    return Response(
+        generate_d3_json(sample["nodes"], sample["edges"]), mimetype="application/json"
+    )
+
+
+@bp.route(
+    "/workspaces/<workspace>/graphs/<graph>/analytics/<analysis>", methods=["POST"]
+)
+@require_writer
+@use_kwargs(
+    {
+        "attribute": fields.Str(),
+        "table": fields.Str(),
+        "damping": fields.Float(),
+        "iterations": fields.Int(),
+        "direction": fields.Str(),
+    }
+)
+@swag_from("swagger/graph_analytics.yaml")
+def start_graph_analytics(
+    workspace: str,
+    graph: str,
+    analysis: AnalysisType,
+    attribute: Optional[str] = None,
+    table: Optional[str] = None,
+    damping: float = 0.85,
+    iterations: int = 100,
+    direction: EdgeDirection = "all",
+) -> Any:
+    """Start a background job running an analysis of a graph."""
+    allowed_analyses: List[str] = list(analytics.analyses)
+    if analysis not in allowed_analyses:
+        raise BadQueryArgument("analysis", analysis, allowed_analyses)
+
+    if attribute is None:
+        attribute = analysis
+    elif not attribute or attribute.startswith("_"):
+        raise BadQueryArgument("attribute", attribute, ["names not starting with _"])
+
+    if not 0 < damping < 1:
+        raise BadQueryArgument("damping", str(damping), ["between 0 and 1"])
+
+    max_iterations = analytics.MAX_PAGERANK_ITERATIONS
+    if not 1 <= iterations <= max_iterations:
+        raise BadQueryArgument(
+            "iterations", str(iterations), [f"1 to {max_iterations}"]
+        )
+
+    allowed = ["incoming", "outgoing", "all"]
+    if direction not in allowed:
+        raise BadQueryArgument("direction", direction, allowed)
+
+    loaded_workspace = Workspace(workspace)
+
+    # Raises an error if the graph doesn't exist
+    loaded_workspace.graph(graph)
+
+    if table is not None and loaded_workspace.has_table(table):
+        raise AlreadyExists("Table", table)
+
+    job = analytics.analyze(
+        loaded_workspace,
+        graph,
+        analysis,
+        attribute,
+        table=table,
+        damping=damping,
+        iterations=iterations,
+        direction=direction,
+    )
+    return job.asdict()
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/layouts", methods=["POST"])
+@require_writer
+@use_kwargs(
+    {"algorithm": fields.Str(), "iterations": fields.Int(), "seed": fields.Int()}
+)
+@swag_from("swagger/compute_graph_layout.yaml")
+def compute_graph_layout(
+    workspace: str,
+    graph: str,
+    algorithm: str = "force_directed",
+    iterations: int = 50,
+    seed: Optional[int] = None,
+) -> Any:
+    """Start computing a layout of a graph, unless it's already up to date."""
+    if algorithm not in layout.LAYOUT_ALGORITHMS:
+        raise BadQueryArgument("algorithm", algorithm, layout.LAYOUT_ALGORITHMS)
+
+    max_iterations = layout.MAX_LAYOUT_ITERATIONS
+    if not 1 <= iterations <= max_iterations:
+        raise BadQueryArgument(
+            "iterations", str(iterations), [f"1 to {max_iterations}"]
+        )
+
+    return analytics.compute_layout(
+        Workspace(workspace), graph, algorithm, iterations, seed
+    )
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/layouts/<layout_id>", methods=["GET"])
+@require_reader
+@swag_from("swagger/graph_layout.yaml")
+def get_graph_layout(workspace: str, graph: str, layout_id: str) -> Any:
+    """Retrieve the status of a layout of a graph."""
+    loaded_workspace = Workspace(workspace)
+    loaded_layout = layout.get_layout(
+        loaded_workspace.handle, loaded_workspace.graph(graph), layout_id
+    )
+
+    if loaded_layout is None:
+        raise LayoutNotFound(workspace, graph, layout_id)
+
+    return loaded_layout
+
+
+@bp.route("/workspaces/<workspace>/jobs", methods=["GET"])
+@require_reader
+@swag_from("swagger/workspace_jobs.yaml")
+def get_workspace_jobs(workspace: str) -> Any:
+    """Retrieve the jobs of a workspace."""
+    jobs = Job.list(Workspace(workspace).internal)
+    return util.stream(job.asdict() for job in jobs)
+
+
+@bp.route("/workspaces/<workspace>/jobs/<job>", methods=["GET"])
+@require_reader
+@swag_from("swagger/job.yaml")
+def get_job(workspace: str, job: str) -> Any:
+    """Retrieve the status of a job."""
+    loaded_job = Job.get(Workspace(workspace).internal, job)
+    if loaded_job is None:
+        raise JobNotFound(workspace, job)
+
+    return loaded_job.asdict()
 
 
 @bp.route("/workspaces/<workspace>/graphs/<graph>/nodes", methods=["GET"])
 @require_reader
-@use_kwargs({"offset": fields.Int(), "limit": fields.Int()})
+@use_kwargs({"offset": fields.Int(), "limit": fields.Int(), "sort": fields.Str()})
 @swag_from("swagger/graph_nodes.yaml")
 def get_graph_nodes(
-    workspace: str, graph: str, offset: int = 0, limit: int = 30
+    workspace: str,
+    graph: str,
+    offset: int = 0,
+    limit: int = 30,
+    sort: Optional[str] = None,
 ) -> Any:
     """Retrieve the nodes of a graph."""
-    return Workspace(workspace).graph(graph).nodes(offset, limit)
+    # A leading `-` sorts in descending order
+    descending = sort is not None and sort.startswith("-")
+    if sort is not None:
+        sort = sort.lstrip("-")
+
+    return Workspace(workspace).graph(graph).nodes(offset, limit, sort, descending)
 
 
 @bp.route(
@@ -140,11 +605,37 @@ def get_node_data(workspace: str, graph: str, table: str, node: str) -> Any:
     return Workspace(workspace).graph(graph).node_attributes(table, node)
 
 
+def parse_filter(expression: str, argument: str = "filter") -> Tuple[str, str, str]:
+    """
+    Parse a filter of the form `<attribute><operator><value>`.
+
+    The value is returned as written, to be compared according to the type of
+    each stored value (see `attribute_filters`).
+    """
+    match = filter_pattern.match(expression)
+    if match is None:
+        allowed = [f"<attribute>{operator}<value>" for operator in FILTER_OPERATORS]
+        raise BadQueryArgument(argument, expression, allowed)
+
+    attribute, operator, raw_value = match.groups()
+    return attribute.strip(), operator, raw_value
+
+
 @bp.route(
     "/workspaces/<workspace>/graphs/<graph>/nodes/<table>/<node>/edges", methods=["GET"]
 )
 @require_reader
-@use_kwargs({"direction": fields.Str(), "offset": fields.Int(), "limit": fields.Int()})
+@use_kwargs(
+    {
+        "direction": fields.Str(),
+        "offset": fields.Int(),
+        "limit": fields.Int(),
+        "expand": fields.Str(),
+        "projection": fields.Str(data_key="fields"),
+        "filter_expressions": fields.List(fields.Str(), data_key="filter"),
+        "sort": fields.Str(),
+    }
+)
 @swag_from("swagger/node_edges.yaml")
 def get_node_edges(
     workspace: str,
@@ -154,16 +645,468 @@ def get_node_edges(
     direction: EdgeDirection = "all",
     offset: int = 0,
     limit: int = 30,
+    expand: Optional[str] = None,
+    projection: Optional[str] = None,
+    filter_expressions: Optional[List[str]] = None,
+    sort: Optional[str] = None,
 ) -> Any:
     """Return the edges connected to a node."""
     allowed = ["incoming", "outgoing", "all"]
     if direction not in allowed:
         raise BadQueryArgument("direction", direction, allowed)
 
+    expansions = expand.split(",") if expand else []
+    for expansion in expansions:
+        if expansion not in ("neighbors", "edges"):
+            raise BadQueryArgument("expand", expansion, ["neighbors", "edges"])
+
+    filters = [parse_filter(expr) for expr in filter_expressions or []]
+
+    # A leading `-` sorts in descending order
+    descending = sort is not None and sort.startswith("-")
+    if sort is not None:
+        sort = sort.lstrip("-")
+
     return (
         Workspace(workspace)
         .graph(graph)
-        .node_edges(table, node, direction, offset, limit)
+        .node_edges(
+            table,
+            node,
+            direction,
+            offset,
+            limit,
+            expansions,
+            projection.split(",") if projection else None,
+            filters,
+            sort,
+            descending,
+        )
+    )
+
+
+@bp.route(
+    "/workspaces/<workspace>/graphs/<graph>/nodes/<table>/<node>/degree",
+    methods=["GET"],
+)
+@require_reader
+@use_kwargs({"direction": fields.Str()})
+@swag_from("swagger/node_degree.yaml")
+def get_node_degree(
+    workspace: str, graph: str, table: str, node: str, direction: EdgeDirection = "all"
+) -> Any:
+    """Return the number of edges connected to a node."""
+    allowed = ["incoming", "outgoing", "all"]
+    if direction not in allowed:
+        raise BadQueryArgument("direction", direction, allowed)
+
+    degree = Workspace(workspace).graph(graph).node_degree(table, node, direction)
+    return {"degree": degree}
+
+
+@bp.route(
+    "/workspaces/<workspace>/graphs/<graph>/nodes/<table>/<node>/neighbors",
+    methods=["GET"],
+)
+@require_reader
+@use_kwargs({"depth": fields.Int(), "direction": fields.Str(), "limit": fields.Int()})
+@swag_from("swagger/node_neighbors.yaml")
+def get_node_neighbors(
+    workspace: str,
+    graph: str,
+    table: str,
+    node: str,
+    depth: int = 1,
+    direction: EdgeDirection = "all",
+    limit: int = 1000,
+) -> Any:
+    """Return the IDs of the nodes within a number of hops of a node."""
+    allowed = ["incoming", "outgoing", "all"]
+    if direction not in allowed:
+        raise BadQueryArgument("direction", direction, allowed)
+
+    if not 1 <= depth <= MAX_NEIGHBORHOOD_DEPTH:
+        raise BadQueryArgument("depth", str(depth), [f"1 to {MAX_NEIGHBORHOOD_DEPTH}"])
+
+    if not 0 <= limit <= MAX_NEIGHBORHOOD_NODES:
+        raise BadQueryArgument("limit", str(limit), [f"0 to {MAX_NEIGHBORHOOD_NODES}"])
+
+    neighbors = (
+        Workspace(workspace)
+        .graph(graph)
+        .node_neighbors(table, node, depth, direction, limit)
+    )
+    return util.stream(neighbors)
+
+
+def batch_node_ids() -> List[str]:
+    """Read and validate the list of node IDs in the body of a batch request."""
+    node_ids = request.get_json(silent=True)
+    if not isinstance(node_ids, list) or not all(
+        isinstance(node_id, str) and "/" in node_id for node_id in node_ids
+    ):
+        raise MalformedRequestBody(request.data.decode("utf8", errors="replace"))
+
+    if len(node_ids) > MAX_BATCH_NODES:
+        raise BatchTooLarge(len(node_ids), MAX_BATCH_NODES)
+
+    return node_ids
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/nodes/attributes", methods=["POST"])
+@require_reader
+@swag_from("swagger/batch_node_data.yaml")
+def get_batch_node_data(workspace: str, graph: str) -> Any:
+    """Return the attributes associated with many nodes."""
+    node_ids = batch_node_ids()
+    return Workspace(workspace).graph(graph).batch_node_attributes(node_ids)
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/nodes/edges", methods=["POST"])
+@require_reader
+@use_kwargs({"direction": fields.Str(), "offset": fields.Int(), "limit": fields.Int()})
+@swag_from("swagger/batch_node_edges.yaml")
+def get_batch_node_edges(
+    workspace: str,
+    graph: str,
+    direction: EdgeDirection = "all",
+    offset: int = 0,
+    limit: int = 30,
+) -> Any:
+    """Return the edges connected to many nodes."""
+    allowed = ["incoming", "outgoing", "all"]
+    if direction not in allowed:
+        raise BadQueryArgument("direction", direction, allowed)
+
+    node_ids = batch_node_ids()
+    return (
+        Workspace(workspace)
+        .graph(graph)
+        .batch_node_edges(node_ids, direction, offset, limit)
+    )
+
+
+@bp.route(
+    "/workspaces/<workspace>/graphs/<graph>/nodes/<table>/<node>/neighborhood",
+    methods=["GET"],
+)
+@require_reader
+@use_kwargs(
+    {
+        "depth": fields.Int(),
+        "direction": fields.Str(),
+        "limit": fields.Int(),
+        "edge_limit": fields.Int(),
+    }
+)
+@swag_from("swagger/node_neighborhood.yaml")
+def get_node_neighborhood(
+    workspace: str,
+    graph: str,
+    table: str,
+    node: str,
+    depth: int = 1,
+    direction: EdgeDirection = "all",
+    limit: int = 1000,
+    edge_limit: int = MAX_NEIGHBORHOOD_EDGES,
+) -> Any:
+    """Return the subgraph within a number of hops of a node, in d3 json format."""
+    allowed = ["incoming", "outgoing", "all"]
+    if direction not in allowed:
+        raise BadQueryArgument("direction", direction, allowed)
+
+    if not 0 <= depth <= MAX_NEIGHBORHOOD_DEPTH:
+        raise BadQueryArgument("depth", str(depth), [f"0 to {MAX_NEIGHBORHOOD_DEPTH}"])
+
+    if not 0 <= limit <= MAX_NEIGHBORHOOD_NODES:
+        raise BadQueryArgument("limit", str(limit), [f"0 to {MAX_NEIGHBORHOOD_NODES}"])
+
+    if not 0 <= edge_limit <= MAX_NEIGHBORHOOD_EDGES:
+        raise BadQueryArgument(
+            "edge_limit", str(edge_limit), [f"0 to {MAX_NEIGHBORHOOD_EDGES}"]
+        )
+
+    subgraph = (
+        Workspace(workspace)
+        .graph(graph)
+        .neighborhood(table, node, depth, direction, limit, edge_limit)
+    )
+
+    return Response(
+        generate_d3_json(subgraph["nodes"], subgraph["edges"]),
+        mimetype="application/json",
+    )
+
+
+@bp.route(
+    "/workspaces/<workspace>/graphs/<graph>/nodes/<table>/<node>/subtree",
+    methods=["GET"],
+)
+@require_reader
+@use_kwargs({"offset": fields.Int(), "limit": fields.Int()})
+@swag_from("swagger/node_subtree.yaml")
+def get_node_subtree(
+    workspace: str, graph: str, table: str, node: str, offset: int = 0, limit: int = 30
+) -> Any:
+    """Return the nodes of the subtree rooted at a node of an indexed tree."""
+    if not 0 <= limit <= tree.MAX_SUBTREE_NODES:
+        raise BadQueryArgument("limit", str(limit), [f"0 to {tree.MAX_SUBTREE_NODES}"])
+
+    loaded_graph = Workspace(workspace).graph(graph)
+    return tree.subtree(loaded_graph, table, node, offset, limit)
+
+
+@bp.route(
+    "/workspaces/<workspace>/graphs/<graph>/nodes/<table>/<node>/ancestors",
+    methods=["GET"],
+)
+@require_reader
+@swag_from("swagger/node_ancestors.yaml")
+def get_node_ancestors(workspace: str, graph: str, table: str, node: str) -> Any:
+    """Return the ancestors of a node of an indexed tree, root first."""
+    loaded_graph = Workspace(workspace).graph(graph)
+    return util.stream(tree.ancestors(loaded_graph, table, node))
+
+
+@bp.route(
+    "/workspaces/<workspace>/graphs/<graph>/nodes/<table>/<node>/ancestors/"
+    "<ancestor_table>/<ancestor>",
+    methods=["GET"],
+)
+@require_reader
+@swag_from("swagger/node_is_ancestor.yaml")
+def get_node_is_ancestor(
+    workspace: str,
+    graph: str,
+    table: str,
+    node: str,
+    ancestor_table: str,
+    ancestor: str,
+) -> Any:
+    """Return whether one node of an indexed tree is an ancestor of another."""
+    loaded_graph = Workspace(workspace).graph(graph)
+    return tree.is_ancestor(loaded_graph, table, node, ancestor_table, ancestor)
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/subgraph", methods=["GET"])
+@require_reader
+@use_kwargs({"where": fields.List(fields.Str())})
+@swag_from("swagger/graph_subgraph.yaml")
+def get_graph_subgraph(
+    workspace: str, graph: str, where: Optional[List[str]] = None
+) -> Any:
+    """Return the subgraph induced by nodes matching predicates, in d3 json format."""
+    predicates: Dict[str, List[Tuple[str, str, str]]] = {}
+    for expression in where or []:
+        table, dot, condition = expression.partition(".")
+        if not dot:
+            allowed = ["<table>.<attribute><operator><value>"]
+            raise BadQueryArgument("where", expression, allowed)
+
+        predicates.setdefault(table, []).append(parse_filter(condition, "where"))
+
+    subgraph = Workspace(workspace).graph(graph).subgraph(predicates)
+
+    return Response(
+        generate_d3_json(subgraph["nodes"], subgraph["edges"]),
+        mimetype="application/json",
+    )
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/time", methods=["PUT"])
+@require_writer
+@use_kwargs({"time": fields.Str(), "start": fields.Str(), "end": fields.Str()})
+@swag_from("swagger/set_graph_time.yaml")
+def set_graph_time(
+    workspace: str,
+    graph: str,
+    time: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> Any:
+    """Declare the time attributes of the edges of a graph, and index them."""
+    if time is not None and (start is not None or end is not None):
+        raise BadQueryArgument("time", time, ["either time, or start and end"])
+
+    loaded_workspace = Workspace(workspace)
+    loaded_graph = loaded_workspace.graph(graph)
+
+    return temporal.set_time_attributes(
+        loaded_workspace.handle, loaded_graph, time, start, end
+    )
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/time", methods=["GET"])
+@require_reader
+@swag_from("swagger/graph_time.yaml")
+def get_graph_time(workspace: str, graph: str) -> Any:
+    """Return the time attributes of the edges of a graph."""
+    loaded_workspace = Workspace(workspace)
+    loaded_workspace.graph(graph)
+
+    return temporal.get_time_attributes(loaded_workspace.readonly_handle, graph)
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/timeslice", methods=["GET"])
+@require_reader
+@use_kwargs(
+    {
+        "start": fields.Str(),
+        "end": fields.Str(),
+        "previous_start": fields.Str(),
+        "previous_end": fields.Str(),
+    }
+)
+@swag_from("swagger/graph_timeslice.yaml")
+def get_graph_timeslice(
+    workspace: str,
+    graph: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    previous_start: Optional[str] = None,
+    previous_end: Optional[str] = None,
+) -> Any:
+    """
+    Return the part of a graph active within a time window, in d3 json format.
+
+    If a previous window is given, only the edges added and removed since that
+    window are returned instead.
+    """
+    window = {"start": start, "end": end}
+    previous = {"previous_start": previous_start, "previous_end": previous_end}
+
+    missing = [name for name, value in window.items() if value is None]
+    if any(value is not None for value in previous.values()):
+        missing += [name for name, value in previous.items() if value is None]
+
+    if missing:
+        raise RequiredParamsMissing(missing)
+
+    loaded_workspace = Workspace(workspace)
+    loaded_graph = loaded_workspace.graph(graph)
+    attributes = temporal.get_time_attributes(loaded_workspace.readonly_handle, graph)
+
+    window_bounds = (util.parse_value(start or ""), util.parse_value(end or ""))
+    if previous_start is None:
+        timeslice = temporal.time_slice(loaded_graph, attributes, *window_bounds)
+        response = generate_d3_json(timeslice["nodes"], timeslice["edges"])
+    else:
+        previous_bounds = (
+            util.parse_value(previous_start),
+            util.parse_value(previous_end or ""),
+        )
+        delta = temporal.time_delta(
+            loaded_graph, attributes, window_bounds, previous_bounds
+        )
+        response = generate_d3_delta(delta["added"], delta["removed"])
+
+    return Response(response, mimetype="application/json")
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/geo/box", methods=["GET"])
+@require_reader
+@use_kwargs(
+    {
+        "south": fields.Float(),
+        "west": fields.Float(),
+        "north": fields.Float(),
+        "east": fields.Float(),
+        "edges": fields.Bool(),
+    }
+)
+@swag_from("swagger/graph_geo_box.yaml")
+def get_graph_geo_box(
+    workspace: str,
+    graph: str,
+    south: Optional[float] = None,
+    west: Optional[float] = None,
+    north: Optional[float] = None,
+    east: Optional[float] = None,
+    edges: bool = False,
+) -> Any:
+    """Return the nodes of a graph within a bounding box, in d3 json format."""
+    if south is None or west is None or north is None or east is None:
+        bounds = {"south": south, "west": west, "north": north, "east": east}
+        raise RequiredParamsMissing(
+            [name for name, value in bounds.items() if value is None]
+        )
+
+    loaded_graph = Workspace(workspace).graph(graph)
+    selected = geo.within_box(loaded_graph, south, west, north, east, edges)
+
+    return Response(
+        generate_d3_json(selected["nodes"], selected["edges"]),
+        mimetype="application/json",
+    )
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/geo/radius", methods=["GET"])
+@require_reader
+@use_kwargs(
+    {
+        "latitude": fields.Float(),
+        "longitude": fields.Float(),
+        "radius": fields.Float(),
+        "edges": fields.Bool(),
+    }
+)
+@swag_from("swagger/graph_geo_radius.yaml")
+def get_graph_geo_radius(
+    workspace: str,
+    graph: str,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    radius: Optional[float] = None,
+    edges: bool = False,
+) -> Any:
+    """Return the nodes of a graph within a radius of a point, in d3 json format."""
+    if latitude is None or longitude is None or radius is None:
+        params = {"latitude": latitude, "longitude": longitude, "radius": radius}
+        raise RequiredParamsMissing(
+            [name for name, value in params.items() if value is None]
+        )
+
+    loaded_graph = Workspace(workspace).graph(graph)
+    selected = geo.within_radius(loaded_graph, latitude, longitude, radius, edges)
+
+    return Response(
+        generate_d3_json(selected["nodes"], selected["edges"]),
+        mimetype="application/json",
+    )
+
+
+@bp.route("/workspaces/<workspace>/graphs/<graph>/geo/nearest", methods=["GET"])
+@require_reader
+@use_kwargs(
+    {
+        "latitude": fields.Float(),
+        "longitude": fields.Float(),
+        "k": fields.Int(),
+        "edges": fields.Bool(),
+    }
+)
+@swag_from("swagger/graph_geo_nearest.yaml")
+def get_graph_geo_nearest(
+    workspace: str,
+    graph: str,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    k: int = 10,
+    edges: bool = False,
+) -> Any:
+    """Return the nodes of a graph nearest to a point, in d3 json format."""
+    if latitude is None or longitude is None:
+        params = {"latitude": latitude, "longitude": longitude}
+        raise RequiredParamsMissing(
+            [name for name, value in params.items() if value is None]
+        )
+
+    loaded_graph = Workspace(workspace).graph(graph)
+    selected = geo.nearest(loaded_graph, latitude, longitude, k, edges)
+
+    return Response(
+        generate_d3_json(selected["nodes"], selected["edges"]),
+        mimetype="application/json",
     )
 
 
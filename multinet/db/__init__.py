@@ -116,6 +116,16 @@ def user_collection() -> StandardCollection:
     return sysdb.collection("users")
 
 
+def job_collection() -> StandardCollection:
+    """Return the collection that contains background job documents."""
+    sysdb = system_db(readonly=False)
+
+    if not sysdb.has_collection("jobs"):
+        sysdb.create_collection("jobs")
+
+    return sysdb.collection("jobs")
+
+
 def _run_aql_query(
     aql: AQL, query: str, bind_vars: Optional[Dict[str, Any]] = None
 ) -> Cursor:
@@ -0,0 +1,241 @@
+"""Graph analytics, run as background jobs over in-memory graph snapshots."""
+import os
+import itertools
+import random
+
+import numpy as np
+from arango.exceptions import (
+    DocumentInsertError,
+    DocumentRevisionError,
+    DocumentUpdateError,
+)
+
+from multinet.types import AnalysisType, EdgeDirection
+from multinet.db import bulk, layout
+from multinet.db.snapshot import GraphSnapshot
+from multinet.db.models.job import Job
+from multinet.db.models.workspace import Workspace
+from multinet.errors import AlreadyExists
+
+from typing import Any, Callable, Dict, Optional, Set
+
+# Upper bound on the number of PageRank iterations a job may request
+MAX_PAGERANK_ITERATIONS = int(os.environ.get("MAX_PAGERANK_ITERATIONS", "1000"))
+
+# Computes a value for each node of a graph: for the nodes of its snapshot by node
+# number, followed by the graph's nodes without edges
+Analysis = Callable[[GraphSnapshot, Dict[str, Any]], np.ndarray]
+
+
+def isolated_components(labels: np.ndarray, node_count: int) -> np.ndarray:
+    """Return component labels, followed by a new one for each node without edges."""
+    isolated = node_count - len(labels)
+    first = labels.max() + 1 if len(labels) else 0
+
+    return np.concatenate([labels, np.arange(first, first + isolated)])
+
+
+def isolated_zeros(values: np.ndarray, node_count: int) -> np.ndarray:
+    """Return the values, followed by zero for each node without edges."""
+    return np.concatenate([values, np.zeros(node_count - len(values))])
+
+
+analyses: Dict[AnalysisType, Analysis] = {
+    "pagerank": lambda snapshot, params: snapshot.pagerank(
+        params["damping"], params["iterations"], node_count=params["node_count"]
+    ),
+    "weak_components": lambda snapshot, params: isolated_components(
+        snapshot.components(), params["node_count"]
+    ),
+    "strong_components": lambda snapshot, params: isolated_components(
+        snapshot.strong_components(), params["node_count"]
+    ),
+    "degree_centrality": lambda snapshot, params: isolated_zeros(
+        snapshot.degree_centrality(params["direction"], params["node_count"]),
+        params["node_count"],
+    ),
+}
+
+
+def analysis_attributes(workspace: Workspace, graph: str) -> Set[str]:
+    """Return the node attributes written by earlier analyses of a graph."""
+    return {
+        job.params["attribute"]
+        for job in Job.list(workspace.internal)
+        if job.kind in analyses
+        and job.params.get("graph") == graph
+        and job.params.get("table") is None
+    }
+
+
+def analyze(
+    workspace: Workspace,
+    graph: str,
+    analysis: AnalysisType,
+    attribute: str,
+    table: Optional[str] = None,
+    damping: float = 0.85,
+    iterations: int = 100,
+    direction: EdgeDirection = "all",
+) -> Job:
+    """
+    Start a job that runs `analysis` on a graph, and return the job.
+
+    The result for each node is written to the attribute `attribute` of the node
+    itself or, if `table` is given, to a new node table with one row per node,
+    holding the node ID in `node`. Every node of the graph gets a result. Node
+    attributes may only overwrite the results of earlier analyses of the graph;
+    any other existing attribute is an error.
+    """
+    if table is None and attribute not in analysis_attributes(workspace, graph):
+        node_tables = workspace.graph(graph).node_tables()
+        if workspace.attribute_conflicts(node_tables, [attribute]):
+            raise AlreadyExists("Attribute", attribute)
+
+    params: Dict[str, Any] = {"graph": graph, "attribute": attribute, "table": table}
+    if analysis == "pagerank":
+        params.update({"damping": damping, "iterations": iterations})
+    elif analysis == "degree_centrality":
+        params["direction"] = direction
+
+    def task(job: Job) -> Dict:
+        loaded_graph = workspace.graph(graph)
+        snapshot = loaded_graph.load_snapshot()
+
+        # Nodes without edges aren't part of the snapshot, but get results too
+        isolated = [
+            node_id
+            for node_id in loaded_graph.node_ids()
+            if node_id not in snapshot.numbers
+        ]
+        node_ids = snapshot.ids + isolated
+        values = analyses[analysis](
+            snapshot, {**params, "node_count": len(node_ids)}
+        ).tolist()
+
+        if table is not None:
+            output = workspace.create_table(table, edge=False)
+            inserted = output.insert(
+                {"node": node_id, attribute: value}
+                for node_id, value in zip(node_ids, values)
+            )
+            written, errors = inserted["created"], inserted["errors"]
+        else:
+            written, errors = 0, 0
+
+            # Each node table is updated in turn, with rows generated on the fly
+            node_tables = {node_id.split("/", 1)[0] for node_id in node_ids}
+            for node_table in sorted(node_tables):
+                prefix = f"{node_table}/"
+                updated = workspace.table(node_table).update_rows(
+                    {"_key": node_id[len(prefix) :], attribute: value}
+                    for node_id, value in zip(node_ids, values)
+                    if node_id.startswith(prefix)
+                )
+                written += updated["count"]
+                errors += updated["errors"]
+
+        return {
+            "revision": snapshot.revision,
+            "nodes": len(node_ids),
+            "written": written,
+            "errors": errors,
+        }
+
+    return Job.submit(workspace.internal, analysis, params, task)
+
+
+def compute_layout(
+    workspace: Workspace,
+    graph: str,
+    algorithm: str = "force_directed",
+    iterations: int = 50,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Return the layout of a graph with the given parameters, starting a job if needed.
+
+    A job computing the layout is started unless the layout is already up to date
+    with the edge table, or is being computed. Node positions are stored in the
+    workspace, for all nodes of the graph.
+
+    The layout document is claimed for the new job conditionally, by inserting it
+    or by updating the revision that was read, so that of concurrent requests only
+    one starts a job, and the others return its layout.
+    """
+    loaded_graph = workspace.graph(graph)
+    params: Dict[str, Any] = {
+        "algorithm": algorithm,
+        "iterations": iterations,
+        "seed": seed,
+    }
+    layout_id = layout.layout_id(graph, params)
+
+    layouts, positions = layout.layout_tables(workspace.handle)
+
+    doc = layout.layout_doc(workspace.handle, loaded_graph, layout_id)
+    if doc is not None:
+        existing = layout.layout_metadata(loaded_graph, doc)
+        job = existing["job"] and Job.get(workspace.internal, existing["job"])
+        if not existing["stale"] or (job and job.active()):
+            return existing
+
+    def task(job: Job) -> Dict:
+        snapshot = loaded_graph.load_snapshot()
+        revision = snapshot.revision
+
+        # Nodes without edges aren't part of the snapshot, but are laid out too
+        isolated = [
+            node_id
+            for node_id in loaded_graph.node_ids()
+            if node_id not in snapshot.numbers
+        ]
+
+        xs, ys = layout.force_directed(
+            snapshot, len(isolated), iterations, random.Random(seed)
+        )
+
+        workspace.handle.aql.execute(
+            "FOR p IN @@positions FILTER p.layout == @layout REMOVE p IN @@positions",
+            bind_vars={"@positions": positions.name, "layout": layout_id},
+        )
+        node_ids = itertools.chain(snapshot.ids, isolated)
+        inserted = bulk.bulk_insert(
+            positions,
+            (
+                {"layout": layout_id, "node": node_id, "x": x, "y": y}
+                for node_id, x, y in zip(node_ids, xs.tolist(), ys.tolist())
+            ),
+        )
+
+        layouts.update({"_key": layout_id, "revision": revision, "nodes": len(xs)})
+        return {
+            "layout": layout_id,
+            "revision": revision,
+            "nodes": len(xs),
+            "errors": inserted["errors"],
+        }
+
+    job = Job.create(workspace.internal, "layout", {"graph": graph, **params})
+    metadata: Dict[str, Any] = {
+        "id": layout_id,
+        "graph": graph,
+        "params": params,
+        "job": job.key,
+        "nodes": 0,
+        "revision": None,
+    }
+    claim = {"_key": layout_id, **{k: v for k, v in metadata.items() if k != "id"}}
+
+    try:
+        if doc is None:
+            layouts.insert(claim)
+        else:
+            layouts.update({**claim, "_rev": doc["_rev"]}, check_rev=True)
+    except (DocumentInsertError, DocumentRevisionError, DocumentUpdateError):
+        # Another request claimed the layout first
+        job.delete()
+        return compute_layout(workspace, graph, algorithm, iterations, seed)
+
+    job.start(task)
+    return {**metadata, "stale": True}
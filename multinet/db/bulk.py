@@ -0,0 +1,248 @@
+"""Batched bulk operations on the documents of ArangoDB collections."""
+import os
+import itertools
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+
+from arango.collection import StandardCollection
+from arango.exceptions import ArangoError, DocumentInsertError
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from typing_extensions import TypedDict
+
+# Defaults for the size of each import request, and the number of concurrent requests
+BULK_BATCH_SIZE = int(os.environ.get("ARANGO_BULK_BATCH_SIZE", "5000"))
+BULK_WORKERS = int(os.environ.get("ARANGO_BULK_WORKERS", "4"))
+
+
+class BatchError(TypedDict):
+    """Describes the failures that occurred while importing a single batch."""
+
+    # Index of the batch within the imported rows
+    batch: int
+
+    # Number of rows in the batch that were not imported
+    errors: int
+
+    # The error message, if the whole batch was rejected
+    message: str
+
+
+class BulkResult(TypedDict):
+    """Describes the outcome of a bulk insertion."""
+
+    created: int
+    updated: int
+    ignored: int
+    errors: int
+    batch_errors: List[BatchError]
+
+
+class MutationResult(TypedDict):
+    """Describes the outcome of a bulk update or deletion."""
+
+    count: int
+    errors: int
+    batch_errors: List[BatchError]
+
+
+ProgressCallback = Callable[[BulkResult], None]
+
+# Called with the metadata of each changed document, including the document as it
+# was before the change (`old`), and for updates as it is after it (`new`)
+ChangeCallback = Callable[[Dict], None]
+
+T = TypeVar("T")
+
+
+def batches(rows: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Split an iterable of rows into lists of at most `size` rows."""
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+
+        yield batch
+
+
+def bulk_insert(
+    handle: StandardCollection,
+    rows: Iterable[Dict],
+    batch_size: int = BULK_BATCH_SIZE,
+    workers: int = BULK_WORKERS,
+    on_duplicate: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> BulkResult:
+    """
+    Insert `rows` into the collection `handle`, using the bulk import API.
+
+    The rows are consumed lazily and split into batches of `batch_size`, which are
+    sent over at most `workers` concurrent requests. Only a bounded number of
+    batches is held in memory at any time.
+
+    `on_duplicate` is passed through to the import API, and controls what happens
+    to rows whose `_key` already exists ("error", "update", "replace" or "ignore").
+
+    If given, `progress` is called with the running totals after each batch
+    completes. Failures don't halt the import; they're counted and reported per
+    batch in the result.
+    """
+    result: BulkResult = {
+        "created": 0,
+        "updated": 0,
+        "ignored": 0,
+        "errors": 0,
+        "batch_errors": [],
+    }
+
+    def import_batch(batch: List[Dict]) -> Dict:
+        return handle.import_bulk(
+            batch, halt_on_error=False, details=False, on_duplicate=on_duplicate
+        )
+
+    def collect(future: Future, index: int, size: int) -> None:
+        try:
+            counts = future.result()
+        except DocumentInsertError as e:
+            result["errors"] += size
+            result["batch_errors"].append(
+                {"batch": index, "errors": size, "message": str(e)}
+            )
+        else:
+            result["created"] += counts["created"]
+            result["updated"] += counts.get("updated", 0)
+            result["ignored"] += counts.get("ignored", 0)
+            result["errors"] += counts["errors"]
+
+            if counts["errors"]:
+                result["batch_errors"].append(
+                    {"batch": index, "errors": counts["errors"], "message": ""}
+                )
+
+        if progress is not None:
+            progress(result)
+
+    # Allow one extra batch per worker to be queued, so that workers never idle
+    max_pending = 2 * workers
+    pending: Dict[Future, Tuple[int, int]] = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for index, batch in enumerate(batches(rows, batch_size)):
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future, *pending.pop(future))
+
+            pending[executor.submit(import_batch, batch)] = (index, len(batch))
+
+        for future in sorted(pending, key=lambda f: pending[f][0]):
+            collect(future, *pending[future])
+
+    return result
+
+
+def changed_endpoints(status: Dict) -> List[str]:
+    """Return the `_from` and `_to` of the old and new versions of a changed edge."""
+    return [
+        doc[endpoint]
+        for doc in (status.get("old"), status.get("new"))
+        if doc is not None
+        for endpoint in ("_from", "_to")
+    ]
+
+
+def _apply_batches(
+    operation: Callable[[List[Any]], List[Any]],
+    rows: Iterable[Any],
+    batch_size: int,
+    changed: Optional[ChangeCallback] = None,
+) -> MutationResult:
+    """
+    Apply a document API `operation` to `rows`, one batch at a time.
+
+    If given, `changed` is called with the metadata of each changed document.
+    """
+    result: MutationResult = {"count": 0, "errors": 0, "batch_errors": []}
+
+    for index, batch in enumerate(batches(rows, batch_size)):
+        try:
+            statuses = operation(batch)
+        except ArangoError as e:
+            result["errors"] += len(batch)
+            result["batch_errors"].append(
+                {"batch": index, "errors": len(batch), "message": str(e)}
+            )
+            continue
+
+        # Failures for individual documents are returned in place of their metadata
+        failed = sum(isinstance(status, ArangoError) for status in statuses)
+        result["count"] += len(batch) - failed
+
+        if changed is not None:
+            for status in statuses:
+                if not isinstance(status, ArangoError):
+                    changed(status)
+        result["errors"] += failed
+
+        if failed:
+            result["batch_errors"].append(
+                {"batch": index, "errors": failed, "message": ""}
+            )
+
+    return result
+
+
+def bulk_update(
+    handle: StandardCollection,
+    rows: Iterable[Dict],
+    batch_size: int = BULK_BATCH_SIZE,
+    changed: Optional[ChangeCallback] = None,
+) -> MutationResult:
+    """
+    Merge the partial documents `rows` into the existing documents of `handle`.
+
+    Each row must contain the `_key` of the document to update. Rows are consumed
+    lazily, and applied one batch at a time. If given, `changed` is called for
+    each updated document, with its old and new versions.
+    """
+    returned = changed is not None
+    return _apply_batches(
+        lambda batch: handle.update_many(
+            batch, check_rev=False, return_old=returned, return_new=returned
+        ),
+        rows,
+        batch_size,
+        changed,
+    )
+
+
+def bulk_delete(
+    handle: StandardCollection,
+    keys: Iterable[str],
+    batch_size: int = BULK_BATCH_SIZE,
+    changed: Optional[ChangeCallback] = None,
+) -> MutationResult:
+    """
+    Delete the documents with the given `keys` from `handle`.
+
+    Keys are consumed lazily, and deleted one batch at a time. If given, `changed`
+    is called for each deleted document, with its old version.
+    """
+    return _apply_batches(
+        lambda batch: handle.delete_many(
+            batch, check_rev=False, return_old=changed is not None
+        ),
+        keys,
+        batch_size,
+        changed,
+    )
@@ -0,0 +1,107 @@
+"""Caching of values computed from the contents of database collections."""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Maximum number of entries kept by each revision cache
+REVISION_CACHE_SIZE = int(os.environ.get("REVISION_CACHE_SIZE", "256"))
+
+# Number of seconds for which graph definitions are used without checking whether
+# another process has changed them
+GRAPH_DEFINITION_TTL = float(os.environ.get("GRAPH_DEFINITION_TTL", "5"))
+
+
+class RevisionCache:
+    """
+    A least recently used cache of values, tagged with collection revisions.
+
+    A value is only returned while the revisions it was stored with are current,
+    so that changes to the underlying collections (from any process) invalidate it.
+    """
+
+    def __init__(self, maxsize: int = REVISION_CACHE_SIZE):
+        """Initialize an empty cache holding at most `maxsize` values."""
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Hashable, Tuple[Any, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, revision: Any) -> Optional[Any]:
+        """Return the value stored under `key` at `revision`, or `None`."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != revision:
+                return None
+
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, revision: Any, value: Any) -> None:  # noqa: A003
+        """Store `value` under `key`, tagged with `revision`."""
+        with self.lock:
+            self.entries[key] = (revision, value)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove the value stored under `key`, if any."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class CheckedCache:
+    """
+    A cache of values tagged with a revision, which is checked at most every `ttl`.
+
+    This suits small values that are read far more often than they change, where
+    even checking the revision on every read would be a noticeable cost. Changes
+    made by other processes are seen within `ttl` seconds; changes made by this
+    process are seen immediately, as long as they invalidate the cache.
+    """
+
+    def __init__(self, ttl: float):
+        """Initialize an empty cache, checking revisions at most every `ttl` seconds."""
+        self.ttl = ttl
+        self.entries: Dict[Hashable, Tuple[Any, float, Any]] = {}
+        self.lock = threading.Lock()
+
+    def get(
+        self, key: Hashable, revision: Callable[[], Any], load: Callable[[], Any]
+    ) -> Any:
+        """
+        Return the value stored under `key`, loading it if necessary.
+
+        The `revision` function returns the current revision of the value, and is
+        called only once the stored value has gone unchecked for `ttl` seconds. The
+        value is then reloaded with `load` if the revision has changed.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry[2]
+
+        current = revision()
+        if entry is not None and entry[0] == current:
+            value = entry[2]
+        else:
+            value = load()
+
+        with self.lock:
+            self.entries[key] = (current, now, value)
+
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove the value stored under `key`, if any."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+# Graph definitions of each workspace, keyed by internal workspace name
+graph_definitions = CheckedCache(GRAPH_DEFINITION_TTL)
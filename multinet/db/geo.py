@@ -0,0 +1,293 @@
+"""
+Geospatial queries on the nodes of graphs, using the geo indexes of node tables.
+
+A node table declares its latitude and longitude attributes by creating a geo
+index on them (see `Table.add_geo_index`). Bounding box, radius and nearest
+neighbor queries then run as index lookups on every node table of a graph that
+declares them, so map views only fetch the nodes, and optionally the edges
+between them, that are in view.
+"""
+import math
+
+from multinet.db.models.graph import Graph
+from multinet.db.models.table import geo_index_attributes
+from multinet.errors import BadQueryArgument, ServerError, FlaskTuple
+
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Upper bound on the number of nodes returned by a nearest neighbor query
+MAX_NEAREST_NODES = 10000
+
+# Bounding boxes are covered by polygons at most GEO_CHUNK degrees wide, whose
+# sides along parallels have a vertex every GEO_STEP degrees, and which extend
+# GEO_MARGIN degrees beyond the box
+GEO_CHUNK = 90
+GEO_STEP = 1
+GEO_MARGIN = 0.01
+
+# Polygons stop short of the poles, where their vertices would coincide
+GEO_MAX_LATITUDE = 89.99
+
+
+class GeoNotIndexed(ServerError):
+    """Error raised if a geo query is made on a table or graph without geo columns."""
+
+    def __init__(self, name: str):
+        """Initialize the error with the table or graph name."""
+        self.name = name
+
+    def flask_response(self) -> FlaskTuple:
+        """Generate a 400 error."""
+        return (self.name, "400 Not Geo Indexed")
+
+
+def geo_tables(graph: Graph) -> List[Tuple[str, Dict[str, str]]]:
+    """Return the node tables of `graph` with geo columns, along with the columns."""
+    tables = []
+    for name in sorted(graph.node_tables()):
+        attributes = geo_index_attributes(graph.handle.vertex_collection(name))
+        if attributes is not None:
+            tables.append((name, attributes))
+
+    if not tables:
+        raise GeoNotIndexed(graph.name)
+
+    return tables
+
+
+def check_coordinates(
+    latitude: Tuple[str, float], longitude: Tuple[str, float]
+) -> None:
+    """Raise an error unless the named latitude and longitude are in range."""
+    name, value = latitude
+    if not -90 <= value <= 90:
+        raise BadQueryArgument(name, str(value), ["latitudes from -90 to 90"])
+
+    name, value = longitude
+    if not -180 <= value <= 180:
+        raise BadQueryArgument(name, str(value), ["longitudes from -180 to 180"])
+
+
+def box_polygons(
+    south: float, west: float, north: float, east: float
+) -> List[Tuple[Dict, float, float, bool]]:
+    """
+    Return GeoJSON polygons covering a latitude/longitude box.
+
+    Each polygon comes with the longitude range of the box it covers, and whether
+    that range includes its upper bound. Boxes with `west` greater than `east`
+    cross the antimeridian. The sides of polygons are geodesics, which bow away
+    from the parallels bounding the box, so sides along parallels are split into
+    short segments, whose bulge is well within the margin the polygons extend
+    beyond the box by. Each polygon is smaller than a hemisphere, so it's
+    unambiguous.
+    """
+    ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+    bottom = min(
+        max(south - GEO_MARGIN, -GEO_MAX_LATITUDE), GEO_MAX_LATITUDE - GEO_MARGIN
+    )
+    top = max(min(north + GEO_MARGIN, GEO_MAX_LATITUDE), GEO_MARGIN - GEO_MAX_LATITUDE)
+
+    polygons = []
+    for low, high in ranges:
+        chunks = max(1, math.ceil((high - low) / GEO_CHUNK))
+        for i in range(chunks):
+            start = low + (high - low) * i / chunks
+            end = low + (high - low) * (i + 1) / chunks
+
+            left = max(start - GEO_MARGIN, -180.0)
+            right = min(end + GEO_MARGIN, 180.0)
+            steps = max(1, math.ceil((right - left) / GEO_STEP))
+            longitudes = [left + (right - left) * j / steps for j in range(steps + 1)]
+
+            ring = [[lon, bottom] for lon in longitudes]
+            ring += [[lon, top] for lon in reversed(longitudes)]
+            ring.append(ring[0])
+
+            polygon = {"type": "Polygon", "coordinates": [ring]}
+            polygons.append((polygon, start, end, i == chunks - 1))
+
+    return polygons
+
+
+def selected_nodes(
+    graph: Graph, selections: List[Tuple[str, Dict[str, Any]]], edges: bool
+) -> Dict[str, Iterator[Dict]]:
+    """
+    Return the nodes selected by `selections`, and optionally the edges they induce.
+
+    Each selection is an AQL clause binding the selected nodes to `n`, along with
+    its bind parameters; parameters shared between selections must have the same
+    values. Nodes are streamed one selection at a time.
+    """
+
+    def nodes() -> Iterator[Dict]:
+        for selection, bind_vars in selections:
+            yield from graph.aql.execute(
+                f'{selection} RETURN UNSET(n, "_rev")',
+                bind_vars=bind_vars,
+                batch_size=10000,
+                stream=True,
+            )
+
+    if not edges:
+        return {"nodes": nodes(), "edges": iter([])}
+
+    edge_bind_vars: Dict[str, Any] = {}
+    for _, bind_vars in selections:
+        edge_bind_vars.update(bind_vars)
+
+    ids = ", ".join(f"({selection} RETURN n._id)" for selection, _ in selections)
+
+    return {
+        "nodes": nodes(),
+        "edges": graph.induced_edges(f"FLATTEN([{ids}])", edge_bind_vars),
+    }
+
+
+def within_box(
+    graph: Graph,
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    edges: bool = False,
+) -> Dict[str, Iterator[Dict]]:
+    """
+    Return the nodes of `graph` within a latitude/longitude box.
+
+    If `edges` is set, the edges between those nodes are returned as well. Nodes
+    are found through the geo index with the polygons of `box_polygons`, and then
+    filtered to the exact box.
+    """
+    check_coordinates(("south", south), ("west", west))
+    check_coordinates(("north", north), ("east", east))
+    if south > north:
+        raise BadQueryArgument("south", str(south), [f"latitudes up to {north}"])
+
+    selections: List[Tuple[str, Dict[str, Any]]] = []
+    for table, attributes in geo_tables(graph):
+        for polygon, start, end, closed in box_polygons(south, west, north, east):
+            suffix = str(len(selections))
+            bind_vars: Dict[str, Any] = {
+                f"@table{suffix}": table,
+                f"latitude{suffix}": attributes["latitude"],
+                f"longitude{suffix}": attributes["longitude"],
+                f"polygon{suffix}": polygon,
+                f"south{suffix}": south,
+                f"north{suffix}": north,
+                f"west{suffix}": start,
+                f"east{suffix}": end,
+            }
+
+            latitude, longitude = f"n[@latitude{suffix}]", f"n[@longitude{suffix}]"
+            selection = f"""
+            FOR n IN @@table{suffix}
+                FILTER GEO_CONTAINS(@polygon{suffix}, [{longitude}, {latitude}])
+                FILTER {latitude} >= @south{suffix} AND {latitude} <= @north{suffix}
+                FILTER {longitude} >= @west{suffix}
+                    AND {longitude} {"<=" if closed else "<"} @east{suffix}
+            """
+            selections.append((selection, bind_vars))
+
+    return selected_nodes(graph, selections, edges)
+
+
+def within_radius(
+    graph: Graph, latitude: float, longitude: float, radius: float, edges: bool = False
+) -> Dict[str, Iterator[Dict]]:
+    """
+    Return the nodes of `graph` within `radius` meters of a point.
+
+    If `edges` is set, the edges between those nodes are returned as well.
+    """
+    check_coordinates(("latitude", latitude), ("longitude", longitude))
+    if radius < 0:
+        raise BadQueryArgument("radius", str(radius), ["non-negative distances"])
+
+    selections: List[Tuple[str, Dict[str, Any]]] = []
+    for i, (table, attributes) in enumerate(geo_tables(graph)):
+        bind_vars: Dict[str, Any] = {
+            f"@table{i}": table,
+            f"latitude{i}": attributes["latitude"],
+            f"longitude{i}": attributes["longitude"],
+            "point_latitude": latitude,
+            "point_longitude": longitude,
+            "radius": radius,
+        }
+
+        distance = (
+            f"DISTANCE(n[@latitude{i}], n[@longitude{i}], "
+            "@point_latitude, @point_longitude)"
+        )
+        selection = f"FOR n IN @@table{i} FILTER {distance} <= @radius"
+        selections.append((selection, bind_vars))
+
+    return selected_nodes(graph, selections, edges)
+
+
+def nearest(
+    graph: Graph, latitude: float, longitude: float, k: int, edges: bool = False
+) -> Dict[str, Iterator[Dict]]:
+    """
+    Return the `k` nodes of `graph` nearest to a point, nearest first.
+
+    If `edges` is set, the edges between those nodes are returned as well. The
+    nearest nodes of each node table are found through its geo index, and then
+    merged.
+    """
+    check_coordinates(("latitude", latitude), ("longitude", longitude))
+    if not 0 <= k <= MAX_NEAREST_NODES:
+        raise BadQueryArgument("k", str(k), [f"0 to {MAX_NEAREST_NODES}"])
+
+    bind_vars: Dict[str, Any] = {
+        "point_latitude": latitude,
+        "point_longitude": longitude,
+        "k": k,
+    }
+
+    candidates = []
+    for i, (table, attributes) in enumerate(geo_tables(graph)):
+        bind_vars.update(
+            {
+                f"@table{i}": table,
+                f"latitude{i}": attributes["latitude"],
+                f"longitude{i}": attributes["longitude"],
+            }
+        )
+
+        distance = (
+            f"DISTANCE(n[@latitude{i}], n[@longitude{i}], "
+            "@point_latitude, @point_longitude)"
+        )
+        candidates.append(
+            f"""(
+                FOR n IN @@table{i}
+                    SORT {distance}
+                    LIMIT @k
+                    RETURN {{node: n, distance: {distance}}}
+            )"""
+        )
+
+    selection = f"""
+    FOR candidate IN FLATTEN([{", ".join(candidates)}])
+        SORT candidate.distance
+        LIMIT @k
+    """
+
+    def nodes() -> Iterator[Dict]:
+        yield from graph.aql.execute(
+            f'{selection} RETURN UNSET(candidate.node, "_rev")',
+            bind_vars=bind_vars,
+            batch_size=10000,
+        )
+
+    if not edges:
+        return {"nodes": nodes(), "edges": iter([])}
+
+    return {
+        "nodes": nodes(),
+        "edges": graph.induced_edges(
+            f"({selection} RETURN candidate.node._id)", bind_vars
+        ),
+    }
@@ -0,0 +1,269 @@
+"""Server-side graph layouts, computed over in-memory graph snapshots."""
+import hashlib
+import json
+import math
+import random
+
+import numpy as np
+from arango.database import StandardDatabase
+from arango.collection import StandardCollection
+
+from multinet.db.snapshot import GraphSnapshot
+from multinet.db.models.graph import Graph
+
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Hidden (system) collections of each workspace, holding the metadata of each
+# layout, and the position of each node in each layout
+LAYOUTS_TABLE = "_layouts"
+POSITIONS_TABLE = "_layout_positions"
+
+LAYOUT_ALGORITHMS = ["force_directed"]
+
+# Upper bound on the number of iterations a layout job may request
+MAX_LAYOUT_ITERATIONS = 500
+
+# Strength of the pull of each node towards the center of the layout, which keeps
+# nodes without edges from drifting away
+GRAVITY = 0.05
+
+
+def layout_id(graph: str, params: Dict[str, Any]) -> str:
+    """Return the identifier of the layout of `graph` computed with `params`."""
+    spec = json.dumps({"graph": graph, **params}, sort_keys=True)
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()
+
+
+def _repulsion(
+    xs: np.ndarray, ys: np.ndarray, k: float, cell: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the repulsive displacement of each node, from the nodes close to it.
+
+    Nodes are bucketed into a grid of square cells of side `cell`, and each node is
+    repelled by every node in its own and the eight neighboring cells that's
+    closer than `cell`. The pairs of nodes in each pair of neighboring cells are
+    enumerated as arrays, one neighbor offset at a time.
+    """
+    count = len(xs)
+    cx = np.floor(xs / cell).astype(np.int64)
+    cy = np.floor(ys / cell).astype(np.int64)
+
+    # Number the cells, leaving room for the neighbors of the outermost cells
+    cx -= cx.min() - 1
+    cy -= cy.min() - 1
+    width = int(cy.max()) + 2
+    keys = cx * width + cy
+
+    order = np.argsort(keys, kind="stable")
+    cells, starts, sizes = np.unique(keys[order], return_index=True, return_counts=True)
+
+    dx = np.zeros(count)
+    dy = np.zeros(count)
+    for ox in (-1, 0, 1):
+        for oy in (-1, 0, 1):
+            neighbors = cells + ox * width + oy
+            found = np.searchsorted(cells, neighbors)
+            found[found == len(cells)] = 0
+            present = cells[found] == neighbors
+
+            own, other = np.nonzero(present)[0], found[present]
+            pair_sizes = sizes[own] * sizes[other]
+            total = int(pair_sizes.sum())
+            if not total:
+                continue
+
+            # Enumerate every (node, neighbor) pair between the two cells
+            pair = np.repeat(np.arange(len(own)), pair_sizes)
+            position = np.arange(total) - np.repeat(
+                np.cumsum(pair_sizes) - pair_sizes, pair_sizes
+            )
+            columns = sizes[other][pair]
+            nodes = order[starts[own][pair] + position // columns]
+            others = order[starts[other][pair] + position % columns]
+
+            keep = nodes != others
+            nodes, others = nodes[keep], others[keep]
+
+            ddx = xs[nodes] - xs[others]
+            ddy = ys[nodes] - ys[others]
+            distance2 = ddx * ddx + ddy * ddy
+
+            # Nudge apart nodes at the same position
+            coincident = distance2 == 0
+            ddx[coincident] = 0.01
+            distance2[coincident] = 0.0001
+
+            close = distance2 < cell * cell
+            force = np.where(close, k * k / distance2, 0)
+            dx += np.bincount(nodes, ddx * force, minlength=count)
+            dy += np.bincount(nodes, ddy * force, minlength=count)
+
+    return dx, dy
+
+
+def force_directed(
+    snapshot: GraphSnapshot, isolated: int, iterations: int, rng: random.Random
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the x and y positions of each node, by node number.
+
+    Positions are computed with the grid variant of the Fruchterman-Reingold
+    algorithm, where only nodes in neighboring grid cells repel each other, which
+    makes each iteration take time roughly linear in the size of the graph. Each
+    iteration is computed with NumPy array operations over the snapshot's CSR
+    arrays. The `isolated` nodes numbered after the nodes of the snapshot have no
+    edges.
+    """
+    count = len(snapshot.ids) + isolated
+    if not count:
+        return np.zeros(0), np.zeros(0)
+
+    # Ideal edge length, and the extent of the layout area
+    k = 1.0
+    side = math.sqrt(count) * k
+    center = side / 2
+    cell = 2 * k
+
+    xs = np.array([rng.random() * side for _ in range(count)])
+    ys = np.array([rng.random() * side for _ in range(count)])
+
+    sources = np.repeat(np.arange(len(snapshot.ids)), np.diff(snapshot.out_offsets))
+    targets = snapshot.out_indices
+
+    for iteration in range(iterations):
+        temperature = side / 10 * (1 - iteration / iterations)
+
+        # Repulsion between all pairs of nodes closer than the cell size
+        dx, dy = _repulsion(xs, ys, k, cell)
+
+        # Attraction along each edge
+        ddx = xs[sources] - xs[targets]
+        ddy = ys[sources] - ys[targets]
+        force = np.sqrt(ddx * ddx + ddy * ddy) / k
+        dx -= np.bincount(sources, ddx * force, minlength=count)
+        dy -= np.bincount(sources, ddy * force, minlength=count)
+        dx += np.bincount(targets, ddx * force, minlength=count)
+        dy += np.bincount(targets, ddy * force, minlength=count)
+
+        # Move each node, no further than the current temperature
+        dx -= GRAVITY * (xs - center)
+        dy -= GRAVITY * (ys - center)
+
+        displacement = np.sqrt(dx * dx + dy * dy)
+        scale = np.divide(
+            np.minimum(displacement, temperature),
+            displacement,
+            out=np.zeros(count),
+            where=displacement > 0,
+        )
+        xs += dx * scale
+        ys += dy * scale
+
+    return xs, ys
+
+
+def layout_tables(
+    handle: StandardDatabase,
+) -> Tuple[StandardCollection, StandardCollection]:
+    """Return the layout metadata and position collections, creating them if needed."""
+    if not handle.has_collection(LAYOUTS_TABLE):
+        handle.create_collection(LAYOUTS_TABLE, system=True)
+
+    if not handle.has_collection(POSITIONS_TABLE):
+        positions = handle.create_collection(POSITIONS_TABLE, system=True)
+        positions.add_persistent_index(["layout", "node"], unique=True)
+
+    return handle.collection(LAYOUTS_TABLE), handle.collection(POSITIONS_TABLE)
+
+
+def layout_doc(handle: StandardDatabase, graph: Graph, layout: str) -> Optional[Dict]:
+    """Return the stored document of the layout `layout` of `graph`, if it exists."""
+    if not handle.has_collection(LAYOUTS_TABLE):
+        return None
+
+    doc = handle.collection(LAYOUTS_TABLE).get(layout)
+    if doc is None or doc["graph"] != graph.name:
+        return None
+
+    return doc
+
+
+def layout_metadata(graph: Graph, doc: Dict) -> Dict[str, Any]:
+    """
+    Return the metadata of the layout of `graph` stored in `doc`.
+
+    A layout is stale if the edge table has changed since it was computed.
+    """
+    edge_table = graph.edge_table()
+    revision = graph.handle.edge_collection(edge_table).revision()
+
+    return {
+        "id": doc["_key"],
+        "graph": doc["graph"],
+        "params": doc["params"],
+        "job": doc["job"],
+        "nodes": doc["nodes"],
+        "revision": doc["revision"],
+        "stale": doc["revision"] != revision,
+    }
+
+
+def get_layout(
+    handle: StandardDatabase, graph: Graph, layout: str
+) -> Optional[Dict[str, Any]]:
+    """Return the metadata of the layout `layout` of `graph`, if it exists."""
+    doc = layout_doc(handle, graph, layout)
+    if doc is None:
+        return None
+
+    return layout_metadata(graph, doc)
+
+
+def layout_nodes(graph: Graph, layout: str) -> Iterator[Dict]:
+    """
+    Generate the node documents of `graph`, with their positions in `layout`.
+
+    Nodes without a position in the layout, such as nodes added after it was
+    computed, are generated without one.
+    """
+    query = """
+    FOR n IN @@table
+        LET p = FIRST(
+            FOR p IN @@positions
+                FILTER p.layout == @layout AND p.node == n._id
+                RETURN p
+        )
+        RETURN MERGE(UNSET(n, "_rev"), p ? {x: p.x, y: p.y} : {})
+    """
+
+    for table in sorted(graph.node_tables()):
+        bind_vars = {"@table": table, "@positions": POSITIONS_TABLE, "layout": layout}
+        yield from graph.aql.execute(
+            query, bind_vars=bind_vars, batch_size=10000, stream=True
+        )
+
+
+def delete_layouts(handle: StandardDatabase, graph: str) -> None:
+    """Delete all layouts of the graph `graph`, and their positions."""
+    if not handle.has_collection(LAYOUTS_TABLE):
+        return
+
+    query = """
+    FOR l IN @@layouts
+        FILTER l.graph == @graph
+        FOR p IN @@positions
+            FILTER p.layout == l._key
+            REMOVE p IN @@positions
+    """
+    bind_vars = {
+        "@layouts": LAYOUTS_TABLE,
+        "@positions": POSITIONS_TABLE,
+        "graph": graph,
+    }
+    handle.aql.execute(query, bind_vars=bind_vars)
+
+    handle.aql.execute(
+        "FOR l IN @@layouts FILTER l.graph == @graph REMOVE l IN @@layouts",
+        bind_vars={"@layouts": LAYOUTS_TABLE, "graph": graph},
+    )
@@ -0,0 +1,316 @@
+"""Sparse adjacency matrices of graphs, optionally reordered to reveal structure."""
+import warnings
+
+import numpy as np
+from scipy.linalg import eigh
+from scipy.sparse import csgraph, csr_matrix, diags
+from scipy.sparse.linalg import eigsh, lobpcg
+
+from multinet.db.cache import RevisionCache
+from multinet.db.models.graph import Graph
+from multinet.db.snapshot import GraphSnapshot
+from multinet.errors import BadQueryArgument, BatchTooLarge
+
+from typing import Any, Dict, List, Optional, Sequence
+
+MATRIX_ORDERS = ["none", "rcm", "spectral", "attribute"]
+MATRIX_FORMATS = ["coo", "csr"]
+
+# Upper bound on the number of rows of a matrix
+MAX_MATRIX_NODES = 10000
+
+# Components up to this size have their Fiedler vector computed with a dense
+# eigensolver, and larger ones with a sparse one
+SPECTRAL_DENSE_NODES = 100
+
+# Residual norm within which, and number of iterations in which, LOBPCG must
+# find the Fiedler vector of a larger component
+SPECTRAL_TOLERANCE = 1e-6
+SPECTRAL_ITERATIONS = 500
+
+# Components on which LOBPCG converges too slowly, such as long paths, are
+# solved in shift-invert mode instead, around this shift of the (singular)
+# Laplacian
+SPECTRAL_SHIFT = -1e-3
+
+# Matrices, keyed by workspace, graph name, and matrix parameters
+matrix_cache = RevisionCache()
+
+
+def symmetric_matrix(
+    count: int, rows: Sequence[int], cols: Sequence[int]
+) -> csr_matrix:
+    """Return the pattern of a matrix's entries, ignoring direction and loops."""
+    row_array = np.asarray(rows, dtype=np.int32)
+    col_array = np.asarray(cols, dtype=np.int32)
+    off_diagonal = row_array != col_array
+    sources, targets = row_array[off_diagonal], col_array[off_diagonal]
+
+    ones = np.ones(2 * len(sources))
+    matrix = csr_matrix(
+        (
+            ones,
+            (np.concatenate([sources, targets]), np.concatenate([targets, sources])),
+        ),
+        shape=(count, count),
+    )
+
+    # Duplicate entries are summed, so reset every entry to 1
+    matrix.data[:] = 1
+    return matrix
+
+
+def reverse_cuthill_mckee(matrix: csr_matrix) -> List[int]:
+    """
+    Return the Reverse Cuthill-McKee ordering of the rows of a symmetric matrix.
+
+    The ordering concentrates the nonzero entries of the reordered matrix near
+    its diagonal.
+    """
+    return csgraph.reverse_cuthill_mckee(matrix, symmetric_mode=True).tolist()
+
+
+def fiedler_vector(laplacian: csr_matrix, degrees: np.ndarray) -> np.ndarray:
+    """
+    Return the Fiedler vector of a connected graph, from its Laplacian and degrees.
+
+    This is the eigenvector of the second smallest eigenvalue. It's found by LOBPCG
+    orthogonally to the constant vector, the eigenvector of the smallest, with
+    the inverse degrees as preconditioner. Its sign is chosen so that its largest
+    entry in magnitude is positive.
+    """
+    count = laplacian.shape[0]
+    start = np.random.default_rng(0).random((count, 1))
+
+    if count <= SPECTRAL_DENSE_NODES:
+        _, vectors = eigh(laplacian.toarray(), subset_by_index=[1, 1])
+        vector = vectors[:, 0]
+    else:
+        with warnings.catch_warnings():
+            # Not converging is handled below
+            warnings.simplefilter("ignore", UserWarning)
+            _, vectors, residuals = lobpcg(
+                laplacian,
+                start,
+                Y=np.ones((count, 1)),
+                M=diags(1 / degrees),
+                largest=False,
+                tol=SPECTRAL_TOLERANCE,
+                maxiter=SPECTRAL_ITERATIONS,
+                retResidualNormsHistory=True,
+            )
+        vector = vectors[:, 0]
+
+        if np.max(residuals[-1]) > SPECTRAL_TOLERANCE:
+            _, vectors = eigsh(
+                laplacian, k=2, sigma=SPECTRAL_SHIFT, which="LM", v0=start[:, 0]
+            )
+            vector = vectors[:, 1]
+
+    if vector[np.argmax(np.abs(vector))] < 0:
+        vector = -vector
+
+    return vector
+
+
+def spectral_order(matrix: csr_matrix) -> List[int]:
+    """
+    Return the rows of a symmetric matrix, sorted by their Fiedler vector entry.
+
+    Each connected component is ordered by the Fiedler vector of its graph
+    Laplacian, and the components follow each other in order of their first row.
+    """
+    count, labels = csgraph.connected_components(matrix, directed=False)
+
+    order: List[int] = []
+    for component in range(count):
+        members = np.flatnonzero(labels == component)
+        if len(members) < 3:
+            order.extend(members.tolist())
+            continue
+
+        submatrix = matrix[members][:, members]
+        degrees = np.asarray(submatrix.sum(axis=1)).ravel()
+        laplacian = (diags(degrees) - submatrix).tocsr()
+
+        vector = fiedler_vector(laplacian, degrees)
+        order.extend(members[np.lexsort((members, vector))].tolist())
+
+    return order
+
+
+def attribute_order(values: List[Any], descending: bool = False) -> List[int]:
+    """
+    Return the rows sorted by the given attribute values.
+
+    Rows without a value come last. Values of different types are grouped by
+    type, since they can't be compared with each other.
+    """
+    present = [i for i, value in enumerate(values) if value is not None]
+    present.sort(
+        key=lambda i: (type(values[i]).__name__, values[i]), reverse=descending
+    )
+
+    return present + [i for i, value in enumerate(values) if value is None]
+
+
+def count_matrix(count: int, rows: np.ndarray, cols: np.ndarray) -> csr_matrix:
+    """Return the matrix counting the entries at each of the positions given."""
+    matrix = csr_matrix(
+        (np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(count, count)
+    )
+    matrix.sum_duplicates()
+    return matrix
+
+
+def snapshot_counts(snapshot: GraphSnapshot, ids: List[str]) -> csr_matrix:
+    """Return the number of edges between each pair of the nodes `ids`."""
+    numbers = np.array(
+        [snapshot.numbers.get(node_id, -1) for node_id in ids], dtype=np.int64
+    )
+    present = np.flatnonzero(numbers >= 0)
+
+    # Select the rows and columns of nodes with edges, and place them at the
+    # positions of those nodes in `ids`
+    selected = numbers[present]
+    entries = snapshot.adjacency()[selected][:, selected].tocoo()
+
+    return count_matrix(len(ids), present[entries.row], present[entries.col])
+
+
+def induced_counts(graph: Graph, ids: List[str]) -> csr_matrix:
+    """
+    Return the number of edges between each pair of the nodes `ids`.
+
+    Only the edges of those nodes are read, through the edge index.
+    """
+    query = """
+    FOR id IN @ids
+        FOR e IN @@edges
+            FILTER e._from == id AND e._to IN @ids
+            RETURN [e._from, e._to]
+    """
+    bind_vars = {"@edges": graph.edge_table(), "ids": ids}
+
+    positions = {node_id: i for i, node_id in enumerate(ids)}
+    pairs = [
+        (positions[source], positions[target])
+        for source, target in graph.aql.execute(query, bind_vars=bind_vars)
+    ]
+    rows, cols = zip(*pairs) if pairs else ((), ())
+
+    return count_matrix(
+        len(ids), np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+    )
+
+
+def adjacency_matrix(
+    graph: Graph,
+    node_ids: Optional[List[str]] = None,
+    order: str = "none",
+    attribute: Optional[str] = None,
+    descending: bool = False,
+    matrix_format: str = "coo",
+) -> Dict[str, Any]:
+    """
+    Return the sparse adjacency matrix of `graph`, or of the nodes `node_ids`.
+
+    Entry (i, j) counts the edges from the node of row i to the node of column
+    j. Rows and columns share the node order given by `order`; with "none" it's
+    the order of `node_ids`, or of the node tables. The matrix is returned in
+    COO (`rows`, `cols`, `values`) or CSR (`offsets`, `indices`, `values`) form,
+    and results are cached until any table in the graph changes.
+    """
+    if order not in MATRIX_ORDERS:
+        raise BadQueryArgument("order", order, MATRIX_ORDERS)
+
+    if matrix_format not in MATRIX_FORMATS:
+        raise BadQueryArgument("format", matrix_format, MATRIX_FORMATS)
+
+    if order == "attribute" and attribute is None:
+        raise BadQueryArgument("attribute", "", ["an attribute to order by"])
+
+    key = (
+        graph.workspace,
+        graph.name,
+        None if node_ids is None else tuple(node_ids),
+        order,
+        attribute,
+        descending,
+        matrix_format,
+    )
+    revisions = graph.revisions()
+
+    cached = matrix_cache.get(key, revisions)
+    if cached is not None:
+        return cached
+
+    if node_ids is None:
+        node_count = graph.nodes(limit=0)["count"]
+        if node_count > MAX_MATRIX_NODES:
+            raise BadQueryArgument(
+                "graph", graph.name, [f"graphs with at most {MAX_MATRIX_NODES} nodes"]
+            )
+
+        ids = list(graph.node_ids())
+        counts = snapshot_counts(graph.load_snapshot(), ids)
+    else:
+        ids = list(dict.fromkeys(node_ids))
+        if len(ids) > MAX_MATRIX_NODES:
+            raise BatchTooLarge(len(ids), MAX_MATRIX_NODES)
+
+        # Raises an error for node IDs outside of the graph's node tables
+        graph.batch_node_attributes(ids)
+
+        # Only read the whole edge table if it's already cached
+        snapshot = graph.snapshot()
+        counts = (
+            induced_counts(graph, ids)
+            if snapshot is None
+            else snapshot_counts(snapshot, ids)
+        )
+
+    if order == "none":
+        permutation = np.arange(len(ids))
+    elif order == "attribute":
+        values = list(
+            graph.aql.execute(
+                "FOR id IN @ids RETURN DOCUMENT(id)[@attribute]",
+                bind_vars={"ids": ids, "attribute": attribute},
+            )
+        )
+        permutation = np.array(attribute_order(values, descending), dtype=np.int64)
+    else:
+        entries = counts.tocoo()
+        symmetric = symmetric_matrix(len(ids), entries.row, entries.col)
+        permutation = np.array(
+            reverse_cuthill_mckee(symmetric)
+            if order == "rcm"
+            else spectral_order(symmetric),
+            dtype=np.int64,
+        )
+
+    # Renumber rows and columns into the new order
+    reordered = counts[permutation][:, permutation].tocsr()
+    reordered.sort_indices()
+    values = reordered.data.astype(np.int64)
+
+    matrix: Dict[str, Any] = {
+        "nodes": [ids[old] for old in permutation.tolist()],
+        "order": order,
+        "format": matrix_format,
+        "shape": [len(ids), len(ids)],
+        "nnz": len(values),
+        "values": values.tolist(),
+    }
+
+    if matrix_format == "coo":
+        entries = reordered.tocoo()
+        matrix["rows"] = entries.row.tolist()
+        matrix["cols"] = entries.col.tolist()
+    else:
+        matrix["offsets"] = reordered.indptr.tolist()
+        matrix["indices"] = reordered.indices.tolist()
+
+    matrix_cache.set(key, revisions, matrix)
+    return matrix
@@ -1,22 +1,173 @@
 """Operations that deal with graphs."""
+import itertools
+import random
 
+import numpy as np
 from arango.graph import Graph as ArangoGraph
 from arango.aql import AQL
+from arango.cursor import Cursor
 from arango.exceptions import DocumentGetError
 
-from multinet.types import EdgeDirection
-from multinet.errors import TableNotFound, NodeNotFound
+from multinet import util
+from multinet.types import EdgeDirection, GraphDefinition, SampleStrategy
+from multinet.db import sampling
+from multinet.db.cache import RevisionCache
+from multinet.db.snapshot import GraphSnapshot, snapshot_cache
+from multinet.errors import BadQueryArgument, TableNotFound, NodeNotFound
 
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # This maps the terminology of our API to that of python-arango
 edge_direction_map = {"all": "any", "incoming": "inbound", "outgoing": "outbound"}
 
+# AQL conditions selecting the edges `e` of the node whose ID is `{node}`
+edge_filters = {
+    "all": "e._from == {node} || e._to == {node}",
+    "incoming": "e._to == {node}",
+    "outgoing": "e._from == {node}",
+}
+
+# Selects a page of the edges `e` of a node, and counts all of them, given a
+# filter condition, an optional sort clause, and extra attributes for each edge.
+# Only structure is interpolated into query templates, never values, so that the
+# query text (and with it, the cached query plan) is shared by all nodes.
+EDGES_TEMPLATE = """
+    LET edges = (
+        FOR e IN @@edges
+            FILTER {filter}
+            {sort}
+            LIMIT @offset, @limit
+            RETURN {{
+                "edge": e._id,
+                "from": e._from,
+                "to": e._to
+                {expansions}
+            }}
+    )
+
+    LET count = FIRST(
+        FOR e IN @@edges
+            FILTER {filter}
+            COLLECT WITH COUNT INTO count
+            RETURN count
+    )
+"""
+
+# Upper bounds on the size of a neighborhood returned by a single request
+MAX_NEIGHBORHOOD_DEPTH = 10
+MAX_NEIGHBORHOOD_NODES = 10000
+MAX_NEIGHBORHOOD_EDGES = 50000
+
+# Comparisons allowed in edge filters
+FILTER_OPERATORS = ["==", "!=", "<", "<=", ">", ">="]
+
+# Upper bound on the number of nodes in a single batch request
+MAX_BATCH_NODES = 1000
+
+# Upper bound on the number of paths returned by a single request, and on the
+# memory (in bytes) the database may use to find them
+MAX_PATHS = 100
+PATH_MEMORY_LIMIT = 256 * 2 ** 20
+
+# Upper bounds on the size of a graph sample
+MAX_SAMPLE_NODES = 10000
+MAX_SAMPLE_EDGES = 50000
+
+# Number of component sizes listed in graph statistics, largest first
+MAX_COMPONENT_SIZES = 100
+
+# Upper bound on the number of groups, and of edges between groups, in an
+# aggregated graph
+MAX_AGGREGATE_GROUPS = 10000
+
+# Kinds of node degree stored by each graph, as the node attributes
+# `<kind>:<graph>` (see `degree_attributes`), and kept current as the graph's
+# edge table changes
+DEGREE_ATTRIBUTES = ["in_degree", "out_degree", "degree"]
+
+# Graph statistics, keyed by workspace and graph name
+stats_cache = RevisionCache()
+
+# Aggregated graphs, keyed by workspace, graph name, and aggregation parameters
+aggregate_cache = RevisionCache()
+
+
+def edge_filter(direction: EdgeDirection, node: str = "@node") -> str:
+    """Return the AQL condition selecting the edges of `node` in `direction`."""
+    return edge_filters[direction].format(node=node)
+
+
+def traversal_direction(direction: EdgeDirection) -> str:
+    """Return the AQL traversal keyword for `direction`."""
+    return edge_direction_map[direction].upper()
+
+
+def table_bind_vars(tables: List[str]) -> Dict[str, str]:
+    """Return bind variables `@@table0`, `@@table1`, ... for the given tables."""
+    return {f"@table{i}": table for i, table in enumerate(tables)}
+
+
+def degree_attributes(graph: str) -> Dict[str, str]:
+    """
+    Return the node attribute holding each kind of degree in the graph `graph`.
+
+    The attributes are namespaced by graph, with a separator that graph names
+    can't contain, so that graphs sharing node tables keep their own degrees.
+    """
+    return {kind: f"{kind}:{graph}" for kind in DEGREE_ATTRIBUTES}
+
+
+def filter_value(text: str, stored_type: Optional[str]) -> Any:
+    """
+    Return the value to compare stored values of the type `stored_type` against.
+
+    Stored strings, such as those of uploaded CSV files, are compared to the text
+    of the query argument itself; other stored values, or values of an attribute
+    that isn't stored at all, to the text parsed as JSON, if possible.
+    """
+    return text if stored_type == "string" else util.parse_value(text)
+
+
+def attribute_filters(
+    doc: str,
+    filters: Iterable[Tuple[str, str, str]],
+    bind_vars: Dict[str, Any],
+    stored_type: Callable[[str], Optional[str]],
+    prefix: str = "filter",
+) -> List[str]:
+    """
+    Return AQL conditions on the document `doc` for each filter.
+
+    Filters are (attribute, operator, value) triples, whose value is the text of
+    a query argument. The text is converted with `filter_value` to the type
+    `stored_type` returns for the attribute, so that each filter is a single
+    comparison, which vertex-centric indexes can serve. Attributes and values are
+    added to `bind_vars`, under names starting with `prefix`.
+    """
+    conditions = []
+    for i, (attribute, operator, text) in enumerate(filters):
+        if operator not in FILTER_OPERATORS:
+            raise BadQueryArgument("filter", operator, FILTER_OPERATORS)
+
+        name = f"{prefix}{i}"
+        value = filter_value(text, stored_type(attribute))
+        bind_vars.update({name: attribute, f"{name}_value": value})
+        conditions.append(f"{doc}[@{name}] {operator} @{name}_value")
+
+    return conditions
+
 
 class Graph:
     """Graphs link data between tables in Multinet."""
 
-    def __init__(self, name: str, workspace: str, handle: ArangoGraph, aql: AQL):
+    def __init__(
+        self,
+        name: str,
+        workspace: str,
+        handle: ArangoGraph,
+        aql: AQL,
+        definition: GraphDefinition,
+    ):
         """
         Initialize all Graph parameters, but make no requests.
 
@@ -27,47 +178,661 @@ class Graph:
 
         The `aql` parameter is the AQL handle of the creating Workspace, so that this
         class may make AQL requests when necessary.
+
+        The `definition` parameter describes the tables of the graph, as cached by
+        the creating Workspace.
         """
         self.name = name
         self.workspace = workspace
         self.handle = handle
         self.aql = aql
+        self.definition = definition
 
     def nodes(
-        self, offset: Optional[int] = None, limit: Optional[int] = None
+        self,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
     ) -> Dict[str, Any]:
-        """Return nodes in this graph."""
-        coll_names = self.handle.vertex_collections()
+        """
+        Return nodes in this graph.
+
+        The node tables are treated as a single sequence, in table name order, to
+        which `offset` and `limit` are applied. If `sort` is given, nodes are
+        ordered by that attribute instead; each table contributes its first nodes
+        in that order, which is an index scan for indexed attributes such as the
+        degree attributes (see `degree_attributes`).
+        """
+        tables = sorted(self.node_tables())
+        if not tables:
+            return {"count": 0, "nodes": []}
+
+        # Collection lengths are read from collection metadata, without a scan
+        table_binds = table_bind_vars(tables)
+        lengths = ", ".join(f"LENGTH(@@table{i})" for i in range(len(tables)))
+        counts: List[int] = next(
+            self.aql.execute(f"RETURN [{lengths}]", bind_vars=table_binds)
+        )
+
+        # AQL requires LIMIT values to be known before execution, so the global
+        # window is split into a window for each table here.
+        start = offset or 0
+        end = sum(counts) if limit is None else start + limit
+
+        if sort is not None:
+            order = "DESC" if descending else "ASC"
+            sorted_subqueries = ", ".join(
+                f"(FOR n IN @@table{i} SORT n[@sort] {order} LIMIT @end RETURN n)"
+                for i in range(len(tables))
+            )
+            query = f"""
+            FOR node IN FLATTEN([{sorted_subqueries}])
+                SORT node[@sort] {order}
+                LIMIT @offset, @limit
+                RETURN node
+            """
+            sort_binds = {
+                **table_binds,
+                "sort": sort,
+                "end": end,
+                "offset": start,
+                "limit": max(end - start, 0),
+            }
+            sorted_nodes = list(self.aql.execute(query, bind_vars=sort_binds))
 
-        result_set_size = 0
-        query_size = 0
-        total_nodes = []
+            return {"count": sum(counts), "nodes": sorted_nodes}
 
-        for coll_name in coll_names:
-            coll = self.handle.vertex_collection(coll_name)
-            result_set_size += coll.all().count()
+        subqueries = []
+        bind_vars: Dict[str, Any] = {}
+        table_start = 0
+        for i, (table, count) in enumerate(zip(tables, counts)):
+            table_offset = max(start - table_start, 0)
+            table_limit = min(end - table_start, count) - table_offset
+            table_start += count
 
-            if limit is None or query_size < limit:
-                remaining_limit = min(limit, limit - query_size) if limit else None
-                cur = coll.all(skip=offset, limit=remaining_limit)
+            if table_limit <= 0:
+                continue
 
-                query_size += cur.count()
-                total_nodes.extend(list(cur))
+            subqueries.append(
+                f"(FOR n IN @@table{i} LIMIT @offset{i}, @limit{i} RETURN n)"
+            )
+            bind_vars.update(
+                {
+                    f"@table{i}": table,
+                    f"offset{i}": table_offset,
+                    f"limit{i}": table_limit,
+                }
+            )
 
-        # Because we're embedding a list in a dictionary, we can't take full advantage
-        # of cursors. If this isn't required in the future, this may be more efficient
-        return {"count": result_set_size, "nodes": list(total_nodes)}
+        nodes: List[Dict] = []
+        if subqueries:
+            query = f"FOR node IN FLATTEN([{', '.join(subqueries)}]) RETURN node"
+            nodes = list(self.aql.execute(query, bind_vars=bind_vars))
+
+        return {"count": sum(counts), "nodes": nodes}
+
+    def update_degrees(self, node_ids: Optional[Iterable[str]] = None) -> None:
+        """
+        Store the in-degree, out-degree and total degree of nodes as attributes.
+
+        Degrees of all nodes are updated, or only those of `node_ids` if given.
+        Each node's edges are counted through the edge index, one node table per
+        query, and the degree attributes are indexed so that sorting nodes by
+        degree is an index scan. The attributes are those of
+        `degree_attributes`, so each graph sharing a node table keeps its own.
+        """
+        # Maps each node table to the keys to update, or `None` for all rows
+        keys_by_table: Dict[str, Optional[List[str]]] = dict.fromkeys(
+            self.node_tables()
+        )
+        if node_ids is not None:
+            selected: Dict[str, List[str]] = {}
+            for node_id in node_ids:
+                table, key = node_id.split("/", 1)
+                selected.setdefault(table, []).append(key)
+
+            keys_by_table = dict(selected)
+
+        query = """
+        FOR n IN @@table
+            {selection}
+            LET in_degree = LENGTH(FOR e IN @@edges FILTER e._to == n._id RETURN 1)
+            LET out_degree = LENGTH(FOR e IN @@edges FILTER e._from == n._id RETURN 1)
+            UPDATE n WITH {{
+                [@in_degree]: in_degree,
+                [@out_degree]: out_degree,
+                [@degree]: in_degree + out_degree
+            }} IN @@table
+        """
+
+        attributes = degree_attributes(self.name)
+        node_tables = set(self.node_tables())
+        for table, keys in keys_by_table.items():
+            if table not in node_tables:
+                continue
+
+            bind_vars: Dict[str, Any] = {
+                "@table": table,
+                "@edges": self.edge_table(),
+                **attributes,
+            }
+            selection = ""
+            if keys is not None:
+                selection = "FILTER n._key IN @keys"
+                bind_vars["keys"] = keys
+            else:
+                collection = self.handle.vertex_collection(table)
+                for attribute in attributes.values():
+                    collection.add_persistent_index([attribute])
+
+            self.aql.execute(query.format(selection=selection), bind_vars=bind_vars)
+
+    def delete_degrees(self) -> None:
+        """Remove the degree attributes of this graph, and their indexes."""
+        attributes = list(degree_attributes(self.name).values())
+        for table in self.node_tables():
+            collection = self.handle.vertex_collection(table)
+            for index in collection.indexes():
+                if index["type"] == "persistent" and index["fields"][0] in attributes:
+                    collection.delete_index(index["id"])
+
+            self.aql.execute(
+                """
+                FOR n IN @@table
+                    UPDATE n WITH ZIP(@attributes, @nulls) IN @@table
+                    OPTIONS {keepNull: false}
+                """,
+                bind_vars={
+                    "@table": table,
+                    "attributes": attributes,
+                    "nulls": [None] * len(attributes),
+                },
+            )
+
+    def stored_type(self, table: str, attribute: str) -> Optional[str]:
+        """
+        Return the AQL type name of the values of `attribute` in the table `table`.
 
-    def node_tables(self) -> Iterable[str]:
+        The type is read from the first row that has the attribute, so attributes
+        are assumed to hold values of a single type, as uploaded tables do. Returns
+        `None` if no row has the attribute.
+        """
+        query = """
+        FOR doc IN @@table
+            FILTER HAS(doc, @attribute)
+            LIMIT 1
+            RETURN TYPENAME(doc[@attribute])
+        """
+        bind_vars = {"@table": table, "attribute": attribute}
+
+        return next(self.aql.execute(query, bind_vars=bind_vars), None)
+
+    def node_tables(self) -> List[str]:
         """Return all node tables in this graph."""
-        return self.handle.vertex_collections()
+        return self.definition["node_tables"]
+
+    def node_ids(self) -> Iterator[str]:
+        """Stream the IDs of all nodes in this graph, one node table at a time."""
+        return itertools.chain.from_iterable(
+            self.aql.execute(
+                "FOR n IN @@table RETURN n._id",
+                bind_vars={"@table": table},
+                batch_size=10000,
+                stream=True,
+            )
+            for table in sorted(self.node_tables())
+        )
 
     def edge_table(self) -> str:
         """Return the edge table of this graph."""
-        edge_defs = self.handle.edge_definitions()
+        return self.definition["edge_table"]
+
+    def revisions(self) -> Tuple[Tuple[str, str], ...]:
+        """Return the name and current revision of each table in this graph."""
+        tables = [self.edge_table(), *sorted(self.node_tables())]
+        return tuple(
+            (table, self.handle.vertex_collection(table).revision()) for table in tables
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return summary statistics of this graph.
+
+        Counts and the degree distribution are aggregated within the database.
+        Connected components are computed from an in-memory snapshot of the edges.
+        Results are cached until any table in the graph changes.
+        """
+        key = (self.workspace, self.name)
+        revisions = self.revisions()
+
+        cached = stats_cache.get(key, revisions)
+        if cached is not None:
+            return cached
+
+        edge_table = self.edge_table()
+        node_tables = sorted(self.node_tables())
+        table_binds = table_bind_vars(node_tables)
+        node_counts = ", ".join(
+            f"{{table: @table{i}_name, count: LENGTH(@@table{i})}}"
+            for i in range(len(node_tables))
+        )
+
+        query = f"""
+        LET degrees = (
+            FOR e IN @@edges
+                FOR id IN [e._from, e._to]
+                    COLLECT node = id WITH COUNT INTO degree
+                    RETURN degree
+        )
+
+        RETURN {{
+            "node_tables": [{node_counts}],
+            "edge_count": LENGTH(@@edges),
+            "self_loops": FIRST(
+                FOR e IN @@edges
+                    FILTER e._from == e._to
+                    COLLECT WITH COUNT INTO count
+                    RETURN count
+            ),
+            "multi_edges": FIRST(
+                FOR e IN @@edges
+                    COLLECT source = e._from, target = e._to WITH COUNT INTO count
+                    FILTER count > 1
+                    COLLECT AGGREGATE pairs = COUNT(1), edges = SUM(count)
+                    RETURN {{"pairs": pairs, "edges": edges}}
+            ),
+            "connected_nodes": LENGTH(degrees),
+            "degree_distribution": (
+                FOR degree IN degrees
+                    COLLECT value = degree WITH COUNT INTO count
+                    SORT value
+                    RETURN [value, count]
+            )
+        }}
+        """
+
+        bind_vars: Dict[str, Any] = {"@edges": edge_table, **table_binds}
+        bind_vars.update({f"table{i}_name": t for i, t in enumerate(node_tables)})
+        aggregates = next(self.aql.execute(query, bind_vars=bind_vars))
+
+        node_count = sum(table["count"] for table in aggregates["node_tables"])
+        edge_count = aggregates["edge_count"]
+
+        # Nodes without any edges don't appear in the aggregated degrees
+        isolated = max(node_count - aggregates["connected_nodes"], 0)
+        distribution = aggregates["degree_distribution"]
+        if isolated:
+            distribution.insert(0, [0, isolated])
+
+        # Each isolated node is a component of its own
+        snapshot = self.load_snapshot()
+        sizes = np.bincount(snapshot.components())
+        component_sizes = sorted(sizes.tolist(), reverse=True) + [1] * isolated
+
+        possible_edges = node_count * (node_count - 1)
+
+        stats = {
+            "node_count": node_count,
+            "edge_count": edge_count,
+            "node_tables": {
+                table["table"]: table["count"] for table in aggregates["node_tables"]
+            },
+            "edge_table": {edge_table: edge_count},
+            "density": edge_count / possible_edges if possible_edges else 0,
+            "self_loops": aggregates["self_loops"],
+            "multi_edges": aggregates["multi_edges"] or {"pairs": 0, "edges": 0},
+            "degree": {
+                "min": distribution[0][0] if distribution else 0,
+                "max": distribution[-1][0] if distribution else 0,
+                "mean": 2 * edge_count / node_count if node_count else 0,
+                "distribution": distribution,
+            },
+            "components": {
+                "count": len(component_sizes),
+                "largest": component_sizes[0] if component_sizes else 0,
+                "isolated_nodes": isolated,
+                "sizes": component_sizes[:MAX_COMPONENT_SIZES],
+            },
+        }
+
+        stats_cache.set(key, revisions, stats)
+        return stats
+
+    def sample(
+        self,
+        strategy: SampleStrategy,
+        size: int,
+        seed: Optional[int] = None,
+        start: Optional[List[str]] = None,
+        burn: float = 0.7,
+        restart: float = 0.15,
+        edge_limit: int = MAX_SAMPLE_EDGES,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Return a random sample of this graph, using the sampling `strategy`.
+
+        The "random_edge" strategy samples `size` edges uniformly, along with their
+        endpoints. The other strategies select `size` nodes, and return the subgraph
+        they induce, up to `edge_limit` edges:
+
+        - "random_node" samples nodes uniformly
+        - "snowball" and "forest_fire" spread outward from the `start` nodes, with
+          forest fires following each edge with probability `burn`
+        - "random_walk" walks from a `start` node, returning to it with
+          probability `restart` at each step
+
+        Passing the same `seed` produces the same sample, as long as the graph is
+        unchanged.
+        """
+        rng = random.Random(seed)
+        size = min(size, MAX_SAMPLE_NODES)
+        edge_table = self.edge_table()
+
+        if strategy == "random_edge":
+            edge_keys = self.aql.execute(
+                "FOR e IN @@edges RETURN e._key",
+                bind_vars={"@edges": edge_table},
+                batch_size=10000,
+                stream=True,
+            )
+            _, keys = util.reservoir_sample(edge_keys, min(size, edge_limit), rng)
+
+            edges = list(
+                self.aql.execute(
+                    "FOR e IN @@edges FILTER e._key IN @keys RETURN UNSET(e, '_rev')",
+                    bind_vars={"@edges": edge_table, "keys": keys},
+                )
+            )
+            endpoints = (node_id for e in edges for node_id in (e["_from"], e["_to"]))
+            node_ids = list(dict.fromkeys(endpoints))
+
+            return {"nodes": self._node_documents(node_ids), "edges": edges}
+
+        if strategy == "random_node":
+            _, node_ids = util.reservoir_sample(self.node_ids(), size, rng)
+        else:
+            for node_id in start or []:
+                self.node_attributes(*node_id.split("/", 1))
+
+            # Use a cached snapshot if there is one, but don't load the whole edge
+            # table just for a sample; otherwise look up the neighbors of the
+            # nodes reached so far with the edge index.
+            snapshot = self.snapshot()
+            adjacency = self.adjacent_ids if snapshot is None else snapshot.adjacent_ids
+            random_node = self.random_node_picker()
+            size = min(size, self.node_count())
+
+            if strategy == "random_walk":
+                node_ids = sampling.random_walk(
+                    start or [], size, restart, rng, adjacency, random_node
+                )
+            else:
+                spread = 1 if strategy == "snowball" else burn
+                node_ids = sampling.forest_fire(
+                    start or [], size, spread, rng, adjacency, random_node
+                )
+
+        query = """
+        FOR e IN @@edges
+            FILTER e._from IN @ids AND e._to IN @ids
+            LIMIT @edge_limit
+            RETURN UNSET(e, "_rev")
+        """
+        bind_vars = {
+            "@edges": edge_table,
+            "ids": node_ids,
+            "edge_limit": min(edge_limit, MAX_SAMPLE_EDGES),
+        }
+        edges = list(self.aql.execute(query, bind_vars=bind_vars))
+
+        return {"nodes": self._node_documents(node_ids), "edges": edges}
+
+    def adjacent_ids(self, node_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Return the IDs of the nodes adjacent to each of the nodes `node_ids`.
+
+        Adjacent nodes are listed with repetition, once for each connecting edge, in
+        either direction. Only the edges of the given nodes are read.
+        """
+        query = """
+        FOR id IN @ids
+            RETURN {
+                "id": id,
+                "adjacent": APPEND(
+                    (FOR e IN @@edges FILTER e._from == id RETURN e._to),
+                    (FOR e IN @@edges FILTER e._to == id RETURN e._from)
+                )
+            }
+        """
+        bind_vars = {"@edges": self.edge_table(), "ids": node_ids}
+
+        return {
+            row["id"]: row["adjacent"]
+            for row in self.aql.execute(query, bind_vars=bind_vars)
+        }
+
+    def node_count(self) -> int:
+        """Return the number of nodes in this graph."""
+        return sum(
+            self.handle.vertex_collection(table).count() for table in self.node_tables()
+        )
+
+    def random_node_picker(self) -> sampling.RandomNode:
+        """
+        Return a function that picks nodes of this graph uniformly at random.
+
+        Each pick reads a single node, at a random offset into a node table chosen
+        in proportion to its size, so nodes without edges can be picked too.
+        """
+        tables = sorted(self.node_tables())
+        counts = [self.handle.vertex_collection(table).count() for table in tables]
+        total = sum(counts)
+
+        def pick(rng: random.Random) -> Optional[str]:
+            if not total:
+                return None
+
+            offset = rng.randrange(total)
+            for table, count in zip(tables, counts):
+                if offset < count:
+                    break
+
+                offset -= count
+
+            cursor = self.aql.execute(
+                "FOR n IN @@table SORT n._key LIMIT @offset, 1 RETURN n._id",
+                bind_vars={"@table": table, "offset": offset},
+            )
+            return next(cursor, None)
+
+        return pick
+
+    def _node_documents(self, node_ids: List[str]) -> List[Dict]:
+        """Return the documents of the nodes `node_ids`, in order."""
+        attributes = self.batch_node_attributes(node_ids)
+        return [doc for doc in (attributes[i] for i in node_ids) if doc is not None]
+
+    def aggregate(self, by: str, weight: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return the graph of groups of nodes sharing a value of the attribute `by`.
+
+        Each group lists the number of its nodes, and each edge between groups the
+        number of edges between their nodes and, if `weight` is given, the sum of
+        that attribute over them. Nodes without the attribute form a `None` group.
+        Only the `MAX_AGGREGATE_GROUPS` edges between groups with the most edges
+        are returned, and `edges_truncated` reports whether any were left out.
+        Results are cached until any table in the graph changes.
+        """
+        key = (self.workspace, self.name, by, weight)
+        revisions = self.revisions()
 
-        # Multinet graphs have just one edge definition.
-        return edge_defs[0]["edge_collection"]
+        cached = aggregate_cache.get(key, revisions)
+        if cached is not None:
+            return cached
+
+        tables = sorted(self.node_tables())
+        table_binds = table_bind_vars(tables)
+        table_groups = ", ".join(
+            f"""(
+                FOR n IN @@table{i}
+                    COLLECT value = n[@by] WITH COUNT INTO count
+                    RETURN {{"group": value, "count": count}}
+            )"""
+            for i in range(len(tables))
+        )
+
+        groups_query = f"""
+        FOR g IN FLATTEN([{table_groups}])
+            COLLECT value = g.group AGGREGATE count = SUM(g.count)
+            SORT count DESC
+            LIMIT @limit
+            RETURN {{"group": value, "count": count}}
+        """
+        bind_vars: Dict[str, Any] = {
+            "by": by,
+            "limit": MAX_AGGREGATE_GROUPS + 1,
+            **table_binds,
+        }
+        groups = list(self.aql.execute(groups_query, bind_vars=bind_vars))
+
+        if len(groups) > MAX_AGGREGATE_GROUPS:
+            raise BadQueryArgument(
+                "by", by, [f"attributes with at most {MAX_AGGREGATE_GROUPS} values"]
+            )
+
+        aggregates = "count = COUNT(1)"
+        result = '"count": count'
+        bind_vars = {
+            "@edges": self.edge_table(),
+            "by": by,
+            "limit": MAX_AGGREGATE_GROUPS + 1,
+        }
+        if weight is not None:
+            aggregates += ", weight = SUM(e[@weight])"
+            result += ', "weight": weight'
+            bind_vars["weight"] = weight
+
+        # Each endpoint is joined to its node by primary key
+        edges_query = f"""
+        FOR e IN @@edges
+            COLLECT source = DOCUMENT(e._from)[@by], target = DOCUMENT(e._to)[@by]
+            AGGREGATE {aggregates}
+            SORT count DESC
+            LIMIT @limit
+            RETURN {{"source": source, "target": target, {result}}}
+        """
+        edges = list(self.aql.execute(edges_query, bind_vars=bind_vars))
+
+        aggregated = {
+            "by": by,
+            "nodes": groups,
+            "edges": edges[:MAX_AGGREGATE_GROUPS],
+            "edges_truncated": len(edges) > MAX_AGGREGATE_GROUPS,
+        }
+        aggregate_cache.set(key, revisions, aggregated)
+
+        return aggregated
+
+    def snapshot(self) -> Optional[GraphSnapshot]:
+        """
+        Return an in-memory snapshot of this graph's edges, if it can be cached.
+
+        The snapshot is shared between requests, and reloaded whenever the edge
+        table changes. Returns `None` if snapshots are disabled, or this graph is
+        known, or estimated from its edge count, to be too large to cache.
+        """
+        if not snapshot_cache.enabled():
+            return None
+
+        key = (self.workspace, self.name)
+        edge_table = self.edge_table()
+        edges = self.handle.edge_collection(edge_table)
+        revision = edges.revision()
+
+        snapshot = snapshot_cache.get(key, revision)
+        if snapshot is None and snapshot_cache.admits(key, revision, edges.count()):
+            # A snapshot that turns out too large is still used for this call
+            snapshot = GraphSnapshot.load(self.aql, edge_table, revision)
+            snapshot_cache.put(key, snapshot)
+
+        return snapshot
+
+    def load_snapshot(self) -> GraphSnapshot:
+        """
+        Return an in-memory snapshot of this graph's edges, cached or not.
+
+        The edge table is read at most once, whether or not the snapshot can be
+        cached.
+        """
+        snapshot = self.snapshot()
+        if snapshot is None:
+            edge_table = self.edge_table()
+            revision = self.handle.edge_collection(edge_table).revision()
+            snapshot = GraphSnapshot.load(self.aql, edge_table, revision)
+
+        return snapshot
+
+    def node_degree(
+        self, table: str, node: str, direction: EdgeDirection = "all"
+    ) -> int:
+        """Return the number of edges of the node `node` from table `table`."""
+        node_id = f"{table}/{node}"
+
+        # Raises an error if the node doesn't exist
+        self.node_attributes(table, node)
+
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return snapshot.degree(node_id, direction)
+
+        query_direction = traversal_direction(direction)
+        query = f"""
+        FOR v IN 1..1 {query_direction} @node GRAPH @graph
+            COLLECT WITH COUNT INTO count
+            RETURN count
+        """
+
+        bind_vars = {"node": node_id, "graph": self.name}
+        return next(self.aql.execute(query, bind_vars=bind_vars))
+
+    def node_neighbors(
+        self,
+        table: str,
+        node: str,
+        depth: int = 1,
+        direction: EdgeDirection = "all",
+        limit: int = MAX_NEIGHBORHOOD_NODES,
+    ) -> List[str]:
+        """
+        Return the IDs of the nodes within `depth` hops of the node `node`.
+
+        Nodes are returned in breadth first order, without repetition, and not
+        including the node itself.
+        """
+        node_id = f"{table}/{node}"
+        limit = min(limit, MAX_NEIGHBORHOOD_NODES)
+
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return snapshot.neighbors(node_id, depth, direction, limit)
+
+        query_direction = traversal_direction(direction)
+        query = f"""
+        FOR v IN 1..@depth {query_direction} @node GRAPH @graph
+            OPTIONS {{bfs: true, uniqueVertices: "global"}}
+            FILTER v._id != @node
+            LIMIT @limit
+            RETURN v._id
+        """
+
+        bind_vars = {
+            "depth": depth,
+            "node": node_id,
+            "graph": self.name,
+            "limit": limit,
+        }
+        return list(self.aql.execute(query, bind_vars=bind_vars))
 
     def node_attributes(self, table: str, node: str) -> Dict:
         """Return the attributes of the document with an ID of `table`/`node`."""
@@ -86,45 +851,307 @@ class Graph:
 
         return res
 
+    def batch_node_attributes(self, node_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Return the attributes of many nodes, given their IDs.
+
+        The nodes are fetched with one request per node table. Nodes that don't
+        exist are mapped to `None`.
+        """
+        keys_by_table: Dict[str, List[str]] = {}
+        for node_id in node_ids:
+            table, key = node_id.split("/", 1)
+            keys_by_table.setdefault(table, []).append(key)
+
+        node_tables = set(self.node_tables())
+        attributes: Dict[str, Optional[Dict]] = dict.fromkeys(node_ids)
+        for table, keys in keys_by_table.items():
+            if table not in node_tables:
+                raise TableNotFound(self.workspace, table)
+
+            for doc in self.handle.vertex_collection(table).get_many(keys):
+                doc.pop("_rev", None)
+                attributes[doc["_id"]] = doc
+
+        return attributes
+
+    def batch_node_edges(
+        self,
+        node_ids: List[str],
+        direction: EdgeDirection = "all",
+        offset: int = 0,
+        limit: int = 30,
+    ) -> Dict[str, Dict]:
+        """
+        Return the edges of many nodes, given their IDs, in a single query.
+
+        The `offset` and `limit` are applied to the edges of each node separately.
+        """
+        edges = EDGES_TEMPLATE.format(
+            filter=edge_filter(direction, node="id"), sort="", expansions=""
+        )
+        query = f"""
+        FOR id IN @ids
+            {edges}
+            RETURN {{"node": id, "count": count, "edges": edges}}
+        """
+
+        bind_vars = {
+            "ids": node_ids,
+            "@edges": self.edge_table(),
+            "offset": offset,
+            "limit": limit,
+        }
+
+        return {
+            result["node"]: {"count": result["count"], "edges": result["edges"]}
+            for result in self.aql.execute(query, bind_vars=bind_vars)
+        }
+
     def node_edges(
         self,
         table: str,
         node: str,
         direction: EdgeDirection = "all",
-        offset: Optional[int] = None,
-        limit: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 30,
+        expand: Iterable[str] = (),
+        fields: Optional[List[str]] = None,
+        filters: Iterable[Tuple[str, str, str]] = (),
+        sort: Optional[str] = None,
+        descending: bool = False,
     ) -> Dict:
-        """Return the edges of the node `node` from table `table`."""
-        node_id = f"{table}/{node}"
+        """
+        Return the edges of the node `node` from table `table`.
+
+        Only edges matching every one of `filters`, given as (attribute, operator,
+        value) triples, are returned and counted. If `sort` is given, edges are
+        ordered by that attribute. Vertex-centric indexes on the filtered or sorted
+        attribute (see `Table.add_vertex_centric_indexes`) keep these queries fast
+        for nodes with many edges.
+
+        If `expand` contains "neighbors", each edge includes the document of the
+        node at its other end, and if it contains "edges", the edge document itself.
+        These documents are fetched in the same query, and are limited to the
+        attributes `fields` (along with their identifying attributes), if given.
+        """
+        query_filter = edge_filter(direction)
+        bind_vars: Dict[str, Any] = {
+            "node": f"{table}/{node}",
+            "@edges": self.edge_table(),
+            "offset": offset,
+            "limit": limit,
+        }
+
         edge_table = self.edge_table()
+        conditions = attribute_filters(
+            "e",
+            filters,
+            bind_vars,
+            lambda attribute: self.stored_type(edge_table, attribute),
+        )
+        if conditions:
+            query_filter = " AND ".join([f"({query_filter})", *conditions])
+
+        sort_clause = ""
+        if sort is not None:
+            sort_clause = f"SORT e[@sort] {'DESC' if descending else 'ASC'}"
+            bind_vars["sort"] = sort
+
+        def project(doc: str, keep: str) -> str:
+            if fields is None:
+                return f'UNSET({doc}, "_rev")'
+
+            bind_vars["fields"] = fields
+            return f"KEEP({doc}, APPEND({keep}, @fields))"
 
-        query_direction = edge_direction_map[direction]
-        if query_direction == "inbound":
-            query_filter = f'e._to == "{node_id}"'
-        elif query_direction == "outbound":
-            query_filter = f'e._from == "{node_id}"'
-        elif query_direction == "all":
-            query_filter = f'e._from == "{node_id}" || e._to == "{node_id}"'
+        expansions = ""
+        if "neighbors" in expand:
+            neighbor = project(
+                "DOCUMENT(e._from == @node ? e._to : e._from)", '["_id", "_key"]'
+            )
+            expansions += f', "neighbor": {neighbor}'
 
+        if "edges" in expand:
+            edge_data = project("e", '["_id", "_key", "_from", "_to"]')
+            expansions += f', "edge_data": {edge_data}'
+
+        edges = EDGES_TEMPLATE.format(
+            filter=query_filter, sort=sort_clause, expansions=expansions
+        )
         query = f"""
-        FOR e IN {edge_table}
-            FILTER {query_filter}
-            LIMIT {offset}, {limit}
-            RETURN {{
-                "edge": e._id,
-                "from": e._from,
-                "to": e._to
-            }}
+        {edges}
+        RETURN {{"count": count, "edges": edges}}
         """
 
-        count_query = f"""
-        FOR e IN {edge_table}
-            FILTER {query_filter}
-            COLLECT WITH COUNT INTO count
-            RETURN count
+        return next(self.aql.execute(query, bind_vars=bind_vars))
+
+    def neighborhood(
+        self,
+        table: str,
+        node: str,
+        depth: int = 1,
+        direction: EdgeDirection = "all",
+        node_limit: int = MAX_NEIGHBORHOOD_NODES,
+        edge_limit: int = MAX_NEIGHBORHOOD_EDGES,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Return the subgraph within `depth` hops of the node `node` from table `table`.
+
+        Nodes are discovered breadth first, visiting each node once, until
+        `node_limit` nodes have been found. All edges between the discovered nodes
+        are returned, up to `edge_limit` edges.
+        """
+        node_id = f"{table}/{node}"
+
+        # Raises an error if the starting node doesn't exist
+        self.node_attributes(table, node)
+
+        query_direction = traversal_direction(direction)
+        query = f"""
+        LET nodes = (
+            FOR v IN 0..@depth {query_direction} @node GRAPH @graph
+                OPTIONS {{bfs: true, uniqueVertices: "global"}}
+                LIMIT @node_limit
+                RETURN UNSET(v, "_rev")
+        )
+
+        LET ids = nodes[*]._id
+        LET edges = (
+            FOR e IN @@edges
+                FILTER e._from IN ids AND e._to IN ids
+                LIMIT @edge_limit
+                RETURN UNSET(e, "_rev")
+        )
+
+        RETURN {{"nodes": nodes, "edges": edges}}
+        """
+
+        bind_vars = {
+            "depth": depth,
+            "node": node_id,
+            "graph": self.name,
+            "@edges": self.edge_table(),
+            "node_limit": min(node_limit, MAX_NEIGHBORHOOD_NODES),
+            "edge_limit": min(edge_limit, MAX_NEIGHBORHOOD_EDGES),
+        }
+
+        return next(self.aql.execute(query, bind_vars=bind_vars))
+
+    def subgraph(
+        self, predicates: Dict[str, List[Tuple[str, str, str]]]
+    ) -> Dict[str, Iterator[Dict]]:
+        """
+        Return the subgraph induced by the nodes matching `predicates`.
+
+        `predicates` maps node tables to (attribute, operator, value) filters, all
+        of which a node must match; tables without predicates are included whole.
+        The edges between selected nodes are found with `induced_edges`. Nodes and
+        edges are streamed, one table at a time.
+        """
+        node_tables = sorted(self.node_tables())
+        for table in predicates:
+            if table not in node_tables:
+                raise TableNotFound(self.workspace, table)
+
+        def selection(table: str, suffix: str, bind_vars: Dict[str, Any]) -> str:
+            bind_vars[f"@table{suffix}"] = table
+            conditions = attribute_filters(
+                "n",
+                predicates.get(table, []),
+                bind_vars,
+                lambda attribute: self.stored_type(table, attribute),
+                f"filter{suffix}_",
+            )
+            where = f"FILTER {' AND '.join(conditions)}" if conditions else ""
+            return f"FOR n IN @@table{suffix} {where}"
+
+        def nodes() -> Iterator[Dict]:
+            for table in node_tables:
+                bind_vars: Dict[str, Any] = {}
+                query = f'{selection(table, "", bind_vars)} RETURN UNSET(n, "_rev")'
+                yield from self.aql.execute(
+                    query, bind_vars=bind_vars, batch_size=10000, stream=True
+                )
+
+        edge_bind_vars: Dict[str, Any] = {}
+        ids = ", ".join(
+            f"({selection(table, str(i), edge_bind_vars)} RETURN n._id)"
+            for i, table in enumerate(node_tables)
+        )
+
+        return {
+            "nodes": nodes(),
+            "edges": self.induced_edges(f"FLATTEN([{ids}])", edge_bind_vars),
+        }
+
+    def induced_edges(self, ids: str, bind_vars: Dict[str, Any]) -> Iterator[Dict]:
         """
+        Stream the edges between the nodes whose IDs the AQL expression `ids` gives.
 
-        query_cur = self.aql.execute(query)
-        count_cur = self.aql.execute(count_query)
+        `bind_vars` holds the bind parameters of `ids`. The edges are found with a
+        semi-join, looking up the edges of each node through the edge index, so
+        the edge table is never scanned.
+        """
+        # Selected node IDs are kept as object keys, for constant time lookups
+        query = f"""
+        LET ids = {ids}
+        LET selected = ZIP(ids, ids)
+
+        FOR id IN ids
+            FOR e IN @@edges
+                FILTER e._from == id AND HAS(selected, e._to)
+                RETURN UNSET(e, "_rev")
+        """
+        yield from self.aql.execute(
+            query,
+            bind_vars={**bind_vars, "@edges": self.edge_table()},
+            batch_size=10000,
+            stream=True,
+        )
+
+    def paths(
+        self,
+        source: str,
+        target: str,
+        direction: EdgeDirection = "outgoing",
+        k: int = 1,
+        weight: Optional[str] = None,
+    ) -> Cursor:
+        """
+        Return the `k` shortest paths from node ID `source` to node ID `target`.
+
+        If `weight` is given, the length of a path is the sum of that attribute on
+        its edges (defaulting to 1 where missing). Otherwise, it's the number of
+        edges. Paths are returned in order of length, as a streaming cursor.
+        """
+        for node_id in (source, target):
+            self.node_attributes(*node_id.split("/", 1))
+
+        bind_vars: Dict[str, Any] = {
+            "source": source,
+            "target": target,
+            "graph": self.name,
+            "k": min(k, MAX_PATHS),
+        }
+
+        options = ""
+        if weight is not None:
+            options = "OPTIONS {weightAttribute: @weight, defaultWeight: 1}"
+            bind_vars["weight"] = weight
+
+        query_direction = traversal_direction(direction)
+        query = f"""
+        FOR path IN {query_direction} K_SHORTEST_PATHS @source TO @target
+            GRAPH @graph {options}
+            LIMIT @k
+            RETURN {{
+                "vertices": path.vertices[*]._id,
+                "edges": path.edges[*]._id,
+                "weight": path.weight
+            }}
+        """
 
-        return {"count": next(count_cur), "edges": list(query_cur)}
+        return self.aql.execute(
+            query, bind_vars=bind_vars, stream=True, memory_limit=PATH_MEMORY_LIMIT
+        )
@@ -0,0 +1,212 @@
+"""Background jobs, and their status."""
+from __future__ import annotations  # noqa: T484
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+
+from multinet.db import job_collection
+from multinet.types import JobStatus
+
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Number of jobs run concurrently by each server process. Queued jobs wait for a
+# free worker, which bounds the memory used by jobs at any one time.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+
+executor = ThreadPoolExecutor(max_workers=JOB_WORKERS)
+
+# Seconds between the heartbeats of the queued and running jobs of each server
+# process, and the number of seconds without a heartbeat after which such a job
+# is considered to have died with its process, and failed
+JOB_HEARTBEAT_INTERVAL = int(os.environ.get("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_HEARTBEAT_TIMEOUT = int(os.environ.get("JOB_HEARTBEAT_TIMEOUT", "60"))
+
+# The keys of the jobs queued or running in this server process
+active_jobs: Set[str] = set()
+active_jobs_lock = threading.Lock()
+heartbeat_thread: Optional[threading.Thread] = None
+
+# A job's task receives the job, and returns its result
+Task = Callable[["Job"], Dict]
+
+
+def timestamp() -> str:
+    """Return the current UTC time, in ISO 8601 format."""
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def heartbeat() -> None:
+    """Record the heartbeat of each active job of this process, forever."""
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+        with active_jobs_lock:
+            keys = list(active_jobs)
+
+        now = timestamp()
+        for key in keys:
+            try:
+                job_collection().update({"_key": key, "heartbeat": now})
+            except Exception:
+                # A missed heartbeat is made up for by the next one
+                pass
+
+
+def start_heartbeat() -> None:
+    """Start the heartbeat thread of this process, unless it's running already."""
+    global heartbeat_thread
+
+    with active_jobs_lock:
+        if heartbeat_thread is None or not heartbeat_thread.is_alive():
+            heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+            heartbeat_thread.start()
+
+
+class Job:
+    """
+    A long running task, run in the background of a server process.
+
+    The status of each job is kept in the `jobs` collection, so that it can be
+    read by any server process. While a job is queued or running, its process
+    records a heartbeat every `JOB_HEARTBEAT_INTERVAL` seconds. Jobs whose
+    heartbeat is older than `JOB_HEARTBEAT_TIMEOUT` seconds, because their process
+    stopped, are marked as failed when next read.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        workspace: str,
+        kind: str,
+        params: Dict[str, Any],
+        status: JobStatus = "queued",
+        created: Optional[str] = None,
+        started: Optional[str] = None,
+        finished: Optional[str] = None,
+        result: Optional[Dict] = None,
+        error: Optional[str] = None,
+        heartbeat: Optional[str] = None,
+        **kwargs: Any,
+    ):
+        """
+        Construct a job object.
+
+        The `workspace` parameter is the internal name of the workspace the job
+        belongs to, and `kind` names the task the job runs, with parameters
+        `params`.
+        """
+        self.key = key
+        self.workspace = workspace
+        self.kind = kind
+        self.params = params
+        self.status = status
+        self.created = created or timestamp()
+        self.started = started
+        self.finished = finished
+        self.result = result
+        self.error = error
+        self.heartbeat = heartbeat or self.created
+
+    @staticmethod
+    def create(workspace: str, kind: str, params: Dict[str, Any]) -> Job:
+        """Save a new queued job, without starting it."""
+        job = Job(uuid4().hex, workspace, kind, params)
+        job_collection().insert(
+            {"_key": job.key, "workspace": workspace, **job.asdict()}
+        )
+
+        return job
+
+    @staticmethod
+    def submit(workspace: str, kind: str, params: Dict[str, Any], task: Task) -> Job:
+        """Save a new job, and queue `task` to run in the background."""
+        job = Job.create(workspace, kind, params)
+        job.start(task)
+
+        return job
+
+    @staticmethod
+    def load(doc: Dict) -> Job:
+        """Return the job stored in `doc`, failing it if its process has died."""
+        job = Job(key=doc["_key"], **doc)
+        if job.expired():
+            job.update(
+                status="failed",
+                finished=timestamp(),
+                error="The job stopped, along with the server process running it",
+            )
+
+        return job
+
+    @staticmethod
+    def get(workspace: str, key: str) -> Optional[Job]:
+        """
+        Return the job `key` of the workspace with internal name `workspace`.
+
+        Returns `None` if the workspace has no such job.
+        """
+        doc = job_collection().get(key)
+        if doc is None or doc["workspace"] != workspace:
+            return None
+
+        return Job.load(doc)
+
+    @staticmethod
+    def list(workspace: str) -> List[Job]:
+        """Return the jobs of the workspace with internal name `workspace`."""
+        docs = job_collection().find({"workspace": workspace})
+        jobs = [Job.load(doc) for doc in docs]
+
+        return sorted(jobs, key=lambda job: job.created, reverse=True)
+
+    def update(self, **fields: Any) -> None:
+        """Set `fields` on this job, and save them."""
+        self.__dict__.update(fields)
+        job_collection().update({"_key": self.key, **fields}, merge=False)
+
+    def active(self) -> bool:
+        """Return if this job is queued or running."""
+        return self.status in ("queued", "running")
+
+    def expired(self) -> bool:
+        """Return if this job is active, but its heartbeat has timed out."""
+        last_beat = datetime.fromisoformat(self.heartbeat.rstrip("Z"))
+        timeout = timedelta(seconds=JOB_HEARTBEAT_TIMEOUT)
+
+        return self.active() and datetime.utcnow() - last_beat > timeout
+
+    def start(self, task: Task) -> None:
+        """Queue `task` to run in the background, keeping this job's heartbeat."""
+        with active_jobs_lock:
+            active_jobs.add(self.key)
+
+        start_heartbeat()
+        executor.submit(self.run, task)
+
+    def delete(self) -> None:
+        """Delete this job, which must not have been started."""
+        job_collection().delete(self.key, ignore_missing=True)
+
+    def run(self, task: Task) -> None:
+        """Run `task`, recording its progress in this job."""
+        self.update(status="running", started=timestamp(), heartbeat=timestamp())
+
+        try:
+            result = task(self)
+        except Exception as e:
+            self.update(status="failed", finished=timestamp(), error=str(e))
+        else:
+            self.update(status="succeeded", finished=timestamp(), result=result)
+        finally:
+            with active_jobs_lock:
+                active_jobs.discard(self.key)
+
+    def asdict(self) -> Dict:
+        """Return this job as a dict, without the workspace it belongs to."""
+        job_dict = {k: v for k, v in self.__dict__.items() if k != "workspace"}
+        job_dict["id"] = job_dict.pop("key")
+
+        return job_dict
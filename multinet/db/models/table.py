@@ -1,13 +1,27 @@
 """Operations that deal with tables."""
 from __future__ import annotations  # noqa: T484
-from arango.collection import StandardCollection
+import random
+import re
+from arango.collection import Collection, StandardCollection
 from arango.aql import AQL
 
 from multinet import util
+from multinet.db import bulk
 from multinet.types import EdgeTableProperties
-from multinet.errors import ServerError, FlaskTuple
+from multinet.errors import ServerError, FlaskTuple, ValidationFailed
+from multinet.validation import ValidationFailure, NonNumericCoordinates
 
-from typing import List, Set, Dict, Iterable, Union, Optional
+from typing import List, Dict, Iterable, Union, Optional
+
+# Upper bound on the number of rows returned by a single sample request
+MAX_SAMPLE_ROWS = 10000
+
+# Strings that geo columns convert to numbers, in both Python and AQL syntax
+NUMBER_PATTERN = r"^\s*-?[0-9]+(\.[0-9]+)?([eE][-+]?[0-9]+)?\s*$"
+number_pattern = re.compile(NUMBER_PATTERN)
+
+# Number of example keys reported for columns with non-numeric coordinates
+MAX_INVALID_COORDINATE_KEYS = 10
 
 
 class NotAnEdgeTable(ServerError):
@@ -22,6 +36,59 @@ class NotAnEdgeTable(ServerError):
         return (self.table, "400 Not an Edge Table")
 
 
+def parse_coordinates(
+    table: str, rows: List[Dict], attributes: Dict[str, str]
+) -> List[Dict]:
+    """
+    Return `rows`, with the string values of their geo columns parsed as numbers.
+
+    Empty strings are dropped, so that those rows are left out of the geo index.
+    Raises a ValidationFailed error for strings that aren't numbers.
+    """
+    invalid: Dict[str, List[str]] = {}
+    parsed = []
+    for row in rows:
+        row = dict(row)
+        for attribute in (attributes["latitude"], attributes["longitude"]):
+            value = row.get(attribute)
+            if not isinstance(value, str):
+                continue
+
+            if number_pattern.match(value):
+                row[attribute] = float(value)
+            elif value.strip():
+                invalid.setdefault(attribute, []).append(row.get("_key", ""))
+            else:
+                del row[attribute]
+
+        parsed.append(row)
+
+    if invalid:
+        raise ValidationFailed(
+            [
+                NonNumericCoordinates(
+                    table=table,
+                    attribute=attribute,
+                    keys=keys[:MAX_INVALID_COORDINATE_KEYS],
+                    count=len(keys),
+                )
+                for attribute, keys in invalid.items()
+            ]
+        )
+
+    return parsed
+
+
+def geo_index_attributes(handle: Collection) -> Optional[Dict[str, str]]:
+    """Return the latitude and longitude attributes of a collection's geo index."""
+    for index in handle.indexes():
+        if index["type"] == "geo" and len(index["fields"]) == 2:
+            latitude, longitude = index["fields"]
+            return {"latitude": latitude, "longitude": longitude}
+
+    return None
+
+
 class Table:
     """Tables store tabular data, and are the root of all data storage in Multinet."""
 
@@ -49,6 +116,28 @@ class Table:
 
         return {"count": count, "rows": list(rows)}
 
+    def sample(self, n: int, seed: Optional[int] = None) -> Dict:
+        """
+        Return a uniform random sample of `n` rows from this table.
+
+        Only the row keys are streamed from the database, and a sample of them is
+        kept using reservoir sampling; the sampled rows are then fetched by key.
+        Passing the same `seed` produces the same sample, as long as the table is
+        unchanged.
+        """
+        rng = random.Random(seed)
+        cur = self.aql.execute(
+            "FOR doc IN @@table RETURN doc._key",
+            bind_vars={"@table": self.name},
+            batch_size=10000,
+            stream=True,
+        )
+
+        count, reservoir = util.reservoir_sample(cur, n, rng)
+
+        rows = self.handle.get_many(reservoir) if reservoir else []
+        return {"count": count, "rows": rows}
+
     def row(self, doc: Union[Dict, str]) -> Optional[Dict]:
         """Return a specific document, or `None` if not present."""
         return self.handle.get(doc)
@@ -57,6 +146,10 @@ class Table:
         """Return the number of rows in a table."""
         return self.handle.count()
 
+    def is_edge_table(self) -> bool:
+        """Return if this table is an edge table."""
+        return self.handle.properties()["edge"]
+
     def keys(self) -> Iterable[str]:
         """Return all the keys in a table."""
         return self.handle.keys()
@@ -77,49 +170,226 @@ class Table:
         self.handle.rename(new_name)
         self.name = new_name
 
-    def insert(self, rows: List[Dict]) -> List[Dict]:
+    def insert(
+        self,
+        rows: Iterable[Dict],
+        batch_size: int = bulk.BULK_BATCH_SIZE,
+        workers: int = bulk.BULK_WORKERS,
+        on_duplicate: Optional[str] = None,
+        progress: Optional[bulk.ProgressCallback] = None,
+    ) -> bulk.BulkResult:
         """
         Insert rows into this table.
 
-        Returns the metadata from the documents inserted.
+        The rows are inserted in batches of `batch_size`, over `workers` concurrent
+        requests. Rows whose key already exists are handled according to
+        `on_duplicate` (see `bulk.bulk_insert`). If given, `progress` is called with
+        the running totals after each batch.
+
+        Returns the number of documents created, and any errors encountered.
+        """
+        return bulk.bulk_insert(
+            self.handle,
+            rows,
+            batch_size=batch_size,
+            workers=workers,
+            on_duplicate=on_duplicate,
+            progress=progress,
+        )
+
+    def update_rows(
+        self,
+        rows: Iterable[Dict],
+        batch_size: int = bulk.BULK_BATCH_SIZE,
+        changed: Optional[bulk.ChangeCallback] = None,
+    ) -> bulk.MutationResult:
+        """
+        Merge partial rows into the existing rows of this table.
+
+        Each row is matched to an existing row by its `_key`. Rows are applied in
+        batches of `batch_size`. If given, `changed` is called for each updated
+        row (see `bulk.bulk_update`).
+        """
+        return bulk.bulk_update(
+            self.handle, rows, batch_size=batch_size, changed=changed
+        )
+
+    def delete_rows(
+        self,
+        keys: Iterable[str],
+        batch_size: int = bulk.BULK_BATCH_SIZE,
+        changed: Optional[bulk.ChangeCallback] = None,
+    ) -> bulk.MutationResult:
         """
-        return self.handle.insert_many(rows)
+        Delete the rows with the given keys, in batches of `batch_size`.
+
+        If given, `changed` is called for each deleted row (see `bulk.bulk_delete`).
+        """
+        return bulk.bulk_delete(
+            self.handle, keys, batch_size=batch_size, changed=changed
+        )
+
+    def endpoints(self, keys: Iterable[str]) -> List[str]:
+        """Return the `_from` and `_to` of the rows of this edge table with `keys`."""
+        query = """
+        FOR e IN @@edges
+            FILTER e._key IN @keys
+            FOR endpoint IN [e._from, e._to]
+                RETURN endpoint
+        """
+        bind_vars = {"@edges": self.name, "keys": list(keys)}
+
+        return list(self.aql.execute(query, bind_vars=bind_vars))
 
     def edge_properties(self) -> EdgeTableProperties:
         """
         Return extracted information about an edge table.
 
-        Extracts 3 pieces of data from an edge table.
+        Extracts 2 pieces of data from an edge table.
 
-        table_keys: A map of all referenced tables to the specific keys referenced.
         from_tables: A set containing the tables referenced in the _from column.
         to_tables: A set containing the tables referenced in the _to column.
 
-        Raises an InternalServerError if this table is not an edge table.
+        Raises a NotAnEdgeTable error if this table is not an edge table.
         """
-        props = self.handle.properties()
-        if not props["edge"]:
+        if not self.is_edge_table():
             raise NotAnEdgeTable(self.name)
 
-        edges = self.rows()["rows"]
-
-        tables_to_keys: Dict[str, Set[str]] = {}
-        from_tables = set()
-        to_tables = set()
-
-        for edge in edges:
-            from_node, to_node = edge["_from"].split("/"), edge["_to"].split("/")
-            from_tables.add(from_node[0])
-            to_tables.add(to_node[0])
+        # Only the distinct table names are returned, not the edges themselves
+        query = """
+        RETURN {
+            "from_tables": (
+                FOR e IN @@edges
+                    COLLECT coll = PARSE_IDENTIFIER(e._from).collection
+                    RETURN coll
+            ),
+            "to_tables": (
+                FOR e IN @@edges
+                    COLLECT coll = PARSE_IDENTIFIER(e._to).collection
+                    RETURN coll
+            )
+        }
+        """
 
-            for table, key in (from_node, to_node):
-                if table in tables_to_keys:
-                    tables_to_keys[table].add(key)
-                else:
-                    tables_to_keys[table] = {key}
+        cur = self.aql.execute(query, bind_vars={"@edges": self.name})
+        tables = next(cur)
 
         return {
-            "table_keys": tables_to_keys,
-            "from_tables": from_tables,
-            "to_tables": to_tables,
+            "from_tables": set(tables["from_tables"]),
+            "to_tables": set(tables["to_tables"]),
         }
+
+    def add_vertex_centric_indexes(self, attribute: str) -> List[Dict]:
+        """
+        Index the edges of this table by each endpoint, along with `attribute`.
+
+        These vertex-centric indexes let queries filter or sort the edges of a
+        single node by `attribute` using the index alone. Indexes that already
+        exist are returned as they are.
+        """
+        if not self.is_edge_table():
+            raise NotAnEdgeTable(self.name)
+
+        return [
+            self.handle.add_persistent_index([endpoint, attribute])
+            for endpoint in ("_from", "_to")
+        ]
+
+    def add_geo_index(self, latitude: str, longitude: str) -> Dict:
+        """
+        Declare the attributes `latitude` and `longitude` as this table's location.
+
+        The declaration is a geo index on the two attributes, which makes
+        bounding box, radius and nearest neighbor queries on the rows index
+        lookups. The geo index only covers numbers, so strings, such as those of
+        uploaded CSV files, are first converted to numbers, with empty strings
+        removed. If any string isn't a number, a ValidationFailed error is
+        raised and the table is left unchanged. Rows without valid coordinates
+        are left out of the index.
+        """
+        attributes = [latitude, longitude]
+        bind_vars = {"@table": self.name, "attributes": attributes}
+
+        invalid_query = """
+        FOR attribute IN @attributes
+            LET keys = (
+                FOR n IN @@table
+                    LET value = n[attribute]
+                    FILTER IS_STRING(value) AND TRIM(value) != ""
+                    FILTER NOT REGEX_TEST(value, @pattern)
+                    RETURN n._key
+            )
+            FILTER LENGTH(keys) > 0
+            RETURN {"attribute": attribute, "keys": keys}
+        """
+        errors: List[ValidationFailure] = [
+            NonNumericCoordinates(
+                table=self.name,
+                attribute=invalid["attribute"],
+                keys=invalid["keys"][:MAX_INVALID_COORDINATE_KEYS],
+                count=len(invalid["keys"]),
+            )
+            for invalid in self.aql.execute(
+                invalid_query, bind_vars={**bind_vars, "pattern": NUMBER_PATTERN}
+            )
+        ]
+        if errors:
+            raise ValidationFailed(errors)
+
+        convert_query = """
+        FOR n IN @@table
+            FILTER IS_STRING(n[@attributes[0]]) OR IS_STRING(n[@attributes[1]])
+            UPDATE n WITH ZIP(
+                @attributes,
+                (
+                    FOR attribute IN @attributes
+                        LET value = n[attribute]
+                        RETURN IS_STRING(value)
+                            ? (TRIM(value) == "" ? null : TO_NUMBER(TRIM(value)))
+                            : value
+                )
+            ) IN @@table
+            OPTIONS {keepNull: false}
+        """
+        self.aql.execute(convert_query, bind_vars=bind_vars)
+
+        return self.handle.add_geo_index(attributes)
+
+    def geo_attributes(self) -> Optional[Dict[str, str]]:
+        """Return the latitude and longitude attributes of this table, if declared."""
+        return geo_index_attributes(self.handle)
+
+    def undefined_references(self, table: str, limit: int) -> Dict:
+        """
+        Return the keys of `table` referenced by this edge table that don't exist.
+
+        The check is performed as an anti-join within the database, so only the
+        dangling references are transferred. The undefined keys are counted in the
+        database, and at most `limit` example keys are returned along with that
+        count.
+        """
+        dangling = """
+        FOR e IN @@edges
+            FOR id IN [e._from, e._to]
+                LET ref = PARSE_IDENTIFIER(id)
+                FILTER ref.collection == @table
+                FILTER LENGTH(
+                    FOR n IN @@nodes
+                        FILTER n._key == ref.key
+                        LIMIT 1
+                        RETURN 1
+                ) == 0
+                COLLECT key = ref.key
+        """
+        bind_vars = {"@edges": self.name, "@nodes": table, "table": table}
+
+        count = self.aql.execute(
+            f"{dangling} COLLECT WITH COUNT INTO count RETURN count",
+            bind_vars=bind_vars,
+        )
+        keys = self.aql.execute(
+            f"{dangling} LIMIT @limit RETURN key",
+            bind_vars={**bind_vars, "limit": limit},
+        )
+
+        return {"count": next(count), "keys": list(keys)}
@@ -7,8 +7,13 @@ from arango.exceptions import DatabaseCreateError, EdgeDefinitionCreateError
 from arango.cursor import Cursor
 
 from multinet import util
-from multinet.types import EdgeTableProperties, TableType
-from multinet.validation import ValidationFailure, UndefinedTable, UndefinedKeys
+from multinet.types import EdgeTableProperties, GraphDefinition, TableType
+from multinet.validation import (
+    ValidationFailure,
+    AttributeConflict,
+    UndefinedTable,
+    UndefinedKeys,
+)
 from multinet.validation.csv import validate_csv
 from multinet.db import (
     workspace_mapping,
@@ -26,11 +31,15 @@ from multinet.errors import (
     TableNotFound,
     GraphCreationError,
 )
+from multinet.db.cache import graph_definitions
+from multinet.db.layout import delete_layouts
+from multinet.db.snapshot import snapshot_cache
+from multinet.db.temporal import delete_time_attributes
 from multinet.db.models.user import User
-from multinet.db.models.graph import Graph
+from multinet.db.models.graph import Graph, degree_attributes
 from multinet.db.models.table import Table
 
-from typing import Any, List, Dict, Generator, Optional
+from typing import Any, List, Dict, Generator, Iterable, Optional
 
 
 class WorkspacePermissions(BaseModel):
@@ -198,39 +207,85 @@ class Workspace:
         """Return the graphs in this workspace."""
         return self.readonly_handle.graphs()
 
+    def graph_definitions(self) -> Dict[str, GraphDefinition]:
+        """
+        Return the definition of each graph in this workspace, by graph name.
+
+        Definitions are cached, and only reloaded once the `_graphs` system
+        collection, where ArangoDB stores them, has changed.
+        """
+
+        def revision() -> str:
+            return self.readonly_handle.collection("_graphs").revision()
+
+        def load() -> Dict[str, GraphDefinition]:
+            definitions: Dict[str, GraphDefinition] = {}
+            for graph in self.readonly_handle.graphs():
+                # Multinet graphs have just one edge definition.
+                edge_def = graph["edge_definitions"][0]
+                from_tables = edge_def["from_vertex_collections"]
+                to_tables = edge_def["to_vertex_collections"]
+                node_tables = {*from_tables, *to_tables, *graph["orphan_collections"]}
+
+                definitions[graph["name"]] = {
+                    "edge_table": edge_def["edge_collection"],
+                    "node_tables": sorted(node_tables),
+                    "from_tables": sorted(from_tables),
+                    "to_tables": sorted(to_tables),
+                }
+
+            return definitions
+
+        return graph_definitions.get(self.internal, revision, load)
+
     def graph(self, name: str) -> Graph:
         """Return a specific graph."""
-        if not self.readonly_handle.has_graph(name):
+        definition = self.graph_definitions().get(name)
+        if definition is None:
             raise GraphNotFound(self.name, name)
 
-        return Graph(name, self.name, self.handle.graph(name), self.handle.aql)
+        return Graph(
+            name, self.name, self.handle.graph(name), self.handle.aql, definition
+        )
 
     def has_graph(self, name: str) -> bool:
         """Return if a specific graph exists."""
-        return self.readonly_handle.has_graph(name)
+        return name in self.graph_definitions()
 
-    def validate_edge_table(self, edge_table: str) -> EdgeTableProperties:
+    def validate_edge_table(
+        self, edge_table: str, max_undefined_keys: int = 100
+    ) -> EdgeTableProperties:
         """
         Validate that an edge table is suitable for use in a graph.
 
         If validation is successful, the edge table properties are returned.
-        Otherwise, a ValidationFailed error is raised.
+        Otherwise, a ValidationFailed error is raised. At most `max_undefined_keys`
+        example keys are reported for each table with undefined references.
         """
         loaded_edge_table = self.table(edge_table)
         edge_table_properties = loaded_edge_table.edge_properties()
 
-        referenced_tables = edge_table_properties["table_keys"]
+        referenced_tables = (
+            edge_table_properties["from_tables"] | edge_table_properties["to_tables"]
+        )
 
         errors: List[ValidationFailure] = []
-        for table, keys in referenced_tables.items():
+        for table in referenced_tables:
             if not self.has_table(table):
                 errors.append(UndefinedTable(table=table))
             else:
-                table_keys = set(self.table(table).keys())
-                undefined = keys - table_keys
-
-                if undefined:
-                    errors.append(UndefinedKeys(table=table, keys=list(undefined)))
+                undefined = loaded_edge_table.undefined_references(
+                    table, max_undefined_keys
+                )
+
+                if undefined["count"]:
+                    errors.append(
+                        UndefinedKeys(
+                            table=table,
+                            keys=undefined["keys"],
+                            count=undefined["count"],
+                        )
+                    )
 
         if errors:
             raise ValidationFailed(errors)
@@ -239,6 +294,8 @@ class Workspace:
 
     def create_graph(self, name: str, edge_table: str) -> None:
         """Create a graph."""
+        # Make sure that graphs created by other processes are seen
+        graph_definitions.invalidate(self.internal)
         if self.has_graph(name):
             raise AlreadyExists("Graph", name)
 
@@ -246,6 +303,13 @@ class Workspace:
         from_tables = edge_table_properties["from_tables"]
         to_tables = edge_table_properties["to_tables"]
 
+        # The graph's degree attributes must not overwrite existing attributes
+        conflicts = self.attribute_conflicts(
+            from_tables | to_tables, degree_attributes(name).values()
+        )
+        if conflicts:
+            raise ValidationFailed(conflicts)
+
         try:
             self.handle.create_graph(
                 name,
@@ -259,13 +323,63 @@ class Workspace:
             )
         except EdgeDefinitionCreateError as e:
             raise GraphCreationError(str(e))
+        finally:
+            graph_definitions.invalidate(self.internal)
+
+        self.graph(name).update_degrees()
+
+    def attribute_conflicts(
+        self, tables: Iterable[str], attributes: Iterable[str]
+    ) -> List[ValidationFailure]:
+        """Return a failure for each of `attributes` that a row of `tables` has."""
+        query = """
+        FOR attribute IN @attributes
+            FILTER LENGTH(
+                FOR n IN @@table FILTER HAS(n, attribute) LIMIT 1 RETURN 1
+            ) > 0
+            RETURN attribute
+        """
+
+        names = list(attributes)
+        conflicts: List[ValidationFailure] = []
+        for table in sorted(tables):
+            bind_vars = {"@table": table, "attributes": names}
+            conflicts.extend(
+                AttributeConflict(table=table, attribute=attribute)
+                for attribute in self.handle.aql.execute(query, bind_vars=bind_vars)
+            )
+
+        return conflicts
+
+    def update_degrees(
+        self, edge_table: str, node_ids: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Update the degree attributes of nodes, after edges of a table changed.
+
+        The degrees are updated in each graph with the edge table `edge_table`,
+        for the nodes `node_ids` if given, and otherwise for all nodes.
+        """
+        selected = None if node_ids is None else set(node_ids)
+        for name, definition in self.graph_definitions().items():
+            if definition["edge_table"] == edge_table:
+                self.graph(name).update_degrees(selected)
 
     def delete_graph(self, name: str) -> bool:
         """Delete a specific graph."""
+        graph_definitions.invalidate(self.internal)
         if not self.has_graph(name):
             raise GraphNotFound(self.name, name)
 
-        return self.handle.delete_graph(name)
+        snapshot_cache.invalidate((self.name, name))
+        self.graph(name).delete_degrees()
+        delete_layouts(self.handle, name)
+        delete_time_attributes(self.handle, name)
+
+        try:
+            return self.handle.delete_graph(name)
+        finally:
+            graph_definitions.invalidate(self.internal)
 
     def tables(self, table_type: TableType = "all") -> Generator[str, None, None]:
         """Return all tables of the specified type."""
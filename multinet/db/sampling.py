@@ -0,0 +1,176 @@
+"""
+Graph samples that explore outward from seed nodes.
+
+The explorations only look up the neighbors of the nodes they reach, in batches,
+so the cost of a sample is bounded by its size and the edges of its nodes, not
+by the size of the graph. Neighbors are looked up through an `Adjacency`
+function, which reads an in-memory snapshot or the edge index of the database,
+and explorations that run out of neighbors restart from nodes picked by a
+`RandomNode` function, which may pick nodes without any edges.
+"""
+import random
+from collections import deque
+
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+# Returns the IDs of the nodes adjacent to each of the given nodes, with repetition
+Adjacency = Callable[[List[str]], Dict[str, List[str]]]
+
+# Returns the ID of a random node of the graph, or `None` if it has no nodes
+RandomNode = Callable[[random.Random], Optional[str]]
+
+# Number of steps a random walk may take without finding a new node, before it
+# jumps to a random unvisited node; also the number of random nodes drawn when
+# looking for an unvisited one
+MAX_STALLED_STEPS = 100
+
+
+class Neighbors:
+    """Looks up and remembers the neighbors of nodes, in batches."""
+
+    def __init__(self, adjacency: Adjacency):
+        """Initialize the lookups with the `adjacency` function."""
+        self.adjacency = adjacency
+        self.known: Dict[str, List[str]] = {}
+
+    def __call__(self, node: str, pending: Optional[List[str]] = None) -> List[str]:
+        """
+        Return the neighbors of `node`, with repetition.
+
+        Nodes in `pending`, which are about to be looked up as well, are looked up
+        along with `node`.
+        """
+        if node not in self.known:
+            batch = [node] + [
+                other for other in pending or [] if other not in self.known
+            ]
+            adjacent = self.adjacency(list(dict.fromkeys(batch)))
+
+            # Sort the neighbors, so that samples don't depend on the order edges
+            # are read in
+            self.known.update((other, sorted(ids)) for other, ids in adjacent.items())
+
+        return self.known.get(node, [])
+
+
+def random_unvisited(
+    visited: Set[str], random_node: RandomNode, rng: random.Random
+) -> Optional[str]:
+    """Return a random node not in `visited`, or `None` if none is found."""
+    for _ in range(MAX_STALLED_STEPS):
+        node = random_node(rng)
+        if node is None:
+            return None
+
+        if node not in visited:
+            return node
+
+    return None
+
+
+def forest_fire(
+    starts: List[str],
+    size: int,
+    burn: float,
+    rng: random.Random,
+    adjacency: Adjacency,
+    random_node: RandomNode,
+) -> List[str]:
+    """
+    Return the IDs of up to `size` nodes burned by a forest fire.
+
+    The fire starts at the nodes `starts`, and each burning node sets fire to a
+    random number of its unburned neighbors, geometrically distributed with mean
+    `burn / (1 - burn)`. A `burn` of 1 sets fire to all neighbors, which is a
+    snowball sample. If the fire dies out early, it's restarted from a random
+    unburned node. The neighbors of all burning nodes are looked up together.
+    """
+    neighbors = Neighbors(adjacency)
+    burned: Set[str] = set()
+    found: List[str] = []
+    burning: Deque[str] = deque()
+
+    def ignite(node: str) -> None:
+        burned.add(node)
+        found.append(node)
+        burning.append(node)
+
+    for node in starts[:size]:
+        if node not in burned:
+            ignite(node)
+
+    while len(found) < size:
+        if not burning:
+            restart = random_unvisited(burned, random_node, rng)
+            if restart is None:
+                break
+
+            ignite(restart)
+            continue
+
+        node = burning.popleft()
+        unburned = sorted(set(neighbors(node, list(burning))) - burned)
+        rng.shuffle(unburned)
+
+        if burn < 1:
+            spread = 0
+            while rng.random() < burn:
+                spread += 1
+
+            unburned = unburned[:spread]
+
+        for neighbor in unburned[: size - len(found)]:
+            ignite(neighbor)
+
+    return found
+
+
+def random_walk(
+    starts: List[str],
+    size: int,
+    restart: float,
+    rng: random.Random,
+    adjacency: Adjacency,
+    random_node: RandomNode,
+) -> List[str]:
+    """
+    Return the IDs of up to `size` nodes visited by a random walk.
+
+    The walk begins at a random node of `starts`, or anywhere if there are none,
+    and returns to its starting node with probability `restart` at each step.
+    If no new node is found within `MAX_STALLED_STEPS` steps, the walk moves to a
+    random unvisited node and continues from there.
+    """
+    neighbors = Neighbors(adjacency)
+    start = rng.choice(starts) if starts else random_node(rng)
+    if not size or start is None:
+        return []
+
+    visited = {start}
+    found = [start]
+
+    node = start
+    stalled = 0
+    while len(found) < size:
+        adjacent = neighbors(node)
+        if not adjacent or rng.random() < restart:
+            node = start
+        else:
+            node = rng.choice(adjacent)
+
+        if node in visited:
+            stalled += 1
+            if stalled < MAX_STALLED_STEPS:
+                continue
+
+            jump = random_unvisited(visited, random_node, rng)
+            if jump is None:
+                break
+
+            node = start = jump
+
+        visited.add(node)
+        found.append(node)
+        stalled = 0
+
+    return found
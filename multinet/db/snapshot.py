@@ -0,0 +1,399 @@
+"""In-memory adjacency snapshots of graphs, for serving hot read paths."""
+from __future__ import annotations  # noqa: T484
+
+import os
+import sys
+import threading
+from array import array
+from collections import OrderedDict, deque
+
+import numpy as np
+from arango.aql import AQL
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from multinet.types import EdgeDirection
+
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+# Maximum total size of the snapshots kept by each server process. Zero disables
+# the snapshot cache, so that all graph reads go to the database.
+SNAPSHOT_CACHE_BYTES = int(os.environ.get("GRAPH_SNAPSHOT_CACHE_MB", "0")) * 2 ** 20
+
+# Approximate overhead of each node id in the id dictionary, on top of its string
+ID_OVERHEAD_BYTES = 100
+
+# Memory used by each edge of a snapshot, in its outgoing and incoming indices. This
+# is a lower bound on the size of a snapshot, known before it's loaded.
+EDGE_BYTES = 8
+
+
+def _compress(
+    count: int, sources: np.ndarray, targets: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Build the CSR offsets and indices arrays for the edges `sources -> targets`."""
+    offsets = np.zeros(count + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum(np.bincount(sources, minlength=count))
+
+    # A stable sort keeps the edges of each node in their original order
+    order = np.argsort(sources, kind="stable")
+    return offsets, targets[order]
+
+
+def _relabel(labels: np.ndarray) -> np.ndarray:
+    """Renumber component labels from zero, in order of their lowest node number."""
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int32)
+    rank[np.argsort(first)] = np.arange(len(first), dtype=np.int32)
+
+    return rank[inverse]
+
+
+class GraphSnapshot:
+    """
+    A compressed sparse row (CSR) representation of the edges of a graph.
+
+    Nodes are numbered by integer, and both the outgoing and incoming adjacency
+    of each node are stored as NumPy int32 arrays of offsets and indices.
+    """
+
+    def __init__(
+        self,
+        revision: str,
+        ids: List[str],
+        sources: Sequence[int],
+        targets: Sequence[int],
+    ):
+        """
+        Build a snapshot from the edges `sources[i] -> targets[i]`.
+
+        `ids` maps the integer node numbers used in `sources` and `targets` back to
+        node IDs. `revision` is the revision of the edge table the edges were read
+        from.
+        """
+        self.revision = revision
+        self.ids = ids
+        self.numbers = {node_id: i for i, node_id in enumerate(ids)}
+        self.edge_count = len(sources)
+
+        source_array = np.asarray(sources, dtype=np.int32)
+        target_array = np.asarray(targets, dtype=np.int32)
+        self.out_offsets, self.out_indices = _compress(
+            len(ids), source_array, target_array
+        )
+        self.in_offsets, self.in_indices = _compress(
+            len(ids), target_array, source_array
+        )
+
+        self.nbytes = self._nbytes()
+
+    @staticmethod
+    def load(aql: AQL, edge_table: str, revision: str) -> GraphSnapshot:
+        """Read the edges of `edge_table` into a new snapshot."""
+        cur = aql.execute(
+            "FOR e IN @@edges RETURN [e._from, e._to]",
+            bind_vars={"@edges": edge_table},
+            batch_size=10000,
+            stream=True,
+        )
+
+        ids: List[str] = []
+        numbers: Dict[str, int] = {}
+        sources = array("i")
+        targets = array("i")
+
+        def number(node_id: str) -> int:
+            if node_id not in numbers:
+                numbers[node_id] = len(ids)
+                ids.append(node_id)
+
+            return numbers[node_id]
+
+        for source, target in cur:
+            sources.append(number(source))
+            targets.append(number(target))
+
+        return GraphSnapshot(revision, ids, sources, targets)
+
+    def _nbytes(self) -> int:
+        """Return the approximate memory used by this snapshot, in bytes."""
+        arrays = (self.out_offsets, self.out_indices, self.in_offsets, self.in_indices)
+        array_bytes = sum(a.nbytes for a in arrays)
+        id_bytes = sum(sys.getsizeof(node_id) for node_id in self.ids)
+
+        return array_bytes + id_bytes + ID_OVERHEAD_BYTES * len(self.ids)
+
+    def _adjacent(self, node: int, direction: EdgeDirection) -> List[int]:
+        """Return the numbers of the nodes adjacent to `node`, with repetition."""
+        adjacent: List[int] = []
+        if direction in ("outgoing", "all"):
+            start, end = self.out_offsets[node], self.out_offsets[node + 1]
+            adjacent.extend(self.out_indices[start:end].tolist())
+
+        if direction in ("incoming", "all"):
+            start, end = self.in_offsets[node], self.in_offsets[node + 1]
+            adjacent.extend(self.in_indices[start:end].tolist())
+
+        return adjacent
+
+    def degree(self, node_id: str, direction: EdgeDirection = "all") -> int:
+        """Return the number of edges of the node `node_id`."""
+        node = self.numbers.get(node_id)
+        if node is None:
+            return 0
+
+        degree = 0
+        if direction in ("outgoing", "all"):
+            degree += self.out_offsets[node + 1] - self.out_offsets[node]
+
+        if direction in ("incoming", "all"):
+            degree += self.in_offsets[node + 1] - self.in_offsets[node]
+
+        return int(degree)
+
+    def neighbors(
+        self,
+        node_id: str,
+        depth: int = 1,
+        direction: EdgeDirection = "all",
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Return the IDs of the nodes within `depth` hops of the node `node_id`.
+
+        Nodes are returned in breadth first order, without repetition, and not
+        including `node_id` itself.
+        """
+        start = self.numbers.get(node_id)
+        if start is None:
+            return []
+
+        visited = {start}
+        found: List[str] = []
+        frontier: Deque[Tuple[int, int]] = deque([(start, 0)])
+        while frontier:
+            node, distance = frontier.popleft()
+            if distance == depth:
+                continue
+
+            for adjacent in self._adjacent(node, direction):
+                if adjacent in visited:
+                    continue
+
+                visited.add(adjacent)
+                found.append(self.ids[adjacent])
+                if limit is not None and len(found) >= limit:
+                    return found
+
+                frontier.append((adjacent, distance + 1))
+
+        return found
+
+    def adjacent_ids(self, node_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Return the IDs of the nodes adjacent to each of the nodes `node_ids`.
+
+        Adjacent nodes are listed with repetition, once for each connecting edge, in
+        either direction.
+        """
+        adjacent: Dict[str, List[str]] = {}
+        for node_id in node_ids:
+            node = self.numbers.get(node_id)
+            adjacent[node_id] = (
+                []
+                if node is None
+                else [self.ids[n] for n in self._adjacent(node, "all")]
+            )
+
+        return adjacent
+
+    def adjacency(self, transpose: bool = False) -> csr_matrix:
+        """
+        Return the adjacency matrix of this snapshot, sharing its CSR arrays.
+
+        Entry (i, j) counts the edges from node i to node j, or from node j to
+        node i if `transpose` is set.
+        """
+        count = len(self.ids)
+        offsets, indices = (
+            (self.in_offsets, self.in_indices)
+            if transpose
+            else (self.out_offsets, self.out_indices)
+        )
+
+        values = np.ones(len(indices), dtype=np.float64)
+        return csr_matrix((values, indices, offsets), shape=(count, count))
+
+    def components(self) -> np.ndarray:
+        """
+        Return the weakly connected component of each node, by node number.
+
+        Components are numbered from zero, in order of their lowest node number.
+        """
+        _, labels = connected_components(
+            self.adjacency(), directed=True, connection="weak"
+        )
+        return _relabel(labels)
+
+    def degree_centrality(
+        self, direction: EdgeDirection = "all", node_count: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Return the degree centrality of each node, by node number.
+
+        Degrees are normalized by the largest possible degree in a simple graph of
+        `node_count` nodes, which defaults to the number of nodes in the snapshot.
+        """
+        count = len(self.ids)
+        if node_count is None:
+            node_count = count
+
+        degrees = np.zeros(count, dtype=np.int64)
+        if direction in ("outgoing", "all"):
+            degrees += np.diff(self.out_offsets)
+
+        if direction in ("incoming", "all"):
+            degrees += np.diff(self.in_offsets)
+
+        scale = 1 / (node_count - 1) if node_count > 1 else 0.0
+        return degrees * scale
+
+    def pagerank(
+        self,
+        damping: float = 0.85,
+        iterations: int = 100,
+        tolerance: float = 1e-6,
+        node_count: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Return the PageRank of each node, by node number.
+
+        Ranks are computed by power iteration, as a sparse matrix-vector product
+        with the transposed adjacency matrix per round, stopping after
+        `iterations` rounds or once the total change in rank falls below
+        `tolerance`. The rank of nodes without outgoing edges is spread evenly over
+        all nodes. The graph has `node_count` nodes, which defaults to the number
+        of nodes in the snapshot; the ranks of the nodes without any edges follow
+        those of the snapshot's nodes.
+        """
+        count = len(self.ids)
+        total = count if node_count is None else max(node_count, count)
+        if not total:
+            return np.zeros(0)
+
+        incoming = self.adjacency(transpose=True)
+        out_degrees = np.diff(self.out_offsets)
+        inverse_degrees = np.divide(
+            1.0, out_degrees, out=np.zeros(count), where=out_degrees > 0
+        )
+
+        # Nodes without any edges only receive the rank spread over all nodes
+        dangling = np.concatenate([out_degrees == 0, np.ones(total - count, bool)])
+        flow = np.zeros(total)
+
+        ranks = np.full(total, 1 / total)
+        for _ in range(iterations):
+            base = (1 - damping + damping * ranks[dangling].sum()) / total
+            flow[:count] = incoming @ (ranks[:count] * inverse_degrees)
+            updated = base + damping * flow
+
+            change = np.abs(updated - ranks).sum()
+            ranks = updated
+            if change < tolerance:
+                break
+
+        return ranks
+
+    def strong_components(self) -> np.ndarray:
+        """
+        Return the strongly connected component of each node, by node number.
+
+        Components are numbered from zero, in order of their lowest node number.
+        """
+        _, labels = connected_components(
+            self.adjacency(), directed=True, connection="strong"
+        )
+        return _relabel(labels)
+
+
+class SnapshotCache:
+    """A size-bounded, least recently used cache of graph snapshots."""
+
+    def __init__(self, max_bytes: int):
+        """Initialize an empty cache holding at most `max_bytes` of snapshots."""
+        self.max_bytes = max_bytes
+        self.snapshots: OrderedDict[Tuple[str, str], GraphSnapshot] = OrderedDict()
+        self.lock = threading.Lock()
+
+        # The revision of each graph whose snapshot was found too large to cache
+        self.oversized: Dict[Tuple[str, str], str] = {}
+
+    def enabled(self) -> bool:
+        """Return if this cache can hold any snapshots."""
+        return self.max_bytes > 0
+
+    def total_bytes(self) -> int:
+        """Return the approximate memory used by all cached snapshots."""
+        return sum(snapshot.nbytes for snapshot in self.snapshots.values())
+
+    def get(self, key: Tuple[str, str], revision: str) -> Optional[GraphSnapshot]:
+        """Return the cached snapshot stored under `key`, if it's at `revision`."""
+        with self.lock:
+            snapshot = self.snapshots.get(key)
+            if snapshot is None or snapshot.revision != revision:
+                return None
+
+            self.snapshots.move_to_end(key)
+            return snapshot
+
+    def admits(self, key: Tuple[str, str], revision: str, edge_count: int) -> bool:
+        """
+        Return if a snapshot of `edge_count` edges at `revision` may fit the cache.
+
+        Snapshots whose edges alone exceed the cache, or that were already found
+        too large at the same revision, are never loaded for caching.
+        """
+        if not self.enabled() or edge_count * EDGE_BYTES > self.max_bytes:
+            return False
+
+        with self.lock:
+            return self.oversized.get(key) != revision
+
+    def put(self, key: Tuple[str, str], snapshot: GraphSnapshot) -> None:
+        """
+        Store `snapshot` under `key`, evicting the least recently used snapshots.
+
+        Snapshots larger than the whole cache aren't stored, and are recorded as
+        oversized until their graph's revision changes.
+        """
+        if not self.enabled():
+            return
+
+        with self.lock:
+            self.snapshots.pop(key, None)
+            if snapshot.nbytes > self.max_bytes:
+                self.oversized[key] = snapshot.revision
+                return
+
+            self.oversized.pop(key, None)
+            while (
+                self.snapshots and self.total_bytes() + snapshot.nbytes > self.max_bytes
+            ):
+                self.snapshots.popitem(last=False)
+
+            self.snapshots[key] = snapshot
+
+    def invalidate(self, key: Tuple[str, str]) -> None:
+        """Remove the snapshot stored under `key`, if any."""
+        with self.lock:
+            self.snapshots.pop(key, None)
+            self.oversized.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all snapshots."""
+        with self.lock:
+            self.snapshots.clear()
+            self.oversized.clear()
+
+
+snapshot_cache = SnapshotCache(SNAPSHOT_CACHE_BYTES)
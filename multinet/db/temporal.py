@@ -0,0 +1,182 @@
+"""Time slicing of graphs whose edges carry timestamps or validity intervals."""
+from arango.database import StandardDatabase
+
+from multinet.db.models.graph import Graph
+from multinet.errors import FlaskTuple, RequiredParamsMissing, ServerError
+
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Hidden (system) collection of each workspace, holding the time attributes
+# declared for each graph, keyed by graph name
+TIME_ATTRIBUTES_TABLE = "_time_attributes"
+
+
+class GraphNotTemporal(ServerError):
+    """Error raised if a time query is made on a graph without time attributes."""
+
+    def __init__(self, graph: str):
+        """Initialize the error with the graph name."""
+        self.graph = graph
+
+    def flask_response(self) -> FlaskTuple:
+        """Generate a 400 error."""
+        return (self.graph, "400 Graph Not Temporal")
+
+
+def set_time_attributes(
+    handle: StandardDatabase,
+    graph: Graph,
+    time: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Declare the time attributes of the edges of `graph`, and index them.
+
+    Edges either happen at an instant, given by the attribute `time`, or are
+    valid over an interval, from the attribute `start` up to the attribute `end`
+    (where a missing end means the edge is still valid).
+    """
+    edges = graph.handle.edge_collection(graph.edge_table())
+    if time is not None:
+        attributes: Dict[str, Any] = {"time": time, "start": None, "end": None}
+        edges.add_persistent_index([time])
+    elif start is not None and end is not None:
+        attributes = {"time": None, "start": start, "end": end}
+        edges.add_persistent_index([start])
+        edges.add_persistent_index([end])
+    else:
+        raise RequiredParamsMissing(["time"] if start is None else ["end"])
+
+    if not handle.has_collection(TIME_ATTRIBUTES_TABLE):
+        handle.create_collection(TIME_ATTRIBUTES_TABLE, system=True)
+
+    handle.collection(TIME_ATTRIBUTES_TABLE).insert(
+        {"_key": graph.name, **attributes}, overwrite=True
+    )
+
+    return {"graph": graph.name, **attributes}
+
+
+def get_time_attributes(handle: StandardDatabase, graph: str) -> Dict[str, Any]:
+    """Return the time attributes declared for the graph `graph`."""
+    doc = None
+    if handle.has_collection(TIME_ATTRIBUTES_TABLE):
+        doc = handle.collection(TIME_ATTRIBUTES_TABLE).get(graph)
+
+    if doc is None:
+        raise GraphNotTemporal(graph)
+
+    return {
+        "graph": graph,
+        "time": doc["time"],
+        "start": doc["start"],
+        "end": doc["end"],
+    }
+
+
+def delete_time_attributes(handle: StandardDatabase, graph: str) -> None:
+    """Delete the time attributes declared for the graph `graph`, if any."""
+    if handle.has_collection(TIME_ATTRIBUTES_TABLE):
+        handle.collection(TIME_ATTRIBUTES_TABLE).delete(graph, ignore_missing=True)
+
+
+def active_condition(
+    attributes: Dict[str, Any], window: str, bind_vars: Dict[str, Any]
+) -> str:
+    """
+    Return an AQL condition selecting the edges `e` active during a time window.
+
+    Windows are half-open, from `@<window>_start` up to `@<window>_end`, and the
+    condition is a range over the indexed time attributes. The attribute names
+    are added to `bind_vars`.
+    """
+    if attributes["time"] is not None:
+        bind_vars["time"] = attributes["time"]
+        return f"e[@time] >= @{window}_start AND e[@time] < @{window}_end"
+
+    bind_vars.update({"start": attributes["start"], "end": attributes["end"]})
+    return (
+        f"e[@start] < @{window}_end"
+        f" AND (e[@end] == null OR e[@end] > @{window}_start)"
+    )
+
+
+def time_slice(
+    graph: Graph, attributes: Dict[str, Any], start: Any, end: Any
+) -> Dict[str, Iterator[Dict]]:
+    """
+    Return the edges of `graph` active from `start` up to `end`, with their nodes.
+
+    Only nodes with at least one active edge are included. Nodes and edges are
+    streamed.
+    """
+    bind_vars: Dict[str, Any] = {
+        "@edges": graph.edge_table(),
+        "window_start": start,
+        "window_end": end,
+    }
+    condition = active_condition(attributes, "window", bind_vars)
+
+    def nodes() -> Iterator[Dict]:
+        query = f"""
+        FOR e IN @@edges
+            FILTER {condition}
+            FOR id IN [e._from, e._to]
+                COLLECT node_id = id
+                LET node = DOCUMENT(node_id)
+                FILTER node != null
+                RETURN UNSET(node, "_rev")
+        """
+        yield from graph.aql.execute(
+            query, bind_vars=bind_vars, batch_size=10000, stream=True
+        )
+
+    def edges() -> Iterator[Dict]:
+        query = f"""
+        FOR e IN @@edges
+            FILTER {condition}
+            RETURN UNSET(e, "_rev")
+        """
+        yield from graph.aql.execute(
+            query, bind_vars=bind_vars, batch_size=10000, stream=True
+        )
+
+    return {"nodes": nodes(), "edges": edges()}
+
+
+def time_delta(
+    graph: Graph,
+    attributes: Dict[str, Any],
+    window: Tuple[Any, Any],
+    previous: Tuple[Any, Any],
+) -> Dict[str, Iterator[Dict]]:
+    """
+    Return the edges added and removed going from the `previous` window to `window`.
+
+    Added edges are active in `window` but not in `previous`, and removed edges
+    the reverse. Each is found with a range query over the window it is active in,
+    and streamed.
+    """
+    bind_vars: Dict[str, Any] = {
+        "@edges": graph.edge_table(),
+        "window_start": window[0],
+        "window_end": window[1],
+        "previous_start": previous[0],
+        "previous_end": previous[1],
+    }
+    current = active_condition(attributes, "window", bind_vars)
+    before = active_condition(attributes, "previous", bind_vars)
+
+    def changed(active: str, inactive: str) -> Iterator[Dict]:
+        query = f"""
+        FOR e IN @@edges
+            FILTER {active}
+            FILTER NOT ({inactive})
+            RETURN UNSET(e, "_rev")
+        """
+        yield from graph.aql.execute(
+            query, bind_vars=bind_vars, batch_size=10000, stream=True
+        )
+
+    return {"added": changed(current, before), "removed": changed(before, current)}
@@ -0,0 +1,184 @@
+"""
+Nested set indexing of trees, for subtree and ancestor queries without traversals.
+
+Each node of an indexed tree stores the interval [left, right] of the steps at
+which an Euler tour of the tree enters and leaves it, along with its depth. A
+node is an ancestor of another exactly when its interval contains the other's,
+so subtrees and ancestors are range queries over indexed attributes.
+"""
+from multinet.db.models.graph import Graph, table_bind_vars
+from multinet.db.models.table import Table
+from multinet.errors import ServerError, FlaskTuple
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, TypeVar
+
+# Node attributes holding the interval and depth of each node
+TREE_LEFT = "tree_left"
+TREE_RIGHT = "tree_right"
+TREE_DEPTH = "tree_depth"
+
+# Upper bound on the number of nodes returned by a single subtree request
+MAX_SUBTREE_NODES = 10000
+
+T = TypeVar("T")
+
+
+class TreeNotIndexed(ServerError):
+    """Error raised if a tree query is made on a node without tree attributes."""
+
+    def __init__(self, node: str):
+        """Initialize the error with the node ID."""
+        self.node = node
+
+    def flask_response(self) -> FlaskTuple:
+        """Generate a 400 error."""
+        return (self.node, "400 Tree Not Indexed")
+
+
+def nested_set(
+    root: T, children: Callable[[T], Iterable[T]]
+) -> Iterator[Tuple[T, Dict[str, int]]]:
+    """
+    Generate each node of the tree at `root`, with its tree attributes.
+
+    The tree is walked iteratively, so trees of any depth can be indexed. Nodes
+    are generated in post-order, once their interval is complete.
+    """
+    step = 0
+    stack: List[Tuple[T, int, Iterator[T]]] = [(root, step, iter(children(root)))]
+
+    while stack:
+        node, left, remaining = stack[-1]
+        child = next(remaining, None)
+
+        step += 1
+        if child is not None:
+            stack.append((child, step, iter(children(child))))
+        else:
+            stack.pop()
+            yield node, {TREE_LEFT: left, TREE_RIGHT: step, TREE_DEPTH: len(stack)}
+
+
+def add_tree_indexes(table: Table) -> None:
+    """Create the indexes used by tree queries on the node table `table`."""
+    for attribute in (TREE_LEFT, TREE_RIGHT):
+        table.handle.add_persistent_index([attribute], sparse=True)
+
+
+def tree_node(graph: Graph, table: str, node: str) -> Dict[str, Any]:
+    """Return the attributes of a node, checking that it has tree attributes."""
+    doc = graph.node_attributes(table, node)
+    if TREE_LEFT not in doc:
+        raise TreeNotIndexed(doc["_id"])
+
+    return doc
+
+
+def tables_query(
+    graph: Graph, condition: str, operations: str = "RETURN n"
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Return an expression applying `operations` to the nodes `n` matching `condition`.
+
+    The nodes are selected from every node table of `graph`, with one indexed
+    range query per table, and the results of `operations` on each table are
+    concatenated.
+    """
+    tables = sorted(graph.node_tables())
+    subqueries = ", ".join(
+        f"(FOR n IN @@table{i} FILTER {condition} {operations})"
+        for i in range(len(tables))
+    )
+
+    return f"FLATTEN([{subqueries}])", dict(table_bind_vars(tables))
+
+
+def subtree(
+    graph: Graph, table: str, node: str, offset: int = 0, limit: int = 30
+) -> Dict[str, Any]:
+    """
+    Return the subtree rooted at the node `node` from table `table`.
+
+    The nodes of the subtree, including the node itself, are returned in
+    pre-order, with `offset` and `limit` applied. The subtree is counted in the
+    database, and only the first `offset + limit` nodes of each table are read,
+    in order of the index on their left bound, so deep pages of large subtrees
+    don't load the whole subtree.
+    """
+    root = tree_node(graph, table, node)
+    condition = "n[@left] >= @root_left AND n[@left] < @root_right"
+    limit = min(limit, MAX_SUBTREE_NODES)
+
+    bind_vars = {
+        "left": TREE_LEFT,
+        "root_left": root[TREE_LEFT],
+        "root_right": root[TREE_RIGHT],
+    }
+
+    counts, count_bind_vars = tables_query(
+        graph, condition, "COLLECT WITH COUNT INTO count RETURN count"
+    )
+    count_query = f"RETURN SUM({counts})"
+    count = next(
+        graph.aql.execute(count_query, bind_vars={**bind_vars, **count_bind_vars})
+    )
+
+    pages, page_bind_vars = tables_query(
+        graph, condition, "SORT n[@left] LIMIT @end RETURN n"
+    )
+    nodes_query = f"""
+    FOR n IN {pages}
+        SORT n[@left]
+        LIMIT @offset, @limit
+        RETURN UNSET(n, "_rev")
+    """
+    page_bind_vars.update(
+        {**bind_vars, "offset": offset, "limit": limit, "end": offset + limit}
+    )
+    nodes = list(graph.aql.execute(nodes_query, bind_vars=page_bind_vars))
+
+    return {"count": count, "nodes": nodes}
+
+
+def ancestors(graph: Graph, table: str, node: str) -> List[Dict]:
+    """Return the ancestors of the node `node` from table `table`, root first."""
+    doc = tree_node(graph, table, node)
+    nodes, bind_vars = tables_query(
+        graph, "n[@left] < @node_left AND n[@right] > @node_right"
+    )
+
+    query = f"""
+    FOR n IN {nodes}
+        SORT n[@depth]
+        RETURN UNSET(n, "_rev")
+    """
+    bind_vars.update(
+        {
+            "left": TREE_LEFT,
+            "right": TREE_RIGHT,
+            "depth": TREE_DEPTH,
+            "node_left": doc[TREE_LEFT],
+            "node_right": doc[TREE_RIGHT],
+        }
+    )
+
+    return list(graph.aql.execute(query, bind_vars=bind_vars))
+
+
+def is_ancestor(
+    graph: Graph, table: str, node: str, ancestor_table: str, ancestor: str
+) -> Dict[str, Any]:
+    """
+    Return whether a node is an ancestor of the node `node` from table `table`.
+
+    If it is, the number of edges between the two nodes is returned too.
+    """
+    doc = tree_node(graph, table, node)
+    other = tree_node(graph, ancestor_table, ancestor)
+
+    contained = (
+        other[TREE_LEFT] < doc[TREE_LEFT] and doc[TREE_RIGHT] < other[TREE_RIGHT]
+    )
+    distance = doc[TREE_DEPTH] - other[TREE_DEPTH] if contained else None
+
+    return {"ancestor": contained, "distance": distance}
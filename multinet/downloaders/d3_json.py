@@ -4,80 +4,128 @@ import json
 
 from flasgger import swag_from
 
+from multinet.db.layout import get_layout, layout_nodes
 from multinet.db.models.workspace import Workspace
 from multinet.db.models.graph import Graph
 from multinet.util import require_db
-from multinet.errors import GraphNotFound
+from multinet.errors import GraphNotFound, LayoutNotFound
 
 from flask import Blueprint, Response
+from webargs import fields
+from webargs.flaskparser import use_kwargs
 
 # Import types
-from typing import Any, Generator, List
+from typing import Any, Dict, Generator, Iterable, List, Optional
 
 bp = Blueprint("download_d3_json", __name__)
 bp.before_request(require_db)
 
 
-def node_generator(
-    loaded_workspace: Workspace, loaded_graph: Graph
+# Checks for node tables that have a `_nodes` suffix.
+# If matched, removes this suffix.
+table_nodes_pattern = re.compile(r"^([^\d_]\w+)_nodes(/.+)")
+
+
+def d3_node(node: Dict) -> Dict:
+    """Convert a node document to a D3 node."""
+    node["id"] = node["_key"]
+    del node["_key"]
+
+    return node
+
+
+def d3_link(edge: Dict) -> Dict:
+    """Convert an edge document to a D3 link."""
+    source = edge["_from"]
+    target = edge["_to"]
+    source_match = table_nodes_pattern.search(source)
+    target_match = table_nodes_pattern.search(target)
+
+    if source_match and target_match:
+        source = "".join(source_match.groups())
+        target = "".join(target_match.groups())
+
+    edge["source"] = source
+    edge["target"] = target
+    del edge["_from"]
+    del edge["_to"]
+
+    return edge
+
+
+def generate_d3_json(
+    nodes: Iterable[Dict], links: Iterable[Dict]
 ) -> Generator[str, None, None]:
-    """Generate the JSON list of nodes."""
+    """Generate a d3 json-encoded graph from node and edge documents."""
+    yield """{"nodes":["""
 
     comma = ""
-    node_tables = loaded_graph.node_tables()
-    for node_table in node_tables:
-        table_nodes = loaded_workspace.table(node_table).rows()["rows"]
+    for node in nodes:
+        yield f"{comma}{json.dumps(d3_node(node), separators=(',', ':'))}"
+        comma = comma or ","
 
-        for node in table_nodes:
-            node["id"] = node["_key"]
-            del node["_key"]
+    yield """],"links":["""
 
-            yield f"{comma}{json.dumps(node, separators=(',', ':'))}"
-            comma = comma or ","
+    comma = ""
+    for edge in links:
+        yield f"{comma}{json.dumps(d3_link(edge), separators=(',', ':'))}"
+        comma = comma or ","
 
+    yield "]}"
 
-def link_generator(
-    loaded_workspace: Workspace, loaded_graph: Graph
+
+def generate_d3_delta(
+    added: Iterable[Dict], removed: Iterable[Dict]
 ) -> Generator[str, None, None]:
-    """Generate the JSON list of links."""
+    """Generate the d3 links added to and removed from a graph, json-encoded."""
+    yield """{"added":["""
 
-    # Checks for node tables that have a `_nodes` suffix.
-    # If matched, removes this suffix.
-    table_nodes_pattern = re.compile(r"^([^\d_]\w+)_nodes(/.+)")
+    comma = ""
+    for edge in added:
+        yield f"{comma}{json.dumps(d3_link(edge), separators=(',', ':'))}"
+        comma = comma or ","
 
-    # Done this way to preserve logic in the future case of multiple edge tables
-    edge_tables: List[str] = [loaded_graph.edge_table()]
+    yield """],"removed":["""
 
     comma = ""
-    for edge_table in edge_tables:
-        edges = loaded_workspace.table(edge_table).rows()["rows"]
+    for edge in removed:
+        yield f"{comma}{json.dumps(d3_link(edge), separators=(',', ':'))}"
+        comma = comma or ","
+
+    yield "]}"
+
+
+def node_generator(
+    loaded_workspace: Workspace, loaded_graph: Graph
+) -> Generator[Dict, None, None]:
+    """Generate the node documents of a graph."""
+
+    node_tables = loaded_graph.node_tables()
+    for node_table in node_tables:
+        yield from loaded_workspace.table(node_table).rows()["rows"]
 
-        for edge in edges:
-            source = edge["_from"]
-            target = edge["_to"]
-            source_match = table_nodes_pattern.search(source)
-            target_match = table_nodes_pattern.search(target)
 
-            if source_match and target_match:
-                source = "".join(source_match.groups())
-                target = "".join(target_match.groups())
+def link_generator(
+    loaded_workspace: Workspace, loaded_graph: Graph
+) -> Generator[Dict, None, None]:
+    """Generate the edge documents of a graph."""
 
-            edge["source"] = source
-            edge["target"] = target
-            del edge["_from"]
-            del edge["_to"]
+    # Done this way to preserve logic in the future case of multiple edge tables
+    edge_tables: List[str] = [loaded_graph.edge_table()]
 
-            yield f"{comma}{json.dumps(edge, separators=(',', ':'))}"
-            comma = comma or ","
+    for edge_table in edge_tables:
+        yield from loaded_workspace.table(edge_table).rows()["rows"]
 
 
 @bp.route("/workspaces/<workspace>/graphs/<graph>/download", methods=["GET"])
+@use_kwargs({"layout": fields.Str()})
 @swag_from("swagger/d3_json.yaml")
-def download(workspace: str, graph: str) -> Any:
+def download(workspace: str, graph: str, layout: Optional[str] = None) -> Any:
     """Return a graph as a d3 json-encoded graph.
 
     `workspace` - the target workspace
     `graph` - the target graph
+    `layout` - the ID of a layout of the graph, whose positions are included
     """
 
     loaded_workspace = Workspace(workspace)
@@ -86,14 +134,17 @@ def download(workspace: str, graph: str) -> Any:
 
     loaded_graph = loaded_workspace.graph(graph)
 
-    def d3_json_generator() -> Generator[str, None, None]:
-        yield """{"nodes":["""
-        yield from node_generator(loaded_workspace, loaded_graph)
-        yield """],"links":["""
-        yield from link_generator(loaded_workspace, loaded_graph)
-        yield "]}"
+    if layout is None:
+        nodes: Iterable[Dict] = node_generator(loaded_workspace, loaded_graph)
+    else:
+        if get_layout(loaded_workspace.handle, loaded_graph, layout) is None:
+            raise LayoutNotFound(workspace, graph, layout)
+
+        nodes = layout_nodes(loaded_graph, layout)
+
+    d3_json = generate_d3_json(nodes, link_generator(loaded_workspace, loaded_graph))
 
-    response = Response(d3_json_generator(), mimetype="application/json")
+    response = Response(d3_json, mimetype="application/json")
     response.headers["Content-Disposition"] = f"attachment; filename={graph}.json"
     response.headers["Content-type"] = "application/json"
 
@@ -115,6 +115,22 @@ class NodeNotFound(NotFound):
         super().__init__("Node", f"{table}/{node}")
 
 
+class JobNotFound(NotFound):
+    """Exception for missing job."""
+
+    def __init__(self, workspace: str, job: str):
+        """Initialize the exception."""
+        super().__init__("Job", f"{workspace}/{job}")
+
+
+class LayoutNotFound(NotFound):
+    """Exception for missing graph layout."""
+
+    def __init__(self, workspace: str, graph: str, layout: str):
+        """Initialize the exception."""
+        super().__init__("Layout", f"{workspace}/{graph}/{layout}")
+
+
 class BadQueryArgument(ServerError):
     """Exception for illegal query argument value."""
 
@@ -148,6 +164,19 @@ class AlreadyExists(ServerError):
         return (self.item, f"409 {self.type.capitalize()} Already Exists")
 
 
+class BatchTooLarge(ServerError):
+    """Exception for passing more items in a batch request than allowed."""
+
+    def __init__(self, size: int, limit: int):
+        """Initialize the exception."""
+        self.size = size
+        self.limit = limit
+
+    def flask_response(self) -> FlaskTuple:
+        """Generate a 400 error."""
+        return ({"size": self.size, "limit": self.limit}, "400 Batch Too Large")
+
+
 class MalformedRequestBody(ServerError):
     """Exception for passing an unreadable request body."""
 
@@ -1,19 +1,36 @@
 """Custom types for Multinet codebase."""
-from typing import Dict, Set
+from typing import List, Set
 from typing_extensions import Literal, TypedDict
 
 EdgeDirection = Literal["all", "incoming", "outgoing"]
 TableType = Literal["all", "node", "edge"]
+UploadMode = Literal["create", "append", "upsert", "replace"]
+SampleStrategy = Literal[
+    "random_node", "random_edge", "snowball", "forest_fire", "random_walk"
+]
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+AnalysisType = Literal[
+    "pagerank", "weak_components", "strong_components", "degree_centrality"
+]
 
 
 class EdgeTableProperties(TypedDict):
     """Describes gathered information about an edge table."""
 
-    # Dictionary mapping all referenced tables to the referenced keys within that table
-    table_keys: Dict[str, Set[str]]
-
     # Keeps track of which tables are referenced in the _from column
     from_tables: Set[str]
 
     # Keeps track of which tables are referenced in the _to column
     to_tables: Set[str]
+
+
+class GraphDefinition(TypedDict):
+    """Describes the tables that make up a graph."""
+
+    edge_table: str
+
+    # All node tables of the graph, including those not referenced by any edge
+    node_tables: List[str]
+
+    from_tables: List[str]
+    to_tables: List[str]
@@ -4,10 +4,19 @@ from flasgger import swag_from
 from io import StringIO
 
 from multinet import util
+from multinet.db.models.table import parse_coordinates
 from multinet.db.models.workspace import Workspace
 from multinet.auth.util import require_writer
-from multinet.errors import AlreadyExists, FlaskTuple, ServerError
+from multinet.errors import (
+    AlreadyExists,
+    BadQueryArgument,
+    FlaskTuple,
+    ServerError,
+    ValidationFailed,
+)
+from multinet.types import UploadMode
 from multinet.util import decode_data
+from multinet.validation import TableTypeMismatch
 from multinet.validation.csv import validate_csv
 
 from flask import Blueprint, request
@@ -22,6 +31,14 @@ from typing import Any, List, Dict
 bp = Blueprint("csv", __name__)
 bp.before_request(util.require_db)
 
+# How rows with an already existing key are handled by the bulk import, per mode
+on_duplicate_map = {
+    "create": None,
+    "append": "ignore",
+    "upsert": "update",
+    "replace": "replace",
+}
+
 
 class CSVReadError(ServerError):
     """Exception for unprocessable CSV data."""
@@ -47,12 +64,17 @@ def set_table_key(rows: List[Dict[str, str]], key: str) -> List[Dict[str, str]]:
     {
         "key": webarg_fields.Str(location="query"),
         "overwrite": webarg_fields.Bool(location="query"),
+        "mode": webarg_fields.Str(location="query"),
     }
 )
 @require_writer
 @swag_from("swagger/csv.yaml")
 def upload(
-    workspace: str, table: str, key: str = "_key", overwrite: bool = False
+    workspace: str,
+    table: str,
+    key: str = "_key",
+    overwrite: bool = False,
+    mode: UploadMode = "create",
 ) -> Any:
     """
     Store a CSV file into the database as a node or edge table.
@@ -61,10 +83,19 @@ def upload(
     `table` - the target table
     `data` - the CSV data, passed in the request body. If the CSV data contains
              `_from` and `_to` fields, it will be treated as an edge table.
+    `mode` - how to treat an existing table. `create` requires that the table
+             doesn't exist. Otherwise, rows are added to the existing table, and
+             rows whose key already exists are skipped (`append`), merged into the
+             existing row (`upsert`), or replace the existing row (`replace`).
     """
+    allowed = list(on_duplicate_map.keys())
+    if mode not in allowed:
+        raise BadQueryArgument("mode", mode, allowed)
+
     loaded_workspace = Workspace(workspace)
+    table_exists = loaded_workspace.has_table(table)
 
-    if loaded_workspace.has_table(table):
+    if mode == "create" and table_exists:
         raise AlreadyExists("table", table)
 
     app.logger.info("Bulk Loading")
@@ -93,8 +124,38 @@ def upload(
     fieldnames = rows[0].keys()
     edges = "_from" in fieldnames and "_to" in fieldnames
 
-    # Create table and insert the data
-    loaded_table = loaded_workspace.create_table(table, edges)
-    results = loaded_table.insert(rows)
-
-    return {"count": len(results)}
+    # Create or retrieve the table, and insert the data
+    if table_exists:
+        loaded_table = loaded_workspace.table(table)
+        if loaded_table.is_edge_table() != edges:
+            raise ValidationFailed([TableTypeMismatch(table=table, edge=edges)])
+
+        # Coordinates must be numbers to be geo indexed
+        geo_attributes = loaded_table.geo_attributes()
+        if geo_attributes is not None:
+            rows = parse_coordinates(table, rows, geo_attributes)
+    else:
+        loaded_table = loaded_workspace.create_table(table, edges)
+
+    # Edges replaced or merged into leave their old endpoints, whose degrees
+    # change too
+    old_endpoints: List[str] = []
+    if edges and table_exists and on_duplicate_map[mode] in ("update", "replace"):
+        old_endpoints = loaded_table.endpoints(
+            row["_key"] for row in rows if "_key" in row
+        )
+
+    results = loaded_table.insert(rows, on_duplicate=on_duplicate_map[mode])
+
+    # Keep the degrees of nodes current in graphs using the edge table
+    if edges and table_exists:
+        endpoints = [row[endpoint] for row in rows for endpoint in ("_from", "_to")]
+        loaded_workspace.update_degrees(table, old_endpoints + endpoints)
+
+    return {
+        "count": results["created"],
+        "inserted": results["created"],
+        "updated": results["updated"],
+        "ignored": results["ignored"],
+        "errors": results["errors"],
+    }
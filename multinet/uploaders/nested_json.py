@@ -5,24 +5,28 @@ import json
 
 from multinet import util
 from multinet.db.models.workspace import Workspace
+from multinet.db.tree import add_tree_indexes, nested_set
 from multinet.auth.util import require_writer
 from multinet.errors import AlreadyExists
 
 from flask import Blueprint, request
+from webargs import fields as webarg_fields
+from webargs.flaskparser import use_kwargs
 
-from typing import Tuple, List, Any
+from typing import Any, Dict, List, Tuple
 
 bp = Blueprint("nested_json", __name__)
 bp.before_request(util.require_db)
 
 
 def analyze_nested_json(
-    raw_data: str, int_table_name: str, leaf_table_name: str
+    raw_data: str, int_table_name: str, leaf_table_name: str, index_tree: bool = False
 ) -> Tuple[List[List[dict]], List[dict]]:
     """
     Transform nested JSON data into MultiNet format.
 
     `data` - the text of a nested_json file
+    `index_tree` - whether to add the nested set interval and depth of each node
     `(nodes, edges)` - a node and edge table describing the tree.
     """
     ident = itertools.count(100)
@@ -40,10 +44,14 @@ def analyze_nested_json(
     nodes: List[List[dict]] = [[], []]
     edges = []
 
+    # The node record of each subtree, by object identity
+    records: Dict[int, dict] = {}
+
     def helper(tree: dict) -> None:
         # Grab the root node of the subtree, and the child nodes.
         root = keyed(tree.get("node_data", {}))
         children = tree.get("children", [])
+        records[id(tree)] = root
 
         # Capture the root node into one of two tables.
         if children:
@@ -73,19 +81,27 @@ def analyze_nested_json(
 
     # Kick off the analysis.
     helper(data)
+
+    if index_tree:
+        for subtree, attributes in nested_set(data, lambda t: t.get("children", [])):
+            records[id(subtree)].update(attributes)
+
     return (nodes, edges)
 
 
 @bp.route("/<workspace>/<graph>", methods=["POST"])
+@use_kwargs({"index_tree": webarg_fields.Bool(location="query")})
 @require_writer
 @swag_from("swagger/nested_json.yaml")
-def upload(workspace: str, graph: str) -> Any:
+def upload(workspace: str, graph: str, index_tree: bool = False) -> Any:
     """
     Store a nested_json tree into the database in coordinated node and edge tables.
 
     `workspace` - the target workspace.
     `graph` - the target graph.
     `data` - the nested_json data, passed in the request body.
+    `index_tree` - whether to store the nested set interval and depth of each
+                   node, which enable the tree queries of the graph API.
     """
     loaded_workspace = Workspace(workspace)
     if loaded_workspace.has_graph(graph):
@@ -115,13 +131,19 @@ def upload(workspace: str, graph: str) -> Any:
         leaf_nodetable = loaded_workspace.create_table(leaf_nodetable_name, edge=False)
 
     # Analyze the nested_json data into a node and edge table.
-    (nodes, edges) = analyze_nested_json(data, int_nodetable_name, leaf_nodetable_name)
+    (nodes, edges) = analyze_nested_json(
+        data, int_nodetable_name, leaf_nodetable_name, index_tree
+    )
 
     # Upload the data to the database.
     edgetable.insert(edges)
     int_nodetable.insert(nodes[0])
     leaf_nodetable.insert(nodes[1])
 
+    if index_tree:
+        add_tree_indexes(int_nodetable)
+        add_tree_indexes(leaf_nodetable)
+
     # Create graph
     loaded_workspace.create_graph(graph, edgetable_name)
 
@@ -4,6 +4,7 @@ import uuid
 import newick
 
 from multinet import util
+from multinet.db.tree import add_tree_indexes, nested_set
 from multinet.db.models.workspace import Workspace
 from multinet.auth.util import require_writer
 from multinet.errors import ValidationFailed, AlreadyExists
@@ -12,8 +13,10 @@ from multinet.validation import ValidationFailure, DuplicateKey
 
 from flask import Blueprint, request
 from flask import current_app as app
+from webargs import fields as webarg_fields
+from webargs.flaskparser import use_kwargs
 
-from typing import Any, Optional, List, Set, Tuple
+from typing import Any, Dict, Optional, List, Set, Tuple
 
 bp = Blueprint("newick", __name__)
 bp.before_request(util.require_db)
@@ -62,15 +65,18 @@ def validate_newick(tree: List[newick.Node]) -> None:
 
 
 @bp.route("/<workspace>/<graph>", methods=["POST"])
+@use_kwargs({"index_tree": webarg_fields.Bool(location="query")})
 @require_writer
 @swag_from("swagger/newick.yaml")
-def upload(workspace: str, graph: str) -> Any:
+def upload(workspace: str, graph: str, index_tree: bool = False) -> Any:
     """
     Store a newick tree into the database in coordinated node and edge tables.
 
     `workspace` - the target workspace.
     `graph` - the target graph.
     `data` - the newick data, passed in the request body.
+    `index_tree` - whether to store the nested set interval and depth of each
+                   node, which enable the tree queries of the graph API.
     """
     app.logger.info("newick tree")
 
@@ -97,32 +103,41 @@ def upload(workspace: str, graph: str) -> Any:
     else:
         nodetable = loaded_workspace.create_table(nodetable_name, edge=False)
 
-    edgecount = 0
-    nodecount = 0
+    nodes: List[Dict] = []
+    edges: List[Dict] = []
+
+    # The node document of each tree node, by object identity
+    docs: Dict[int, Dict] = {}
 
     def read_tree(parent: Optional[str], node: newick.Node) -> None:
-        nonlocal nodecount
-        nonlocal edgecount
         key = node.name or uuid.uuid4().hex
-        if not nodetable.row(key):
-            nodetable.insert([{"_key": key}])
-        nodecount = nodecount + 1
+        nodes.append({"_key": key})
+        docs[id(node)] = nodes[-1]
         for desc in node.descendants:
             read_tree(key, desc)
         if parent:
-            edgetable.insert(
-                [
-                    {
-                        "_from": f"{nodetable_name}/{parent}",
-                        "_to": f"{nodetable_name}/{key}",
-                        "length": node.length,
-                    }
-                ]
+            edges.append(
+                {
+                    "_from": f"{nodetable_name}/{parent}",
+                    "_to": f"{nodetable_name}/{key}",
+                    "length": node.length,
+                }
             )
-            edgecount += 1
 
     read_tree(None, tree[0])
 
+    if index_tree:
+        for node, attributes in nested_set(tree[0], lambda n: n.descendants):
+            docs[id(node)].update(attributes)
+
+    # Nodes already present in an existing node table keep their attributes, but
+    # are given the tree attributes of this tree
+    nodetable.insert(nodes, on_duplicate="update")
+    edgetable.insert(edges)
+
+    if index_tree:
+        add_tree_indexes(nodetable)
+
     loaded_workspace.create_graph(graph, edgetable_name)
 
-    return {"edgecount": edgecount, "nodecount": nodecount}
+    return {"edgecount": len(edges), "nodecount": len(nodes)}
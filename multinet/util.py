@@ -2,21 +2,29 @@
 import os
 import json
 import fnmatch
+import random
 
 from copy import deepcopy
 from functools import lru_cache
 from uuid import uuid1, uuid4
 from flask import Response, current_app
-from typing import Any, Generator, Dict, Set, List, Iterable
+from typing import Any, Generator, Dict, Set, List, Iterable, Tuple, TypeVar
 
 from multinet import db
 from multinet.db.models import workspace
 
-from multinet.errors import DatabaseNotLive, DecodeFailed, SecretKeyNotSet
+from multinet.errors import (
+    DatabaseNotLive,
+    DecodeFailed,
+    MalformedRequestBody,
+    SecretKeyNotSet,
+)
 
 TEST_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../test/data"))
 restricted_document_keys = {"_rev", "_id"}
 
+T = TypeVar("T")
+
 
 # TODO: Remove once permission storage is updated
 # https://github.com/multinet-app/multinet-server/issues/456
@@ -120,6 +128,50 @@ def decode_data(data: bytes) -> str:
     return body
 
 
+def generate_ndjson(lines: Iterable[bytes]) -> Generator[Any, None, None]:
+    """Parse newline delimited JSON with a generator, one value per line."""
+    for line in lines:
+        text = decode_data(line).strip()
+        if not text:
+            continue
+
+        try:
+            yield json.loads(text)
+        except json.JSONDecodeError:
+            raise MalformedRequestBody(text)
+
+
+def parse_value(raw_value: str) -> Any:
+    """Parse a query argument value as JSON if possible, or use it as a string."""
+    try:
+        return json.loads(raw_value)
+    except json.JSONDecodeError:
+        return raw_value
+
+
+def reservoir_sample(
+    items: Iterable[T], n: int, rng: random.Random
+) -> Tuple[int, List[T]]:
+    """
+    Return the number of `items`, and a uniform random sample of `n` of them.
+
+    The items are consumed in a single pass, keeping only the sample in memory.
+    """
+    count = 0
+    reservoir: List[T] = []
+    for item in items:
+        if count < n:
+            reservoir.append(item)
+        else:
+            index = rng.randrange(count + 1)
+            if index < n:
+                reservoir[index] = item
+
+        count += 1
+
+    return count, reservoir
+
+
 def data_path(file_name: str) -> str:
     """Load data from the test directory."""
     file_path = os.path.join(TEST_DATA_DIR, file_name)
@@ -16,6 +16,13 @@ class UnsupportedTable(ValidationFailure):
     """Unsupported table type when uploading a file."""
 
 
+class TableTypeMismatch(ValidationFailure):
+    """Uploaded data doesn't match the type (node or edge) of an existing table."""
+
+    table: str
+    edge: bool
+
+
 class UndefinedTable(ValidationFailure):
     """Undefined table referenced in an edge table when creating a graph."""
 
@@ -27,6 +34,23 @@ class UndefinedKeys(ValidationFailure):
 
     table: str
     keys: List[str]
+    count: int
+
+
+class AttributeConflict(ValidationFailure):
+    """Node table attribute that graph creation would overwrite."""
+
+    table: str
+    attribute: str
+
+
+class NonNumericCoordinates(ValidationFailure):
+    """Latitude or longitude values that aren't numbers."""
+
+    table: str
+    attribute: str
+    keys: List[str]
+    count: int
 
 
 class DuplicateKey(ValidationFailure):
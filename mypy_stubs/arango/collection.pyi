@@ -1,9 +1,10 @@
 from arango.cursor import Cursor  # type: ignore
 from arango.exceptions import ArangoError  # type: ignore
-from typing import Any, Optional, Dict, Union, List, Mapping
+from typing import Any, Optional, Dict, Union, List, Mapping, Sequence
 
 class Collection:
     def count(self) -> int: ...
+    def revision(self) -> str: ...
     def has(
         self, document: Any, rev: Optional[Any] = ..., check_rev: bool = ...
     ) -> bool: ...
@@ -16,7 +17,19 @@ class Collection:
         rev: Optional[str] = None,
         check_rev: bool = True,
     ) -> Dict: ...
+    def get_many(self, documents: Sequence[Union[Dict, str]]) -> List[Dict]: ...
     def random(self) -> Dict: ...
+    def add_persistent_index(
+        self,
+        fields: Sequence[str],
+        unique: Optional[bool] = ...,
+        sparse: Optional[bool] = ...,
+    ) -> Dict: ...
+    def add_geo_index(
+        self, fields: Sequence[str], ordered: Optional[bool] = ...
+    ) -> Dict: ...
+    def indexes(self) -> List[Dict]: ...
+    def delete_index(self, index_id: str, ignore_missing: bool = ...) -> bool: ...
 
 class StandardCollection(Collection):
     name: str
@@ -37,6 +50,17 @@ class StandardCollection(Collection):
         overwrite: bool = ...,
         return_old: bool = ...,
     ) -> List[Union[Dict, ArangoError]]: ...
+    def import_bulk(
+        self,
+        documents: Any,
+        halt_on_error: bool = ...,
+        details: bool = ...,
+        from_prefix: Optional[str] = ...,
+        to_prefix: Optional[str] = ...,
+        overwrite: Optional[bool] = ...,
+        on_duplicate: Optional[str] = ...,
+        sync: Optional[bool] = ...,
+    ) -> Dict: ...
     def delete(
         self,
         document: Union[Dict, str],
@@ -56,6 +80,25 @@ class StandardCollection(Collection):
         return_old: bool = ...,
         sync: Optional[Any] = ...,
     ) -> Dict: ...
+    def update_many(
+        self,
+        documents: Any,
+        check_rev: bool = ...,
+        merge: bool = ...,
+        keep_none: bool = ...,
+        return_new: bool = ...,
+        return_old: bool = ...,
+        sync: Optional[Any] = ...,
+        silent: bool = ...,
+    ) -> List[Union[Dict, ArangoError]]: ...
+    def delete_many(
+        self,
+        documents: Any,
+        return_old: bool = ...,
+        check_rev: bool = ...,
+        sync: Optional[Any] = ...,
+        silent: bool = ...,
+    ) -> List[Union[Dict, ArangoError]]: ...
     def properties(self) -> Dict: ...
     def rename(self, new_name: str) -> bool: ...
 
@@ -1,5 +1,9 @@
+class ArangoError(Exception): ...
 class DatabaseCreateError(Exception): ...
 class EdgeDefinitionCreateError(Exception): ...
 class AQLQueryValidateError(Exception): ...
 class AQLQueryExecuteError(Exception): ...
 class DocumentGetError(Exception): ...
+class DocumentInsertError(Exception): ...
+class DocumentRevisionError(Exception): ...
+class DocumentUpdateError(Exception): ...
@@ -4,8 +4,12 @@ class fields:
     @staticmethod
     def Int() -> Any: ...
     @staticmethod
-    def Str(required: bool = False, location: str = "json") -> Any: ...
+    def Float() -> Any: ...
     @staticmethod
-    def List(t: Any) -> Any: ...
+    def Str(
+        required: bool = False, location: str = "json", data_key: str = ...
+    ) -> Any: ...
+    @staticmethod
+    def List(t: Any, data_key: str = ...) -> Any: ...
     @staticmethod
     def Bool(required: bool = False, location: str = "json") -> Any: ...
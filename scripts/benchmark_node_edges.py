@@ -0,0 +1,146 @@
+"""
+Benchmark interpolated against parameterized node edge queries.
+
+Runs the same mixed-node workload twice against a graph: once with the node ID,
+edge table, offset and limit written into the query text, as node edge queries
+used to be built, and once with the shared query template and bind parameters
+that `Graph.node_edges` now uses.
+
+For each run, the script reports query latency, the number of distinct query
+texts (ArangoDB can only reuse a query plan for a query text it has seen before,
+so this bounds the plan reuse rate), and the hit rate of the AQL results cache.
+The results cache is switched to "demand" mode for the duration of the run,
+which requires the root database user.
+"""
+
+import json
+import random
+import statistics
+import time
+
+import click
+
+from multinet.db.models.graph import EDGES_TEMPLATE, edge_filter
+from multinet.db.models.workspace import Workspace
+from multinet.types import EdgeDirection
+
+from typing import Dict, List, Tuple
+
+DIRECTIONS: List[EdgeDirection] = ["all", "incoming", "outgoing"]
+
+
+def workload(
+    node_ids: List[str], requests: int, skew: float, seed: int
+) -> List[Tuple[str, EdgeDirection, int]]:
+    """
+    Return a list of (node ID, direction, offset) requests.
+
+    Nodes are drawn with Zipf-distributed popularity, so that a few nodes are
+    requested often and most nodes rarely, as when users browse a graph.
+    """
+    rng = random.Random(seed)
+    nodes = list(node_ids)
+    rng.shuffle(nodes)
+
+    weights = [1 / (rank + 1) ** skew for rank in range(len(nodes))]
+    picks = rng.choices(nodes, weights=weights, k=requests)
+
+    return [(node, rng.choice(DIRECTIONS), rng.choice([0, 0, 0, 30])) for node in picks]
+
+
+def interpolated_query(
+    edge_table: str, node: str, direction: EdgeDirection, offset: int
+) -> str:
+    """Return a node edges query with all values written into the query text."""
+    query = EDGES_TEMPLATE.format(
+        filter=edge_filter(direction, node=json.dumps(node)), sort="", expansions=""
+    )
+    query = query.replace("@@edges", f"`{edge_table}`")
+    query = query.replace("@offset", str(offset)).replace("@limit", "30")
+
+    return f'{query}\nRETURN {{"count": count, "edges": edges}}'
+
+
+def parameterized_query(
+    edge_table: str, node: str, direction: EdgeDirection, offset: int
+) -> Tuple[str, Dict]:
+    """Return a node edges query and its bind variables."""
+    query = EDGES_TEMPLATE.format(filter=edge_filter(direction), sort="", expansions="")
+    bind_vars = {"node": node, "@edges": edge_table, "offset": offset, "limit": 30}
+
+    return f'{query}\nRETURN {{"count": count, "edges": edges}}', bind_vars
+
+
+def run(workspace: Workspace, edge_table: str, requests: List, mode: str) -> Dict:
+    """Run `requests` in `mode`, and return latency and cache statistics."""
+    aql = workspace.handle.aql
+    aql.cache.clear()
+
+    texts = set()
+    latencies = []
+    cached = 0
+    for node, direction, offset in requests:
+        if mode == "interpolated":
+            query = interpolated_query(edge_table, node, direction, offset)
+            bind_vars: Dict = {}
+        else:
+            query, bind_vars = parameterized_query(edge_table, node, direction, offset)
+
+        start = time.perf_counter()
+        cursor = aql.execute(query, bind_vars=bind_vars, cache=True)
+        list(cursor)
+        latencies.append(time.perf_counter() - start)
+
+        texts.add(query)
+        cached += bool(cursor.cached())
+
+    latencies.sort()
+    return {
+        "requests": len(requests),
+        "query texts": len(texts),
+        "plan reuse bound": 1 - len(texts) / len(requests),
+        "result cache hit rate": cached / len(requests),
+        "mean ms": 1000 * statistics.mean(latencies),
+        "p50 ms": 1000 * latencies[len(latencies) // 2],
+        "p95 ms": 1000 * latencies[int(len(latencies) * 0.95)],
+    }
+
+
+@click.command()
+@click.argument("workspace")
+@click.argument("graph")
+@click.option("--requests", default=2000, help="Number of node edge queries per run.")
+@click.option("--skew", default=1.1, help="Zipf exponent of node popularity.")
+@click.option("--seed", default=0, help="Random seed for the workload.")
+def main(workspace: str, graph: str, requests: int, skew: float, seed: int) -> None:
+    """Benchmark node edge queries on GRAPH in WORKSPACE."""
+    loaded_workspace = Workspace(workspace)
+    loaded_graph = loaded_workspace.graph(graph)
+    edge_table = loaded_graph.edge_table()
+
+    node_ids = list(loaded_graph.node_ids())
+    if not node_ids:
+        raise click.ClickException(f"Graph {graph} has no nodes.")
+
+    plan = workload(node_ids, requests, skew, seed)
+
+    aql_cache = loaded_workspace.handle.aql.cache
+    previous_mode = aql_cache.properties()["mode"]
+    aql_cache.configure(mode="demand")
+    try:
+        results = {
+            mode: run(loaded_workspace, edge_table, plan, mode)
+            for mode in ("interpolated", "parameterized")
+        }
+    finally:
+        aql_cache.configure(mode=previous_mode)
+
+    click.echo(f"{len(node_ids)} nodes, {requests} requests, skew {skew}\n")
+    click.echo(f"{'':24}{'interpolated':>16}{'parameterized':>16}")
+    for metric in results["interpolated"]:
+        row = [results[mode][metric] for mode in ("interpolated", "parameterized")]
+        click.echo(f"{metric:24}" + "".join(f"{value:>16.3f}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """Pytest configurations for multinet tests."""
 
+import time
 import pytest
 from uuid import uuid4
 from contextlib import contextmanager
@@ -116,3 +117,32 @@ def populated_workspace(
     assert resp.status_code == 200
 
     return (managed_workspace, "miserables", "miserables_nodes", "miserables_links")
+
+
+@pytest.fixture
+def chain_graph(managed_workspace):
+    """Create the graph a -> b -> c, d, and return its workspace."""
+    nodes = managed_workspace.create_table("nodes", edge=False)
+    nodes.insert([{"_key": key} for key in "abcd"])
+
+    edges = managed_workspace.create_table("edges", edge=True)
+    edges.insert(
+        [{"_from": "nodes/a", "_to": "nodes/b"}, {"_from": "nodes/b", "_to": "nodes/c"}]
+    )
+
+    managed_workspace.create_graph("chain", "edges")
+    return managed_workspace
+
+
+def wait_for_job(server, workspace, job):
+    """Poll a job until it finishes, and return it."""
+    for _ in range(100):
+        resp = server.get(f"/api/workspaces/{workspace}/jobs/{job}")
+        assert resp.status_code == 200
+
+        if resp.json["status"] in ("succeeded", "failed"):
+            return resp.json
+
+        time.sleep(0.1)
+
+    raise AssertionError("job did not finish")
@@ -0,0 +1,93 @@
+"""Tests for background graph analytics jobs."""
+import conftest
+
+
+def test_analytics_attributes(chain_graph, managed_user, server):
+    """Test that analytics results are written to the analyzed nodes."""
+    url = f"/api/workspaces/{chain_graph.name}/graphs/chain/analytics"
+
+    with conftest.login(managed_user, server):
+        resp = server.post(f"{url}/degree_centrality", query_string={"attribute": "dc"})
+        assert resp.status_code == 200
+        assert resp.json["status"] in ("queued", "running", "succeeded")
+
+        job = conftest.wait_for_job(server, chain_graph.name, resp.json["id"])
+
+        jobs = server.get(f"/api/workspaces/{chain_graph.name}/jobs")
+        assert [listed["id"] for listed in jobs.json] == [job["id"]]
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["nodes"] == 4
+    assert job["result"]["written"] == 4
+
+    table = chain_graph.table("nodes")
+    assert table.row("nodes/b")["dc"] == 2 / 3
+    assert table.row("nodes/d")["dc"] == 0
+
+
+def test_analytics_pagerank_isolated(chain_graph, managed_user, server):
+    """Test that PageRank gives nodes without edges the rank spread over all nodes."""
+    url = f"/api/workspaces/{chain_graph.name}/graphs/chain/analytics"
+
+    with conftest.login(managed_user, server):
+        resp = server.post(f"{url}/pagerank")
+        job = conftest.wait_for_job(server, chain_graph.name, resp.json["id"])
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["written"] == 4
+
+    table = chain_graph.table("nodes")
+    ranks = {key: table.row(f"nodes/{key}")["pagerank"] for key in "abcd"}
+    assert abs(sum(ranks.values()) - 1) < 1e-6
+    assert ranks["d"] == ranks["a"] < ranks["b"] < ranks["c"]
+
+
+def test_analytics_attribute_conflict(chain_graph, managed_user, server):
+    """Test that analyses only overwrite the attributes of earlier analyses."""
+    url = f"/api/workspaces/{chain_graph.name}/graphs/chain/analytics"
+    chain_graph.table("nodes").update_rows([{"_key": "a", "label": "first"}])
+
+    with conftest.login(managed_user, server):
+        conflict = server.post(f"{url}/pagerank", query_string={"attribute": "label"})
+
+        first = server.post(f"{url}/pagerank")
+        conftest.wait_for_job(server, chain_graph.name, first.json["id"])
+        rerun = server.post(f"{url}/pagerank")
+        conftest.wait_for_job(server, chain_graph.name, rerun.json["id"])
+
+    assert conflict.status_code == 409
+    assert conflict.json == "label"
+    assert rerun.status_code == 200
+
+
+def test_analytics_table(chain_graph, managed_user, server):
+    """Test that analytics results can be written to a new table."""
+    url = f"/api/workspaces/{chain_graph.name}/graphs/chain/analytics"
+
+    with conftest.login(managed_user, server):
+        resp = server.post(f"{url}/strong_components", query_string={"table": "scc"})
+        job = conftest.wait_for_job(server, chain_graph.name, resp.json["id"])
+
+        existing = server.post(f"{url}/pagerank", query_string={"table": "scc"})
+        unknown = server.post(f"{url}/betweenness")
+
+    assert job["status"] == "succeeded"
+    assert existing.status_code == 409
+    assert unknown.status_code == 400
+
+    rows = chain_graph.table("scc").rows()["rows"]
+    assert sorted(row["node"] for row in rows) == [
+        "nodes/a",
+        "nodes/b",
+        "nodes/c",
+        "nodes/d",
+    ]
+    assert len({row["strong_components"] for row in rows}) == 4
+
+
+def test_missing_job(managed_workspace, managed_user, server):
+    """Test that requesting a nonexistent job is an error."""
+    with conftest.login(managed_user, server):
+        resp = server.get(f"/api/workspaces/{managed_workspace.name}/jobs/missing")
+
+    assert resp.status_code == 404
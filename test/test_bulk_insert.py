@@ -0,0 +1,43 @@
+"""Tests for batched bulk insertion into tables."""
+from multinet.db.bulk import batches
+
+
+def test_batches():
+    """Test that rows are split into batches of the requested size."""
+    rows = ({"_key": str(i)} for i in range(25))
+    sizes = [len(batch) for batch in batches(rows, 10)]
+
+    assert sizes == [10, 10, 5]
+    assert list(batches([], 10)) == []
+
+
+def test_batched_insert(managed_workspace):
+    """Test that inserting over several batches and workers inserts every row."""
+    table = managed_workspace.create_table("table", edge=False)
+    rows = ({"_key": str(i), "value": i} for i in range(25))
+
+    progress = []
+    result = table.insert(
+        rows, batch_size=10, workers=2, progress=lambda r: progress.append(dict(r))
+    )
+
+    assert result["created"] == 25
+    assert result["errors"] == 0
+    assert result["batch_errors"] == []
+    assert table.row_count() == 25
+
+    # One progress report per batch, with increasing totals
+    assert [p["created"] for p in progress][-1] == 25
+    assert len(progress) == 3
+
+
+def test_batched_insert_errors(managed_workspace):
+    """Test that failing rows are reported per batch, without halting the insert."""
+    table = managed_workspace.create_table("table", edge=False)
+    table.insert([{"_key": "3"}])
+
+    result = table.insert(({"_key": str(i)} for i in range(10)), batch_size=5)
+
+    assert result["created"] == 9
+    assert result["errors"] == 1
+    assert result["batch_errors"] == [{"batch": 0, "errors": 1, "message": ""}]
@@ -0,0 +1,52 @@
+"""Tests for revision-tagged caching."""
+from multinet.db.cache import CheckedCache, RevisionCache
+
+
+def test_revision_cache():
+    """Test that cached values are only returned at their revision."""
+    cache = RevisionCache(maxsize=2)
+    cache.set("a", ("t", "1"), 1)
+
+    assert cache.get("a", ("t", "1")) == 1
+    assert cache.get("a", ("t", "2")) is None
+    assert cache.get("b", ("t", "1")) is None
+
+
+def test_revision_cache_eviction():
+    """Test that the least recently used values are evicted first."""
+    cache = RevisionCache(maxsize=2)
+    cache.set("a", 1, "a")
+    cache.set("b", 1, "b")
+    cache.get("a", 1)
+    cache.set("c", 1, "c")
+
+    assert cache.get("a", 1) == "a"
+    assert cache.get("b", 1) is None
+    assert cache.get("c", 1) == "c"
+
+
+def test_checked_cache():
+    """Test that revisions are only checked once values are older than the TTL."""
+    revision = ["1"]
+    loads = []
+
+    def load():
+        loads.append(revision[0])
+        return f"value{revision[0]}"
+
+    cache = CheckedCache(ttl=3600)
+    assert cache.get("a", lambda: revision[0], load) == "value1"
+
+    # A change isn't seen within the TTL, unless the value is invalidated
+    revision[0] = "2"
+    assert cache.get("a", lambda: revision[0], load) == "value1"
+
+    cache.invalidate("a")
+    assert cache.get("a", lambda: revision[0], load) == "value2"
+
+    # Without a TTL, the revision is checked every time, but the value is only
+    # reloaded when it changes
+    cache = CheckedCache(ttl=0)
+    cache.get("a", lambda: revision[0], load)
+    cache.get("a", lambda: revision[0], load)
+    assert loads == ["1", "2", "2"]
@@ -143,3 +143,36 @@ def test_decode_failed():
     """Test that the DecodeFailed validation error is raised."""
     test_data = b"\xff\xfe_\x00k\x00e\x00y\x00,\x00n\x00a\x00m\x00e\x00\n"
     pytest.raises(DecodeFailed, decode_data, test_data)
+
+
+def test_upload_modes(server, managed_workspace, managed_user):
+    """Test that uploads to an existing table follow the requested mode."""
+    table_name = "startrek"
+    url = f"/api/csv/{managed_workspace.name}/{table_name}"
+    initial = "_key,name,rank\n0,picard,captain\n1,riker,commander\n"
+    changed = "_key,rank\n1,captain\n2,lieutenant commander\n"
+
+    with conftest.login(managed_user, server):
+        resp = server.post(url, data=initial)
+        assert resp.status_code == 200
+
+        resp = server.post(url, data=changed)
+        assert resp.status_code == 409
+
+        resp = server.post(url, data=changed, query_string={"mode": "append"})
+        assert resp.status_code == 200
+        assert resp.json["inserted"] == 1
+        assert resp.json["ignored"] == 1
+
+        resp = server.post(url, data=changed, query_string={"mode": "upsert"})
+        assert resp.status_code == 200
+        assert resp.json["inserted"] == 0
+        assert resp.json["updated"] == 2
+
+        resp = server.post(url, data=changed, query_string={"mode": "invalid"})
+        assert resp.status_code == 400
+
+    table = managed_workspace.table(table_name)
+    assert table.row_count() == 3
+    assert table.row("1")["name"] == "riker"
+    assert table.row("1")["rank"] == "captain"
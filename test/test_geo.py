@@ -0,0 +1,165 @@
+"""Tests for geospatial node queries."""
+import pytest
+
+import conftest
+
+from multinet.db.geo import GEO_STEP, box_polygons
+
+
+@pytest.fixture
+def airport_graph(managed_workspace):
+    """Create a graph of flights between airports, and return its workspace."""
+    airports = managed_workspace.create_table("airports", edge=False)
+    airports.insert(
+        [
+            {"_key": "CDG", "lat": 49.01, "lon": 2.55},
+            {"_key": "ORY", "lat": 48.73, "lon": 2.37},
+            {"_key": "LHR", "lat": 51.47, "lon": -0.45},
+            {"_key": "JFK", "lat": 40.64, "lon": -73.78},
+            {"_key": "SUV", "lat": -18.04, "lon": 178.56},
+            {"_key": "none"},
+        ]
+    )
+
+    flights = managed_workspace.create_table("flights", edge=True)
+    flights.insert(
+        [
+            {"_from": "airports/CDG", "_to": "airports/ORY"},
+            {"_from": "airports/CDG", "_to": "airports/JFK"},
+            {"_from": "airports/LHR", "_to": "airports/CDG"},
+        ]
+    )
+
+    managed_workspace.create_graph("flights", "flights")
+    return managed_workspace
+
+
+def test_box_polygons():
+    """Test that boxes are split into closed, finely segmented polygons."""
+    (polygon, start, end, closed), = box_polygons(40, -10, 50, 10)
+    ring = polygon["coordinates"][0]
+
+    assert (start, end, closed) == (-10, 10, True)
+    assert ring[0] == ring[-1]
+    assert all(abs(a[0] - b[0]) <= GEO_STEP for a, b in zip(ring, ring[1:]))
+    assert min(lat for _, lat in ring) < 40 and max(lat for _, lat in ring) > 50
+
+    crossing = box_polygons(-20, 170, -10, -170)
+    assert [(start, end) for _, start, end, _ in crossing] == [(170, 180), (-180, -170)]
+
+    wide = box_polygons(-10, -180, 10, 180)
+    assert len(wide) == 4
+    assert [closed for *_, closed in wide] == [False, False, False, True]
+
+
+def test_geo_queries(airport_graph, managed_user, server):
+    """Test declaring geo columns, and querying nodes by location."""
+    workspace = airport_graph.name
+    table_url = f"/api/workspaces/{workspace}/tables/airports/geo"
+    url = f"/api/workspaces/{workspace}/graphs/flights/geo"
+
+    with conftest.login(managed_user, server):
+        undeclared = server.get(
+            f"{url}/nearest", query_string={"latitude": 0, "longitude": 0}
+        )
+        declared = server.put(
+            table_url, query_string={"latitude": "lat", "longitude": "lon"}
+        )
+        attributes = server.get(table_url)
+
+        box = server.get(
+            f"{url}/box",
+            query_string={
+                "south": 45,
+                "west": -5,
+                "north": 55,
+                "east": 5,
+                "edges": True,
+            },
+        )
+        crossing = server.get(
+            f"{url}/box",
+            query_string={"south": -20, "west": 170, "north": 0, "east": -170},
+        )
+        radius = server.get(
+            f"{url}/radius",
+            query_string={"latitude": 48.86, "longitude": 2.35, "radius": 50000},
+        )
+        nearest = server.get(
+            f"{url}/nearest",
+            query_string={"latitude": 48.86, "longitude": 2.35, "k": 3, "edges": True},
+        )
+        invalid = server.get(
+            f"{url}/radius", query_string={"latitude": 91, "longitude": 0, "radius": 1}
+        )
+        missing = server.get(f"{url}/box", query_string={"south": 0})
+
+    assert undeclared.status_code == 400
+    assert declared.status_code == 200
+    assert attributes.json == {
+        "table": "airports",
+        "latitude": "lat",
+        "longitude": "lon",
+    }
+
+    assert sorted(node["id"] for node in box.json["nodes"]) == ["CDG", "LHR", "ORY"]
+    assert len(box.json["links"]) == 2
+
+    assert [node["id"] for node in crossing.json["nodes"]] == ["SUV"]
+    assert crossing.json["links"] == []
+
+    assert sorted(node["id"] for node in radius.json["nodes"]) == ["CDG", "ORY"]
+
+    assert [node["id"] for node in nearest.json["nodes"]] == ["ORY", "CDG", "LHR"]
+    assert len(nearest.json["links"]) == 2
+
+    assert invalid.status_code == 400
+    assert missing.status_code == 400
+
+
+def test_csv_geo_columns(managed_workspace, managed_user, server):
+    """Test that CSV coordinates are stored as numbers once geo columns are declared."""
+    workspace = managed_workspace.name
+    csv_url = f"/api/csv/{workspace}/airports"
+    table_url = f"/api/workspaces/{workspace}/tables/airports/geo"
+
+    with conftest.login(managed_user, server):
+        resp = server.post(
+            csv_url, data="_key,lat,lon\nCDG,49.01,2.55\nORY,north,2.37\nJFK,,\n"
+        )
+        assert resp.status_code == 200
+
+        invalid = server.put(
+            table_url, query_string={"latitude": "lat", "longitude": "lon"}
+        )
+        managed_workspace.table("airports").update_rows(
+            [{"_key": "ORY", "lat": "48.73"}]
+        )
+        declared = server.put(
+            table_url, query_string={"latitude": "lat", "longitude": "lon"}
+        )
+
+        appended = server.post(
+            csv_url,
+            data="_key,lat,lon\nLHR,51.47,-0.45\n",
+            query_string={"mode": "append"},
+        )
+        rejected = server.post(
+            csv_url,
+            data="_key,lat,lon\nSUV,south,178.56\n",
+            query_string={"mode": "append"},
+        )
+
+    assert invalid.status_code == 400
+    (error,) = invalid.json["errors"]
+    assert (error["attribute"], error["keys"], error["count"]) == ("lat", ["ORY"], 1)
+
+    assert declared.status_code == 200
+    assert appended.status_code == 200
+    assert rejected.status_code == 400
+
+    airports = managed_workspace.table("airports")
+    assert (airports.row("ORY")["lat"], airports.row("ORY")["lon"]) == (48.73, 2.37)
+    assert airports.row("LHR")["lon"] == -0.45
+    assert "lat" not in airports.row("JFK")
+    assert airports.row("SUV") is None
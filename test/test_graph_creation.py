@@ -0,0 +1,60 @@
+"""Tests for validation performed when creating a graph."""
+import pytest
+
+from multinet.errors import ValidationFailed
+from multinet.validation import UndefinedKeys, UndefinedTable
+
+
+def test_undefined_keys(managed_workspace):
+    """Test that dangling edge references are reported, capped to a limit."""
+    nodes = managed_workspace.create_table("nodes", edge=False)
+    nodes.insert([{"_key": "0"}, {"_key": "1"}])
+
+    edges = managed_workspace.create_table("edges", edge=True)
+    edges.insert(
+        [
+            {"_from": "nodes/0", "_to": "nodes/1"},
+            {"_from": "nodes/0", "_to": "nodes/2"},
+            {"_from": "nodes/3", "_to": "nodes/4"},
+            {"_from": "nodes/4", "_to": "nodes/1"},
+        ]
+    )
+
+    with pytest.raises(ValidationFailed) as v_error:
+        managed_workspace.validate_edge_table("edges", max_undefined_keys=2)
+
+    errors = v_error.value.errors
+    assert len(errors) == 1
+
+    error = errors[0]
+    assert error["type"] == UndefinedKeys.schema()["title"]
+    assert error["table"] == "nodes"
+    assert error["count"] == 3
+    assert len(error["keys"]) == 2
+    assert set(error["keys"]) <= {"2", "3", "4"}
+
+
+def test_undefined_table(managed_workspace):
+    """Test that references to a nonexistent table are reported."""
+    managed_workspace.create_table("nodes", edge=False).insert([{"_key": "0"}])
+
+    edges = managed_workspace.create_table("edges", edge=True)
+    edges.insert([{"_from": "nodes/0", "_to": "missing/0"}])
+
+    with pytest.raises(ValidationFailed) as v_error:
+        managed_workspace.create_graph("graph", "edges")
+
+    assert v_error.value.errors == [UndefinedTable(table="missing").dict()]
+    assert not managed_workspace.has_graph("graph")
+
+
+def test_valid_edge_table(managed_workspace):
+    """Test that a consistent edge table produces the referenced tables."""
+    managed_workspace.create_table("members", edge=False).insert([{"_key": "0"}])
+    managed_workspace.create_table("clubs", edge=False).insert([{"_key": "0"}])
+
+    edges = managed_workspace.create_table("membership", edge=True)
+    edges.insert([{"_from": "members/0", "_to": "clubs/0"}])
+
+    properties = managed_workspace.validate_edge_table("membership")
+    assert properties == {"from_tables": {"members"}, "to_tables": {"clubs"}}
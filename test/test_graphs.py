@@ -0,0 +1,520 @@
+"""Tests for graph endpoints."""
+import pytest
+
+import conftest
+
+from multinet.db.models import graph
+from multinet.errors import ValidationFailed
+
+
+@pytest.fixture
+def membership_graph(managed_workspace):
+    """Create a graph spanning two node tables, and return its workspace."""
+    members = managed_workspace.create_table("members", edge=False)
+    members.insert([{"_key": str(i), "name": f"member{i}"} for i in range(3)])
+
+    clubs = managed_workspace.create_table("clubs", edge=False)
+    clubs.insert([{"_key": str(i), "name": f"club{i}"} for i in range(2)])
+
+    membership = managed_workspace.create_table("membership", edge=True)
+    membership.insert(
+        [
+            {"_from": "members/0", "_to": "clubs/0", "year": 2000},
+            {"_from": "members/1", "_to": "clubs/0", "year": 2005},
+            {"_from": "members/1", "_to": "clubs/1", "year": 2010},
+            {"_from": "members/2", "_to": "clubs/1", "year": 2015},
+        ]
+    )
+
+    managed_workspace.create_graph("membership", "membership")
+    return managed_workspace
+
+
+def test_graph_nodes_pagination(membership_graph, managed_user, server):
+    """Test that node pages span node tables without gaps or duplicates."""
+    url = f"/api/workspaces/{membership_graph.name}/graphs/membership/nodes"
+
+    pages = []
+    with conftest.login(managed_user, server):
+        for offset in range(0, 6, 2):
+            resp = server.get(url, query_string={"offset": offset, "limit": 2})
+            assert resp.status_code == 200
+            assert resp.json["count"] == 5
+            pages.append([node["_id"] for node in resp.json["nodes"]])
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+    ids = [node for page in pages for node in page]
+    assert len(set(ids)) == 5
+    assert ids[:2] == ["clubs/0", "clubs/1"]
+
+
+def test_node_neighborhood(membership_graph, managed_user, server):
+    """Test that neighborhoods contain the nodes and edges within range."""
+    url = (
+        f"/api/workspaces/{membership_graph.name}/graphs/membership"
+        "/nodes/members/0/neighborhood"
+    )
+
+    with conftest.login(managed_user, server):
+        one_hop = server.get(url)
+        two_hops = server.get(url, query_string={"depth": 2})
+        outgoing = server.get(url, query_string={"depth": 2, "direction": "outgoing"})
+        limited = server.get(url, query_string={"depth": 3, "limit": 2})
+        too_deep = server.get(url, query_string={"depth": 100})
+
+    assert one_hop.status_code == 200
+    assert {node["_id"] for node in one_hop.json["nodes"]} == {"members/0", "clubs/0"}
+    assert one_hop.json["links"][0]["source"] == "members/0"
+    assert one_hop.json["links"][0]["target"] == "clubs/0"
+
+    assert {node["_id"] for node in two_hops.json["nodes"]} == {
+        "members/0",
+        "members/1",
+        "clubs/0",
+    }
+    assert len(two_hops.json["links"]) == 2
+
+    assert len(outgoing.json["nodes"]) == 2
+    assert len(limited.json["nodes"]) == 2
+    assert too_deep.status_code == 400
+
+
+def test_batch_node_lookups(membership_graph, managed_user, server):
+    """Test that attributes and edges can be fetched for many nodes at once."""
+    url = f"/api/workspaces/{membership_graph.name}/graphs/membership/nodes"
+    nodes = ["members/1", "clubs/0", "members/missing"]
+
+    with conftest.login(managed_user, server):
+        attributes = server.post(f"{url}/attributes", json=nodes)
+        edges = server.post(f"{url}/edges", json=nodes)
+        outgoing = server.post(
+            f"{url}/edges", json=nodes, query_string={"direction": "outgoing"}
+        )
+        malformed = server.post(f"{url}/edges", json={"nodes": nodes})
+        too_large = server.post(f"{url}/attributes", json=["members/0"] * 1001)
+
+    assert attributes.status_code == 200
+    assert attributes.json["members/1"]["name"] == "member1"
+    assert attributes.json["clubs/0"]["name"] == "club0"
+    assert attributes.json["members/missing"] is None
+
+    assert edges.status_code == 200
+    assert edges.json["members/1"]["count"] == 2
+    assert edges.json["clubs/0"]["count"] == 2
+    assert edges.json["members/missing"] == {"count": 0, "edges": []}
+    assert outgoing.json["clubs/0"]["count"] == 0
+
+    assert malformed.status_code == 400
+    assert too_large.status_code == 400
+
+
+def test_node_degree_and_neighbors(membership_graph, managed_user, server):
+    """Test that node degrees and neighbors reflect the graph's edges."""
+    url = f"/api/workspaces/{membership_graph.name}/graphs/membership/nodes/members/1"
+
+    with conftest.login(managed_user, server):
+        degree = server.get(f"{url}/degree")
+        in_degree = server.get(f"{url}/degree", query_string={"direction": "incoming"})
+        missing = server.get(f"{url}0/degree")
+        neighbors = server.get(f"{url}/neighbors")
+        two_hops = server.get(f"{url}/neighbors", query_string={"depth": 2})
+
+    assert degree.json == {"degree": 2}
+    assert in_degree.json == {"degree": 0}
+    assert missing.status_code == 404
+    assert set(neighbors.json) == {"clubs/0", "clubs/1"}
+    assert set(two_hops.json) == {"clubs/0", "clubs/1", "members/0", "members/2"}
+
+
+def test_graph_stats(membership_graph, managed_user, server):
+    """Test that graph statistics describe the graph."""
+    membership_graph.table("members").insert([{"_key": "lonely"}])
+    url = f"/api/workspaces/{membership_graph.name}/graphs/membership/stats"
+
+    with conftest.login(managed_user, server):
+        resp = server.get(url)
+
+    assert resp.status_code == 200
+
+    stats = resp.json
+    assert stats["node_count"] == 6
+    assert stats["edge_count"] == 4
+    assert stats["node_tables"] == {"clubs": 2, "members": 4}
+    assert stats["self_loops"] == 0
+    assert stats["multi_edges"] == {"pairs": 0, "edges": 0}
+    assert stats["degree"]["distribution"] == [[0, 1], [1, 2], [2, 3]]
+    assert stats["components"]["count"] == 2
+    assert stats["components"]["sizes"] == [5, 1]
+
+    # Changing a table invalidates the cached statistics
+    membership_graph.table("membership").insert(
+        [{"_from": "members/0", "_to": "members/0"}]
+    )
+
+    with conftest.login(managed_user, server):
+        resp = server.get(url)
+
+    assert resp.json["self_loops"] == 1
+
+
+def test_graph_paths(membership_graph, managed_user, server):
+    """Test that shortest paths are found between two nodes."""
+    url = f"/api/workspaces/{membership_graph.name}/graphs/membership/paths"
+    query = {"source": "members/0", "target": "members/2", "direction": "all"}
+
+    with conftest.login(managed_user, server):
+        shortest = server.get(url, query_string=query)
+        weighted = server.get(url, query_string={**query, "k": 2, "weight": "year"})
+        outgoing = server.get(url, query_string={**query, "direction": "outgoing"})
+        missing = server.get(url, query_string={"source": "members/0"})
+
+    assert shortest.status_code == 200
+    assert len(shortest.json) == 1
+    assert shortest.json[0]["vertices"] == [
+        "members/0",
+        "clubs/0",
+        "members/1",
+        "clubs/1",
+        "members/2",
+    ]
+    assert shortest.json[0]["weight"] == 4
+
+    assert len(weighted.json) == 1
+    assert weighted.json[0]["weight"] == 2000 + 2005 + 2010 + 2015
+
+    assert outgoing.json == []
+    assert missing.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "strategy", ["random_node", "snowball", "forest_fire", "random_walk"]
+)
+def test_graph_sample(membership_graph, managed_user, server, strategy):
+    """Test that node sampling strategies return induced subgraphs of the size asked."""
+    url = f"/api/workspaces/{membership_graph.name}/graphs/membership/sample"
+    params = {"strategy": strategy, "size": 3, "seed": 1, "start": "members/1"}
+
+    with conftest.login(managed_user, server):
+        first = server.get(url, query_string=params)
+        second = server.get(url, query_string=params)
+
+    assert first.status_code == 200
+    assert first.json == second.json
+    assert len(first.json["nodes"]) == 3
+
+    ids = {node["_id"] for node in first.json["nodes"]}
+    for link in first.json["links"]:
+        assert link["source"] in ids and link["target"] in ids
+
+
+@pytest.mark.parametrize("strategy", ["snowball", "forest_fire", "random_walk"])
+def test_graph_sample_isolated(chain_graph, managed_user, server, strategy):
+    """Test that exploring strategies can sample nodes without any edges."""
+    url = f"/api/workspaces/{chain_graph.name}/graphs/chain/sample"
+    params = {"strategy": strategy, "size": 10, "seed": 1, "start": "nodes/a"}
+
+    with conftest.login(managed_user, server):
+        resp = server.get(url, query_string=params)
+
+    assert resp.status_code == 200
+    assert sorted(node["_key"] for node in resp.json["nodes"]) == ["a", "b", "c", "d"]
+
+
+def test_graph_edge_sample(membership_graph, managed_user, server):
+    """Test that edge sampling returns the sampled edges and their endpoints."""
+    url = f"/api/workspaces/{membership_graph.name}/graphs/membership/sample"
+
+    with conftest.login(managed_user, server):
+        resp = server.get(url, query_string={"strategy": "random_edge", "size": 2})
+        bad = server.get(url, query_string={"strategy": "bogus"})
+
+    assert resp.status_code == 200
+    assert len(resp.json["links"]) == 2
+
+    ids = {node["_id"] for node in resp.json["nodes"]}
+    assert ids == {
+        endpoint
+        for link in resp.json["links"]
+        for endpoint in (link["source"], link["target"])
+    }
+
+    assert bad.status_code == 400
+
+
+def test_graph_aggregate(membership_graph, managed_user, server, monkeypatch):
+    """Test that nodes are grouped across tables, with edges counted between groups."""
+    url = f"/api/workspaces/{membership_graph.name}/graphs/membership/aggregate"
+
+    with conftest.login(managed_user, server):
+        resp = server.get(url, query_string={"by": "_key", "weight": "year"})
+        missing = server.get(url)
+
+        monkeypatch.setattr(graph, "MAX_AGGREGATE_GROUPS", 3)
+        truncated = server.get(url, query_string={"by": "_key"})
+
+    assert resp.status_code == 200
+    assert sorted((g["group"], g["count"]) for g in resp.json["nodes"]) == [
+        ("0", 2),
+        ("1", 2),
+        ("2", 1),
+    ]
+    assert sorted(
+        (e["source"], e["target"], e["count"], e["weight"]) for e in resp.json["edges"]
+    ) == [
+        ("0", "0", 1, 2000),
+        ("1", "0", 1, 2005),
+        ("1", "1", 1, 2010),
+        ("2", "1", 1, 2015),
+    ]
+    assert resp.json["edges_truncated"] is False
+
+    assert len(truncated.json["edges"]) == 3
+    assert truncated.json["edges_truncated"] is True
+
+    assert missing.status_code == 400
+
+
+def test_node_edges_expand(membership_graph, managed_user, server):
+    """Test that neighbor and edge documents are included in node edges on request."""
+    url = (
+        f"/api/workspaces/{membership_graph.name}/graphs/membership"
+        "/nodes/members/1/edges"
+    )
+
+    with conftest.login(managed_user, server):
+        plain = server.get(url)
+        expanded = server.get(url, query_string={"expand": "neighbors,edges"})
+        projected = server.get(
+            url, query_string={"expand": "neighbors,edges", "fields": "year"}
+        )
+        bad = server.get(url, query_string={"expand": "everything"})
+
+    assert plain.json["count"] == 2
+    assert "neighbor" not in plain.json["edges"][0]
+
+    neighbors = sorted(e["neighbor"]["name"] for e in expanded.json["edges"])
+    assert neighbors == ["club0", "club1"]
+    assert all(e["edge_data"]["_from"] == "members/1" for e in expanded.json["edges"])
+
+    for edge in projected.json["edges"]:
+        assert set(edge["neighbor"]) == {"_id", "_key"}
+        assert set(edge["edge_data"]) == {"_id", "_key", "_from", "_to", "year"}
+
+    assert bad.status_code == 400
+
+
+def test_node_edges_filter_sort(membership_graph, managed_user, server):
+    """Test that node edges can be filtered and sorted by edge attributes."""
+    membership_graph.table("membership").add_vertex_centric_indexes("year")
+    url = (
+        f"/api/workspaces/{membership_graph.name}/graphs/membership"
+        "/nodes/clubs/1/edges"
+    )
+
+    with conftest.login(managed_user, server):
+        ascending = server.get(url, query_string={"sort": "year"})
+        descending = server.get(url, query_string={"sort": "-year"})
+        filtered = server.get(url, query_string={"filter": ["year>2010"]})
+        bad = server.get(url, query_string={"filter": "year~2010"})
+
+    assert [e["from"] for e in ascending.json["edges"]] == ["members/1", "members/2"]
+    assert [e["from"] for e in descending.json["edges"]] == ["members/2", "members/1"]
+
+    assert filtered.json["count"] == 1
+    assert filtered.json["edges"][0]["from"] == "members/2"
+
+    assert bad.status_code == 400
+
+
+def test_subgraph(chain_graph, managed_user, server):
+    """Test retrieving the subgraph induced by node predicates."""
+    url = f"/api/workspaces/{chain_graph.name}/graphs/chain/subgraph"
+
+    with conftest.login(managed_user, server):
+        whole = server.get(url)
+        induced = server.get(url, query_string={"where": ["nodes._key<=b"]})
+        malformed = server.get(url, query_string={"where": "_key==a"})
+        missing = server.get(url, query_string={"where": "missing._key==a"})
+
+    assert len(whole.json["nodes"]) == 4
+    assert len(whole.json["links"]) == 2
+
+    assert sorted(node["_key"] for node in induced.json["nodes"]) == ["a", "b"]
+    assert [(link["source"], link["target"]) for link in induced.json["links"]] == [
+        ("nodes/a", "nodes/b")
+    ]
+
+    assert malformed.status_code == 400
+    assert missing.status_code == 404
+
+
+def test_attribute_filters():
+    """Test that filter values are converted to the stored type of each attribute."""
+    types = {"name": "string", "year": "number"}
+    bind_vars = {}
+
+    conditions = graph.attribute_filters(
+        "n",
+        [("name", "==", "2010"), ("year", ">", "2010"), ("missing", "==", "true")],
+        bind_vars,
+        types.get,
+    )
+
+    assert conditions == [
+        "n[@filter0] == @filter0_value",
+        "n[@filter1] > @filter1_value",
+        "n[@filter2] == @filter2_value",
+    ]
+    assert bind_vars["filter0_value"] == "2010"
+    assert bind_vars["filter1_value"] == 2010
+    assert bind_vars["filter2_value"] is True
+
+
+def test_subgraph_string_values(membership_graph, managed_user, server):
+    """Test that predicates compare stored strings as strings."""
+    url = f"/api/workspaces/{membership_graph.name}/graphs/membership/subgraph"
+
+    with conftest.login(managed_user, server):
+        resp = server.get(url, query_string={"where": ["members._key<=1"]})
+
+    assert sorted(
+        node["_id"] for node in resp.json["nodes"] if node["_id"].startswith("members")
+    ) == ["members/0", "members/1"]
+
+
+def test_degree_attributes(chain_graph, managed_user, server):
+    """Test that node degrees are stored at creation, and kept current."""
+    workspace = chain_graph.name
+    url = f"/api/workspaces/{workspace}/graphs/chain/nodes"
+    sort = {"sort": "-degree:chain", "limit": 2}
+
+    edge = next(chain_graph.table("edges").handle.find({"_from": "nodes/a"}))
+
+    with conftest.login(managed_user, server):
+        before = server.get(url, query_string=sort)
+        resp = server.post(
+            f"/api/csv/{workspace}/edges",
+            data="_from,_to\nnodes/d,nodes/c\nnodes/a,nodes/c\n",
+            query_string={"mode": "append"},
+        )
+        assert resp.status_code == 200
+        after = server.get(url, query_string=sort)
+
+        resp = server.delete(
+            f"/api/workspaces/{workspace}/tables/edges/rows", data=f'"{edge["_key"]}"\n'
+        )
+        assert resp.status_code == 200
+        deleted = server.get(url, query_string=sort)
+
+    assert before.json["count"] == 4
+    assert [node["_key"] for node in before.json["nodes"]][0] == "b"
+    assert before.json["nodes"][0]["in_degree:chain"] == 1
+    assert before.json["nodes"][0]["out_degree:chain"] == 1
+    assert "degree" not in before.json["nodes"][0]
+
+    top = after.json["nodes"][0]
+    assert top["_key"] == "c"
+    kinds = ["in_degree", "out_degree", "degree"]
+    assert [top[f"{kind}:chain"] for kind in kinds] == [3, 0, 3]
+
+    # Deleting the edge a -> b leaves b with a single edge
+    assert deleted.json["nodes"][0]["degree:chain"] == 3
+    assert chain_graph.table("nodes").row("b")["degree:chain"] == 1
+
+
+def test_degree_attributes_moved_edges(chain_graph, managed_user, server):
+    """Test that both the old and new endpoints of changed edges are updated."""
+    workspace = chain_graph.name
+    edges = chain_graph.table("edges")
+    first = next(edges.handle.find({"_from": "nodes/a"}))["_key"]
+    second = next(edges.handle.find({"_from": "nodes/b"}))["_key"]
+
+    with conftest.login(managed_user, server):
+        # b -> c becomes b -> d
+        resp = server.patch(
+            f"/api/workspaces/{workspace}/tables/edges/rows",
+            data=f'{{"_key": "{second}", "_to": "nodes/d"}}\n',
+        )
+        assert resp.status_code == 200
+
+        # a -> b is replaced by c -> d
+        resp = server.post(
+            f"/api/csv/{workspace}/edges",
+            data=f"_key,_from,_to\n{first},nodes/c,nodes/d\n",
+            query_string={"mode": "replace"},
+        )
+        assert resp.status_code == 200
+
+    nodes = chain_graph.table("nodes")
+    degrees = {key: nodes.row(key)["degree:chain"] for key in "abcd"}
+    assert degrees == {"a": 0, "b": 1, "c": 1, "d": 2}
+
+
+def test_degree_attributes_per_graph(chain_graph):
+    """Test that graphs sharing node tables keep their own degrees."""
+    reversed_edges = chain_graph.create_table("reversed", edge=True)
+    reversed_edges.insert([{"_from": "nodes/c", "_to": "nodes/a"}])
+    chain_graph.create_graph("reversed", "reversed")
+
+    node = chain_graph.table("nodes").row("a")
+    assert (node["out_degree:chain"], node["in_degree:reversed"]) == (1, 1)
+
+    # Existing attributes aren't overwritten
+    chain_graph.table("nodes").update_rows([{"_key": "d", "degree:conflict": 5}])
+    with pytest.raises(ValidationFailed):
+        chain_graph.create_graph("conflict", "reversed")
+
+    assert chain_graph.table("nodes").row("d")["degree:conflict"] == 5
+
+
+def test_graph_timeslice(managed_workspace, managed_user, server):
+    """Test slicing a graph by edge time, and the delta between two slices."""
+    nodes = managed_workspace.create_table("nodes", edge=False)
+    nodes.insert([{"_key": key} for key in "abc"])
+
+    edges = managed_workspace.create_table("edges", edge=True)
+    edges.insert(
+        [
+            {"_from": "nodes/a", "_to": "nodes/b", "year": 2000},
+            {"_from": "nodes/b", "_to": "nodes/c", "year": 2001},
+        ]
+    )
+    managed_workspace.create_graph("chain", "edges")
+
+    url = f"/api/workspaces/{managed_workspace.name}/graphs/chain"
+    with conftest.login(managed_user, server):
+        untimed = server.get(f"{url}/time")
+        conflicting = server.put(
+            f"{url}/time", query_string={"time": "year", "end": "x"}
+        )
+        declared = server.put(f"{url}/time", query_string={"time": "year"})
+        attributes = server.get(f"{url}/time")
+
+        timeslice = server.get(
+            f"{url}/timeslice", query_string={"start": 2000, "end": 2001}
+        )
+        delta = server.get(
+            f"{url}/timeslice",
+            query_string={
+                "start": 2001,
+                "end": 2002,
+                "previous_start": 2000,
+                "previous_end": 2001,
+            },
+        )
+        missing = server.get(f"{url}/timeslice", query_string={"start": 2000})
+
+    assert untimed.status_code == 400
+    assert conflicting.status_code == 400
+    assert declared.status_code == 200
+    assert attributes.json == declared.json
+    assert attributes.json["time"] == "year"
+
+    assert sorted(node["_key"] for node in timeslice.json["nodes"]) == ["a", "b"]
+    assert [link["year"] for link in timeslice.json["links"]] == [2000]
+
+    assert [link["year"] for link in delta.json["added"]] == [2001]
+    assert [link["year"] for link in delta.json["removed"]] == [2000]
+
+    assert missing.status_code == 400
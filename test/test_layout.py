@@ -0,0 +1,60 @@
+"""Tests for server-side graph layouts."""
+import math
+import random
+from array import array
+
+import numpy as np
+
+import conftest
+
+from multinet.db.layout import force_directed
+from multinet.db.snapshot import GraphSnapshot
+
+
+def test_force_directed():
+    """Test that layouts are reproducible, and keep adjacent nodes close."""
+    ids = ["t/a", "t/b", "t/c", "t/d"]
+    snapshot = GraphSnapshot("1", ids, array("i", [0, 2]), array("i", [1, 3]))
+
+    xs, ys = force_directed(snapshot, 1, 50, random.Random(0))
+    again = force_directed(snapshot, 1, 50, random.Random(0))
+    assert np.array_equal(xs, again[0]) and np.array_equal(ys, again[1])
+    assert len(xs) == len(ys) == 5
+
+    def distance(a, b):
+        return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    assert distance(0, 1) < distance(0, 2)
+    assert distance(2, 3) < distance(1, 3)
+
+
+def test_layout_download(chain_graph, managed_user, server):
+    """Test that computed positions are included in graph downloads."""
+    workspace = chain_graph.name
+    url = f"/api/workspaces/{workspace}/graphs/chain/layouts"
+
+    with conftest.login(managed_user, server):
+        resp = server.post(url, query_string={"seed": 1})
+        assert resp.status_code == 200
+        layout = resp.json["id"]
+
+        job = conftest.wait_for_job(server, workspace, resp.json["job"])
+        assert job["status"] == "succeeded"
+
+        status = server.get(f"{url}/{layout}")
+        repeated = server.post(url, query_string={"seed": 1})
+        download = server.get(
+            f"/api/workspaces/{workspace}/graphs/chain/download",
+            query_string={"layout": layout},
+        )
+        missing = server.get(f"{url}/missing")
+
+    assert status.json["stale"] is False
+    assert status.json["nodes"] == 4
+    assert repeated.json["job"] == job["id"]
+
+    nodes = download.json["nodes"]
+    assert len(nodes) == 4
+    assert all("x" in node and "y" in node for node in nodes)
+
+    assert missing.status_code == 404
@@ -0,0 +1,119 @@
+"""Tests for sparse adjacency matrices."""
+import random
+from array import array
+
+import conftest
+
+from multinet.db import matrix
+from multinet.db.matrix import (
+    attribute_order,
+    reverse_cuthill_mckee,
+    snapshot_counts,
+    spectral_order,
+    symmetric_matrix,
+)
+from multinet.db.snapshot import GraphSnapshot
+
+
+def bandwidth(order, rows, cols):
+    """Return the largest distance of an entry from the diagonal."""
+    rank = {node: i for i, node in enumerate(order)}
+    return max(abs(rank[row] - rank[col]) for row, col in zip(rows, cols))
+
+
+def test_orderings():
+    """Test that a shuffled path is reordered into a band matrix."""
+    labels = list(range(20))
+    random.Random(0).shuffle(labels)
+    rows, cols = labels[:-1], labels[1:]
+
+    matrix = symmetric_matrix(20, rows, cols)
+    assert bandwidth(range(20), rows, cols) > 1
+    assert bandwidth(reverse_cuthill_mckee(matrix), rows, cols) == 1
+    assert bandwidth(spectral_order(matrix), rows, cols) == 1
+
+    assert attribute_order([3, None, 1, 2]) == [2, 3, 0, 1]
+    assert attribute_order([3, None, 1, 2], descending=True) == [0, 3, 2, 1]
+
+
+def test_spectral_grid():
+    """Test that spectral ordering reduces the bandwidth of a shuffled grid."""
+    width, height = 10, 30
+    labels = list(range(width * height))
+    random.Random(0).shuffle(labels)
+
+    rows, cols = [], []
+    for i in range(height):
+        for j in range(width):
+            node = labels[i * width + j]
+            if j + 1 < width:
+                rows.append(node)
+                cols.append(labels[i * width + j + 1])
+            if i + 1 < height:
+                rows.append(node)
+                cols.append(labels[(i + 1) * width + j])
+
+    matrix = symmetric_matrix(width * height, rows, cols)
+    order = spectral_order(matrix)
+
+    assert sorted(order) == list(range(width * height))
+    assert bandwidth(range(width * height), rows, cols) > 10 * width
+    assert bandwidth(order, rows, cols) <= 2 * width
+
+
+def test_snapshot_counts():
+    """Test that edge counts are selected from a snapshot, in the order given."""
+    ids = ["t/a", "t/b", "t/c"]
+    snapshot = GraphSnapshot(
+        "1", ids, array("i", [0, 0, 1, 2]), array("i", [1, 1, 2, 0])
+    )
+
+    counts = snapshot_counts(snapshot, ["t/b", "t/isolated", "t/a"])
+    assert counts.toarray().tolist() == [[0, 0, 0], [0, 0, 0], [2, 0, 0]]
+
+
+def test_graph_matrix(chain_graph, managed_user, server):
+    """Test retrieving the adjacency matrix of a graph, and of a node subset."""
+    url = f"/api/workspaces/{chain_graph.name}/graphs/chain/matrix"
+
+    with conftest.login(managed_user, server):
+        coo = server.get(url)
+        ordered = server.get(url, query_string={"order": "attribute"})
+        reordered = server.get(
+            url,
+            query_string={
+                "order": "attribute",
+                "attribute": "_key",
+                "descending": True,
+            },
+        )
+        csr = server.post(
+            url, json=["nodes/b", "nodes/c"], query_string={"format": "csr"}
+        )
+
+    assert coo.json["nodes"] == ["nodes/a", "nodes/b", "nodes/c", "nodes/d"]
+    assert coo.json["rows"] == [0, 1]
+    assert coo.json["cols"] == [1, 2]
+    assert coo.json["values"] == [1, 1]
+
+    assert ordered.status_code == 400
+
+    assert reordered.json["nodes"] == ["nodes/d", "nodes/c", "nodes/b", "nodes/a"]
+    assert reordered.json["rows"] == [2, 3]
+    assert reordered.json["cols"] == [1, 2]
+
+    assert csr.json["shape"] == [2, 2]
+    assert csr.json["offsets"] == [0, 1, 1]
+    assert csr.json["indices"] == [1]
+
+
+def test_graph_matrix_limit(chain_graph, managed_user, server, monkeypatch):
+    """Test that the node limit applies to the matrices of node subsets too."""
+    url = f"/api/workspaces/{chain_graph.name}/graphs/chain/matrix"
+    monkeypatch.setattr(matrix, "MAX_MATRIX_NODES", 1)
+
+    with conftest.login(managed_user, server):
+        resp = server.post(url, json=["nodes/a", "nodes/b"])
+
+    assert resp.status_code == 400
+    assert resp.json == {"size": 2, "limit": 1}
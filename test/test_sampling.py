@@ -0,0 +1,61 @@
+"""Tests for graph samples that explore outward from seed nodes."""
+import random
+
+from multinet.db import sampling
+
+from typing import Dict, List, Optional
+
+# The graph a - b - c, d - e, and f without any edges
+EDGES = [("t/a", "t/b"), ("t/b", "t/c"), ("t/d", "t/e")]
+NODES = ["t/a", "t/b", "t/c", "t/d", "t/e", "t/f"]
+
+
+def adjacency(node_ids: List[str]) -> Dict[str, List[str]]:
+    """Return the nodes adjacent to each of `node_ids`."""
+    return {
+        node: [b for a, b in EDGES if a == node] + [a for a, b in EDGES if b == node]
+        for node in node_ids
+    }
+
+
+def random_node(rng: random.Random) -> Optional[str]:
+    """Return a random node."""
+    return rng.choice(NODES)
+
+
+def test_forest_fire():
+    """Test that forest fires spread from their start, and restart if they die out."""
+    snowball = sampling.forest_fire(
+        ["t/a"], 3, 1, random.Random(0), adjacency, random_node
+    )
+    assert snowball == ["t/a", "t/b", "t/c"]
+
+    fire = sampling.forest_fire(
+        ["t/d"], 6, 0.5, random.Random(0), adjacency, random_node
+    )
+    assert fire[0] == "t/d"
+    assert sorted(fire) == NODES
+
+
+def test_random_walk():
+    """Test that random walks visit distinct nodes, jumping out of dead ends."""
+    walk = sampling.random_walk(
+        ["t/c"], 6, 0.15, random.Random(0), adjacency, random_node
+    )
+    assert walk[0] == "t/c"
+    assert sorted(walk) == NODES
+
+    seeded = [
+        sampling.random_walk([], 3, 0.15, random.Random(1), adjacency, random_node)
+        for _ in range(2)
+    ]
+    assert seeded[0] == seeded[1]
+
+
+def test_sampling_isolated_start():
+    """Test that samples starting from an isolated node move on to other nodes."""
+    for sample in (sampling.forest_fire, sampling.random_walk):
+        found = sample(["t/f"], 2, 0.5, random.Random(0), adjacency, random_node)
+
+        assert found[0] == "t/f"
+        assert len(found) == 2
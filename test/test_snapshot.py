@@ -0,0 +1,124 @@
+"""Tests for in-memory graph snapshots."""
+from array import array
+
+from multinet.db.snapshot import GraphSnapshot, SnapshotCache
+
+
+def make_snapshot() -> GraphSnapshot:
+    """Return a snapshot of a small graph: a -> b -> c -> d, and a -> c."""
+    ids = ["t/a", "t/b", "t/c", "t/d"]
+    sources = array("i", [0, 1, 2, 0])
+    targets = array("i", [1, 2, 3, 2])
+
+    return GraphSnapshot("1", ids, sources, targets)
+
+
+def test_snapshot_degree():
+    """Test that degrees are read from the compressed adjacency."""
+    snapshot = make_snapshot()
+
+    assert snapshot.edge_count == 4
+    assert snapshot.degree("t/a", "outgoing") == 2
+    assert snapshot.degree("t/a", "incoming") == 0
+    assert snapshot.degree("t/c") == 3
+    assert snapshot.degree("t/missing") == 0
+
+
+def test_snapshot_neighbors():
+    """Test that neighbors are found breadth first, up to a depth and limit."""
+    snapshot = make_snapshot()
+
+    assert snapshot.neighbors("t/a", direction="outgoing") == ["t/b", "t/c"]
+    assert snapshot.neighbors("t/d", direction="incoming") == ["t/c"]
+    assert snapshot.neighbors("t/d", depth=2, direction="incoming") == [
+        "t/c",
+        "t/b",
+        "t/a",
+    ]
+    assert snapshot.neighbors("t/b", depth=10) == ["t/c", "t/a", "t/d"]
+    assert snapshot.neighbors("t/b", depth=10, limit=2) == ["t/c", "t/a"]
+    assert snapshot.neighbors("t/missing") == []
+
+
+def test_disabled_cache():
+    """Test that a cache without any capacity never loads snapshots."""
+    cache = SnapshotCache(0)
+    cache.put(("workspace", "graph"), make_snapshot())
+
+    assert not cache.enabled()
+    assert not cache.admits(("workspace", "graph"), "1", 0)
+    assert cache.get(("workspace", "graph"), "1") is None
+
+
+def test_oversized_snapshots():
+    """Test that snapshots too large to cache aren't loaded again for caching."""
+    key = ("workspace", "graph")
+    snapshot = make_snapshot()
+
+    cache = SnapshotCache(snapshot.nbytes - 1)
+    assert not cache.admits(key, "1", cache.max_bytes)
+    assert cache.admits(key, "1", 4)
+
+    cache.put(key, snapshot)
+    assert cache.get(key, "1") is None
+    assert not cache.admits(key, "1", 4)
+    assert cache.admits(key, "2", 4)
+
+    cache = SnapshotCache(snapshot.nbytes)
+    cache.put(key, snapshot)
+    assert cache.get(key, "1") is snapshot
+    assert cache.get(key, "2") is None
+
+
+def test_snapshot_components():
+    """Test that weakly connected components are labeled."""
+    ids = ["t/a", "t/b", "t/c", "t/d", "t/e"]
+    snapshot = GraphSnapshot("1", ids, array("i", [0, 2, 4]), array("i", [1, 1, 3]))
+
+    assert list(snapshot.components()) == [0, 0, 0, 1, 1]
+
+
+def test_snapshot_strong_components():
+    """Test that strongly connected components follow edge direction."""
+    ids = ["t/a", "t/b", "t/c", "t/d"]
+    sources = array("i", [0, 1, 2, 2])
+    targets = array("i", [1, 0, 3, 0])
+    labels = GraphSnapshot("1", ids, sources, targets).strong_components()
+
+    assert labels[0] == labels[1]
+    assert len(set(labels)) == 3
+
+
+def test_snapshot_pagerank():
+    """Test that PageRank sums to one, and favors nodes with more incoming edges."""
+    ranks = make_snapshot().pagerank()
+
+    assert abs(sum(ranks) - 1) < 1e-6
+    assert ranks[0] < ranks[1] < ranks[2] < ranks[3]
+
+    isolated = make_snapshot().pagerank(node_count=6)
+    assert len(isolated) == 6
+    assert abs(sum(isolated) - 1) < 1e-6
+    assert isolated[4] == isolated[5] == isolated[0]
+
+
+def test_snapshot_degree_centrality():
+    """Test that degree centrality is normalized by the node count."""
+    snapshot = make_snapshot()
+
+    assert list(snapshot.degree_centrality()) == [2 / 3, 2 / 3, 1, 1 / 3]
+    assert list(snapshot.degree_centrality("outgoing", node_count=5)) == [
+        0.5,
+        0.25,
+        0.25,
+        0,
+    ]
+
+
+def test_snapshot_adjacent_ids():
+    """Test that adjacent nodes are listed in both directions, with repetition."""
+    snapshot = make_snapshot()
+
+    adjacent = snapshot.adjacent_ids(["t/c", "t/missing"])
+    assert sorted(adjacent["t/c"]) == ["t/a", "t/b", "t/d"]
+    assert adjacent["t/missing"] == []
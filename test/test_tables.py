@@ -0,0 +1,73 @@
+"""Tests for table endpoints."""
+import conftest
+
+from multinet.db.models.table import MAX_SAMPLE_ROWS
+
+
+def test_table_sample(populated_workspace, managed_user, server):
+    """Test that table samples have the requested size and are reproducible."""
+    workspace, _, node_table, _ = populated_workspace
+    url = f"/api/workspaces/{workspace.name}/tables/{node_table}/sample"
+
+    with conftest.login(managed_user, server):
+        first = server.get(url, query_string={"n": 10, "seed": 42})
+        second = server.get(url, query_string={"n": 10, "seed": 42})
+        everything = server.get(url, query_string={"n": 1000})
+        invalid = server.get(url, query_string={"n": -1})
+        too_large = server.get(url, query_string={"n": MAX_SAMPLE_ROWS + 1})
+
+    assert first.status_code == 200
+    assert first.json["count"] == workspace.table(node_table).row_count()
+    assert len(first.json["rows"]) == 10
+    assert len({row["_key"] for row in first.json["rows"]}) == 10
+    assert first.json == second.json
+
+    assert len(everything.json["rows"]) == everything.json["count"]
+    assert invalid.status_code == 400
+    assert too_large.status_code == 400
+
+
+def test_update_table_rows(managed_workspace, managed_user, server):
+    """Test that streamed partial rows are merged into a table."""
+    table = managed_workspace.create_table("table", edge=False)
+    table.insert([{"_key": str(i), "value": i} for i in range(5)])
+
+    body = '{"_key": "0", "value": 10}\n\n{"_key": "1", "label": "one"}\n'
+    body += '{"_key": "missing", "value": 0}\n'
+
+    with conftest.login(managed_user, server):
+        resp = server.patch(
+            f"/api/workspaces/{managed_workspace.name}/tables/table/rows", data=body
+        )
+
+        malformed = server.patch(
+            f"/api/workspaces/{managed_workspace.name}/tables/table/rows",
+            data='{"value": 0}\n',
+        )
+
+    assert resp.status_code == 200
+    assert resp.json["count"] == 2
+    assert resp.json["errors"] == 1
+
+    assert table.row("0")["value"] == 10
+    assert table.row("1")["value"] == 1
+    assert table.row("1")["label"] == "one"
+
+    assert malformed.status_code == 400
+
+
+def test_delete_table_rows(managed_workspace, managed_user, server):
+    """Test that rows with streamed keys are deleted from a table."""
+    table = managed_workspace.create_table("table", edge=False)
+    table.insert([{"_key": str(i)} for i in range(5)])
+
+    with conftest.login(managed_user, server):
+        resp = server.delete(
+            f"/api/workspaces/{managed_workspace.name}/tables/table/rows",
+            data='"0"\n{"_key": "1"}\n"2"\n',
+        )
+
+    assert resp.status_code == 200
+    assert resp.json["count"] == 3
+    assert resp.json["errors"] == 0
+    assert table.row_count() == 2
@@ -0,0 +1,82 @@
+"""Tests for nested set indexing of trees."""
+import json
+
+import conftest
+
+from multinet.db.tree import nested_set
+from multinet.uploaders.nested_json import analyze_nested_json
+
+
+def test_nested_set():
+    """Test that intervals nest exactly when nodes are ancestors."""
+    tree = ("r", [("a", [("x", []), ("y", [])]), ("b", [])])
+    attributes = {node[0]: attrs for node, attrs in nested_set(tree, lambda n: n[1])}
+
+    assert attributes["r"] == {"tree_left": 0, "tree_right": 9, "tree_depth": 0}
+    assert attributes["a"]["tree_depth"] == 1
+    assert attributes["x"]["tree_depth"] == 2
+
+    def contains(ancestor, node):
+        outer, inner = attributes[ancestor], attributes[node]
+        return outer["tree_left"] < inner["tree_left"] < outer["tree_right"]
+
+    assert contains("r", "x") and contains("a", "y")
+    assert not contains("b", "x") and not contains("x", "a")
+
+
+def test_nested_json_tree_index():
+    """Test that nested JSON trees are indexed on request."""
+    data = json.dumps(
+        {"node_data": {"_key": "root"}, "children": [{"node_data": {"_key": "leaf"}}]}
+    )
+
+    (internal, leaves), _ = analyze_nested_json(data, "int", "leaf", index_tree=True)
+    assert internal[0]["tree_right"] == 3
+    assert leaves[0]["tree_left"] == 1
+    assert leaves[0]["tree_depth"] == 1
+
+
+def test_tree_queries(managed_workspace, managed_user, server, data_directory):
+    """Test subtree and ancestor queries on an uploaded newick tree."""
+    workspace = managed_workspace.name
+    with open(data_directory / "basic_newick.tree") as newick_file:
+        data = newick_file.read()
+
+    # Existing nodes are given tree attributes too
+    nodes = managed_workspace.create_table("tree_nodes", edge=False)
+    nodes.insert([{"_key": "A", "label": "existing"}])
+
+    url = f"/api/workspaces/{workspace}/graphs/tree/nodes/tree_nodes"
+    with conftest.login(managed_user, server):
+        resp = server.post(
+            f"/api/newick/{workspace}/tree",
+            data=data,
+            query_string={"index_tree": True},
+        )
+        assert resp.status_code == 200
+
+        ancestors = server.get(f"{url}/A/ancestors")
+        root = ancestors.json[0]["_key"]
+        subtree = server.get(f"{url}/{root}/subtree", query_string={"limit": 3})
+        next_page = server.get(
+            f"{url}/{root}/subtree", query_string={"offset": 3, "limit": 3}
+        )
+        leaf_subtree = server.get(f"{url}/B/subtree")
+        existing_subtree = server.get(f"{url}/A/subtree")
+        is_ancestor = server.get(f"{url}/A/ancestors/tree_nodes/{root}")
+        not_ancestor = server.get(f"{url}/A/ancestors/tree_nodes/B")
+
+    assert [node["tree_depth"] for node in ancestors.json] == [0, 1]
+
+    assert subtree.json["count"] == 7
+    assert [node["_key"] for node in subtree.json["nodes"]][:2] == [root, "B"]
+
+    lefts = [node["tree_left"] for node in subtree.json["nodes"]]
+    lefts += [node["tree_left"] for node in next_page.json["nodes"]]
+    assert next_page.json["count"] == 7
+    assert len(lefts) == 6 and lefts == sorted(set(lefts))
+
+    assert leaf_subtree.json["count"] == 1
+    assert existing_subtree.json["nodes"][0]["label"] == "existing"
+    assert is_ancestor.json == {"ancestor": True, "distance": 2}
+    assert not_ancestor.json == {"ancestor": False, "distance": None}